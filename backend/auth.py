@@ -2,18 +2,20 @@ import hashlib
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from .config import get_settings
-from .database import db
+from .database import adb
 from .models import User, UserType
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+STREAM_SCOPE = "stream"
 
 
 def hash_password(password: str) -> str:
@@ -39,26 +41,25 @@ def create_token(user_id: str, role: UserType) -> str:
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify token signature and expiration; return user ID if valid."""
+def create_stream_token(user_id: str) -> str:
+    """Create a short-lived token that only opens ``/stream`` (it travels in the URL)."""
+    expire = datetime.now(timezone.utc) + timedelta(seconds=settings.stream_token_expires_s)
+    payload = {"sub": user_id, "scope": STREAM_SCOPE, "exp": expire}
+    return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+
+
+def verify_token(token: str, scope: Optional[str] = None) -> Optional[str]:
+    """Verify token signature, expiration and scope; return user ID if valid."""
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        user_id: Optional[str] = payload.get("sub")
-        if user_id is None:
-            return None
-        user = db.get_user_by_id(user_id)
-        if user and user.is_active:
-            return user_id
     except JWTError:
         return None
-    return None
+    if payload.get("scope") != scope:
+        return None
+    return payload.get("sub")
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
-    """Get current authenticated user"""
-    token = credentials.credentials
-    user_id = verify_token(token)
-
+async def _active_user(user_id: Optional[str]) -> User:
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,7 +67,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.get_user_by_id(user_id)
+    user = await adb.get_user_by_id(user_id)
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,6 +78,27 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     return user
 
 
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    """Get current authenticated user"""
+    return await _active_user(verify_token(credentials.credentials))
+
+
+async def get_stream_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    stream_token: Optional[str] = Query(None),
+) -> User:
+    """get_current_user that also takes a ``?stream_token=``, since EventSource cannot send headers"""
+    if credentials:
+        return await get_current_user(credentials)
+    if not stream_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await _active_user(verify_token(stream_token, STREAM_SCOPE))
+
+
 async def get_current_doctor(current_user: User = Depends(get_current_user)) -> User:
     """Ensure current user is a doctor"""
     if current_user.user_type != UserType.DOCTOR:
@@ -11,9 +11,28 @@ class Settings(BaseSettings):
     jwt_secret: str = "super-secret-key-change-me"
     jwt_algorithm: str = "HS256"
     jwt_expires_min: int = 60
+    stream_token_expires_s: int = 60  # lifetime of the URL token that opens /stream
     cors_origins: str = "http://localhost:3000,http://127.0.0.1:5500"
     openai_api_key: Optional[str] = None
     openai_model: str = "gpt-4o-mini"
+    data_dir: str = "data"
+    events_backend: str = "orm"  # orm | json; where observations and alerts live
+    storage_backend: str = "json"  # json | sqlite
+    sqlite_path: Optional[str] = None  # defaults to <data_dir>/medicai.sqlite3
+    storage_mode: str = "json"  # json | log
+    storage_format: str = "json"  # json | msgpack (snapshot encoding of the file store)
+    storage_shards: int = 0  # split per-patient collections of the json store into N shard dirs; 0 keeps one file
+    storage_compact_threshold: int = 1000
+    storage_compact_interval_s: float = 30.0
+    storage_coalesce_window_ms: float = 2.0  # group-commit window for event/notification appends
+    storage_coalesce_max_ops: int = 64
+    event_log_segment_bytes: int = 1_048_576  # audit / alert-event segments rotate at this size...
+    event_log_segment_age_s: float = 86400.0  # ...or age
+    event_log_compress: bool = True  # gzip sealed segments
+    alert_rules_path: Optional[str] = None  # JSON alert rule pack; defaults to backend/services/alert_rules.json
+    missing_data_sweep_s: float = 60.0  # longest pause between missing-data sweeps
+    active_alert_refresh_s: float = 30.0  # reload a patient's active alerts this often (other workers may change them)
+    storage_io_workers: int = 8  # threads serving async storage calls; 0 runs them on the event loop
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="allow")
 
@@ -1,338 +1,1347 @@
+import bisect
+import heapq
 import json
 import os
 import secrets
 import string
-from typing import Dict, List, Optional
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from enum import Enum
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 import uuid
 
+if TYPE_CHECKING:
+    from .db.repository import ClinicalEventRepository
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no advisory flock
+    fcntl = None  # type: ignore
+
+from .config import Settings, get_settings
+from .storage.aio import AsyncDatabase
+from .storage.codec import get_codec
+from .storage.segments import SegmentedLog
+from .storage.timeseries import ObservationSeriesStore
+from .storage.views import projection, view_model
 from .models import (User, ClinicalRecord, PatientAccess, UserType, VitalSigns, TreatmentAdjustment, AdjustmentAuditEntry, CarePlanRevision, Notification, AdjustmentStatus, NotificationSeverity, Observation, Alert, AlertTimelineEntry, AlertStatus, AlertSeverity)
 
 
+# Append-only event collections stored as segmented logs:
+# collection -> (time field, fields indexed per segment)
+EVENT_LOGS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "audit_log": ("timestamp", ("adjustment_id", "actor_id")),
+    "alert_events": ("created_at", ("alert_id", "actor_id")),
+}
+
+# Per-patient collections split across shard dirs when sharding is enabled:
+# collection -> (routing field, field ordering rows across shards)
+SHARDED_COLLECTIONS: Dict[str, Tuple[str, str]] = {
+    "clinical_records": ("patient_id", "created_at"),
+    "observations": ("patient_id", "effective_at"),
+    "alerts": ("patient_id", "created_at"),
+    "notifications": ("user_id", "created_at"),
+}
+
+PENDING_ADJUSTMENT_STATUSES = (AdjustmentStatus.REQUESTED, AdjustmentStatus.UNDER_REVIEW)
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor does not match any stored row."""
+
+
+def _index_key(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _walk(rows: List[dict], lo: int, hi: int, newest_first: bool) -> Iterator[dict]:
+    indices = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+    for idx in indices:
+        yield rows[idx]
+
+
+class _CollectionCache:
+    """Resident copy of one collection with lazily built hash indexes.
+
+    Indexes map a field value to the rows holding it, in storage order, so
+    unique fields (id, email, patient_code) and multi-valued ones
+    (patient_id, doctor_id) share the same structure.
+    """
+
+    def __init__(self, rows: List[dict], stamp: Tuple):
+        self.rows = rows
+        self.stamp = stamp
+        self.positions: Dict[Any, int] = {row.get('id'): idx for idx, row in enumerate(rows)}
+        self.indexes: Dict[str, Dict[Any, List[dict]]] = {}
+
+    def lookup(self, field: str, value: Any) -> List[dict]:
+        index = self.indexes.get(field)
+        if index is None:
+            index = {}
+            for row in self.rows:
+                index.setdefault(row.get(field), []).append(row)
+            self.indexes[field] = index
+        return index.get(_index_key(value), [])
+
+    def append(self, row: dict):
+        self.positions[row.get('id')] = len(self.rows)
+        self.rows.append(row)
+        for field, index in self.indexes.items():
+            index.setdefault(row.get(field), []).append(row)
+
+    def replace(self, row: dict):
+        idx = self.positions.get(row.get('id'))
+        if idx is None:
+            self.append(row)
+            return
+        previous = self.rows[idx]
+        self.rows[idx] = row
+        for field, index in self.indexes.items():
+            old_key, new_key = previous.get(field), row.get(field)
+            bucket = index.get(old_key, [])
+            pos = next(pos for pos, item in enumerate(bucket) if item is previous)
+            if old_key == new_key:
+                bucket[pos] = row
+                continue
+            del bucket[pos]
+            # Keep buckets in storage order so callers can rely on it
+            target = index.setdefault(new_key, [])
+            order = [self.positions[item.get('id')] for item in target]
+            target.insert(bisect.bisect_left(order, idx), row)
+
+
+class _PendingWrites:
+    """Rows queued for one collection until the batch leader flushes them"""
+
+    __slots__ = ("rows", "full", "done", "error")
+
+    def __init__(self):
+        self.rows: List[dict] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
 class SimpleDatabase:
-    """Simple file-based database for MVP"""
-    
-    def __init__(self, data_dir: str = "data"):
+    """Simple file-based database for MVP.
+
+    Snapshots are written with the codec selected by ``storage_format``:
+    indented JSON (``.json``, default) or msgpack (``.msgpack``).
+
+    Two storage modes are supported:
+
+    * ``json`` (default): every write rewrites the whole JSON file.
+    * ``log``: writes are appended as NDJSON records to ``<file>.log`` and
+      periodically compacted into the ``<file>`` snapshot by a background
+      thread, so inserts no longer cost O(total rows).
+
+    Reads are served from a resident write-through cache per collection,
+    invalidated when the file's mtime or size changes, so edits made by
+    other processes are still picked up.
+
+    When an ``events`` repository is supplied, observations and alerts are
+    delegated to it (the SQLAlchemy tables) so ingestion, the alert engine
+    and the dashboard share one indexed store.
+
+    Files are replaced atomically (temp file + rename) and every
+    read-modify-write cycle holds an advisory ``fcntl`` lock on
+    ``<file>.lock``, so several uvicorn workers can share one data dir.
+
+    List reads accept ``fields=(...)``: they then return light view models
+    holding only those fields (plus ``id``), parsed without the full model's
+    validators, which is much cheaper for endpoints that show a few columns.
+
+    Audit and alert timeline events are not JSON files but rotating,
+    indexed segment logs (``<data_dir>/<collection>/``, see SegmentedLog).
+
+    Audit events, alert timeline events and notifications are group
+    committed: concurrent appends to the same collection are written and
+    fsynced together, and each caller returns once its batch is durable.
+
+    With ``shards=N`` the per-patient collections (SHARDED_COLLECTIONS) are
+    split by a hash of their patient/user id into ``shards/000`` ..
+    ``shards/N-1``, each holding its own files, locks and cache. Routing
+    happens in the storage primitives: a per-patient read or write touches
+    one shard, other reads fan out. Shard dirs may be symlinks to other
+    disks. The count is recorded in ``shards/manifest.json``; ``shards=None``
+    reuses it, and an existing unsharded data dir is split on first open.
+    """
+
+    STORAGE_MODES = {"json", "log"}
+
+    # Callables (kind, audience, data) told about new notifications; replaced, never mutated
+    _listeners: Tuple[Callable[[str, Optional[str], Dict[str, Any]], Any], ...] = ()
+
+    def __init__(
+        self,
+        data_dir: str = "data",
+        storage_mode: str = "json",
+        storage_format: str = "json",
+        compact_threshold: int = 1000,
+        compact_interval: float = 30.0,
+        events: Optional["ClinicalEventRepository"] = None,
+        coalesce_window: float = 0.002,
+        coalesce_max_ops: int = 64,
+        segment_max_bytes: int = 1 << 20,
+        segment_max_age: float = 86400.0,
+        segment_compress: bool = True,
+        shards: Optional[int] = None,
+    ):
+        if storage_mode not in self.STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage_mode}")
         self.data_dir = data_dir
-        os.makedirs(data_dir, exist_ok=True)
-        
-        self.users_file = os.path.join(data_dir, "users.json")
-        self.records_file = os.path.join(data_dir, "clinical_records.json")
-        self.access_file = os.path.join(data_dir, "patient_access.json")
-        self.adjustments_file = os.path.join(data_dir, "adjustments.json")
-        self.observations_file = os.path.join(data_dir, "observations.json")
-        self.careplan_revisions_file = os.path.join(data_dir, "careplan_revisions.json")
-        self.audit_log_file = os.path.join(data_dir, "audit_log.json")
-        self.notifications_file = os.path.join(data_dir, "notifications.json")
-        self.alerts_file = os.path.join(data_dir, "alerts.json")
-        self.alert_events_file = os.path.join(data_dir, "alert_events.json")
-        
+        self.storage_mode = storage_mode
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+        self.events = events
+        self.codec = get_codec(storage_format)
+        self._init_paths(data_dir, self.codec.suffix)
+        self._init_shards(self._resolve_shards(shards))
+
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._held_locks: Dict[str, List[int]] = {}
+        self._log_counts: Dict[str, int] = {}
+        self._bulk_files: Optional[set] = None
+        self._cache: Dict[str, _CollectionCache] = {}
+        self._series: Dict[str, ObservationSeriesStore] = {}
+        self._series_sources: Dict[str, _CollectionCache] = {}
+        self._compactor_stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        self._init_coalescer(coalesce_window, coalesce_max_ops)
+
         self._init_files()
-    
+        self._init_patient_codes()
+        self._init_event_logs(segment_max_bytes, segment_max_age, segment_compress)
+        self._split_unsharded()
+        if self.storage_mode == "log":
+            self._start_compactor()
+        if self.events is None:
+            # Rebuild the observation time-series index from disk up front
+            for file_path in self._shard_files(self.observations_file):
+                self._observation_series(file_path)
+
+    def _init_paths(self, data_dir: str, suffix: str = ".json"):
+        os.makedirs(data_dir, exist_ok=True)
+        self.users_file = os.path.join(data_dir, "users" + suffix)
+        self.records_file = os.path.join(data_dir, "clinical_records" + suffix)
+        self.access_file = os.path.join(data_dir, "patient_access" + suffix)
+        self.adjustments_file = os.path.join(data_dir, "adjustments" + suffix)
+        self.observations_file = os.path.join(data_dir, "observations" + suffix)
+        self.careplan_revisions_file = os.path.join(data_dir, "careplan_revisions" + suffix)
+        self.audit_log_file = os.path.join(data_dir, "audit_log" + suffix)
+        self.notifications_file = os.path.join(data_dir, "notifications" + suffix)
+        self.alerts_file = os.path.join(data_dir, "alerts" + suffix)
+        self.alert_events_file = os.path.join(data_dir, "alert_events" + suffix)
+
+    @property
+    def data_files(self) -> List[str]:
+        files = [self.users_file, self.records_file, self.access_file, self.adjustments_file, self.observations_file, self.careplan_revisions_file, self.notifications_file, self.alerts_file]
+        return [shard for file_path in files for shard in self._shard_files(file_path)]
+
+    @property
+    def event_log_files(self) -> List[str]:
+        return [self.audit_log_file, self.alert_events_file]
+
+    # Sharding
+    def _resolve_shards(self, shards: Optional[int]) -> int:
+        """Check ``shards`` against the data dir's manifest, recording it on first use"""
+        manifest = os.path.join(self.data_dir, "shards", "manifest.json")
+        try:
+            with open(manifest, 'r') as f:
+                stored: Optional[int] = json.load(f)["shards"]
+        except FileNotFoundError:
+            stored = None
+        if shards is None:
+            return stored or 0
+        if shards < 0:
+            raise ValueError(f"Invalid shard count: {shards}")
+        if stored is not None and stored != shards:
+            raise ValueError(f"{self.data_dir} is split into {stored} shards, not {shards}")
+        if stored is None and shards:
+            os.makedirs(os.path.dirname(manifest), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(manifest), suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"shards": shards}, f)
+            os.replace(tmp_path, manifest)
+        return shards
+
+    def _init_shards(self, shards: int):
+        self.shards = shards
+        self._shard_keys: Dict[str, Tuple[str, str]] = {}
+        self._shard_paths: Dict[str, List[str]] = {}
+        if not shards:
+            return
+        for file_path in (self.records_file, self.observations_file, self.alerts_file, self.notifications_file):
+            self._shard_keys[file_path] = SHARDED_COLLECTIONS[os.path.splitext(os.path.basename(file_path))[0]]
+            self._shard_paths[file_path] = []
+            for index in range(shards):
+                shard_dir = os.path.join(self.data_dir, "shards", f"{index:03d}")
+                os.makedirs(shard_dir, exist_ok=True)
+                self._shard_paths[file_path].append(os.path.join(shard_dir, os.path.basename(file_path)))
+
+    def _shard_files(self, file_path: str) -> List[str]:
+        """Physical files holding a collection: its shards, or the file itself"""
+        return self._shard_paths.get(file_path, [file_path])
+
+    def _shard_for(self, file_path: str, key: Any) -> str:
+        """Shard file of a collection holding the rows routed by ``key``"""
+        shards = self._shard_paths.get(file_path)
+        if shards is None:
+            return file_path
+        return shards[zlib.crc32(str(key).encode()) % len(shards)]
+
+    def _split_unsharded(self):
+        """Move rows of a pre-sharding collection file into its shards once"""
+        for file_path, (key, _) in self._shard_keys.items():
+            if not os.path.exists(file_path):
+                continue
+            with self._locked(file_path):
+                if not os.path.exists(file_path):
+                    continue
+                groups: Dict[str, List[dict]] = {}
+                for row in self._load_json(file_path):
+                    groups.setdefault(self._shard_for(file_path, row.get(key)), []).append(row)
+                for shard, rows in groups.items():
+                    # Skip rows copied by an earlier, interrupted split
+                    stored = self._collection(shard).positions
+                    self._append_rows(shard, [row for row in rows if row.get('id') not in stored])
+                os.replace(file_path, file_path + ".migrated")
+                if os.path.exists(self._log_path(file_path)):
+                    os.remove(self._log_path(file_path))
+
     def _init_files(self):
-        """Initialize empty JSON files if they don't exist"""
-        for file_path in [self.users_file, self.records_file, self.access_file, self.adjustments_file, self.observations_file, self.careplan_revisions_file, self.audit_log_file, self.notifications_file, self.alerts_file, self.alert_events_file]:
+        """Initialize empty collection files if they don't exist"""
+        for file_path in self.data_files:
             if not os.path.exists(file_path):
-                with open(file_path, 'w') as f:
-                    json.dump([], f)
+                with self._locked(file_path):
+                    if not os.path.exists(file_path):
+                        self._save_json(file_path, [])
     
+    def _init_patient_codes(self):
+        """Create the patient-code reservation dir, backfilled from users once"""
+        self.patient_codes_dir = os.path.join(self.data_dir, "patient_codes")
+        if os.path.isdir(self.patient_codes_dir):
+            return
+        with self._locked(self.users_file):
+            if os.path.isdir(self.patient_codes_dir):
+                return
+            staging = tempfile.mkdtemp(dir=self.data_dir, prefix="patient_codes.", suffix=".tmp")
+            for row in self._lookup(self.users_file, 'user_type', UserType.PATIENT):
+                if row.get('patient_code'):
+                    open(os.path.join(staging, row['patient_code']), 'a').close()
+            # Publish the whole backfill at once so no worker sees it half-built
+            os.rename(staging, self.patient_codes_dir)
+
+    def _init_event_logs(self, max_bytes: int, max_age: float, compress: bool):
+        """Open the segmented event logs, importing a legacy JSON file once"""
+        self._event_logs: Dict[str, SegmentedLog] = {}
+        for file_path in self.event_log_files:
+            time_field, index_fields = EVENT_LOGS[os.path.splitext(os.path.basename(file_path))[0]]
+            log = SegmentedLog(
+                os.path.splitext(file_path)[0],
+                time_field,
+                index_fields,
+                max_bytes=max_bytes,
+                max_age=max_age,
+                compress=compress,
+            )
+            self._event_logs[file_path] = log
+            if os.path.exists(file_path):
+                with self._locked(file_path):
+                    if os.path.exists(file_path):
+                        log.append(self._load_json(file_path))
+                        os.replace(file_path, file_path + ".migrated")
+                        if os.path.exists(self._log_path(file_path)):
+                            os.remove(self._log_path(file_path))
+
     def _load_json(self, file_path: str) -> List[dict]:
-        """Load JSON data from file"""
+        """Load a collection snapshot, replaying its append log if there is one"""
         try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            with open(file_path, 'rb') as f:
+                data = self.codec.load(f)
+        except (FileNotFoundError, *self.codec.errors):
+            data = []
+        # In JSON mode a log is left only by a bulk import that has not compacted yet
+        return self._replay_log(file_path, data)
     
-    def _save_json(self, file_path: str, data: List[dict]):
-        """Save JSON data to file"""
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+    def _save_json(self, file_path: str, data: List[dict], indent: Optional[int] = 2):
+        """Atomically replace a collection file so readers never see a partial write"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", prefix=os.path.basename(file_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self.codec.dump(data, f, indent=indent)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @contextmanager
+    def _locked(self, file_path: str) -> Iterator[None]:
+        """Hold the in-process lock plus an exclusive flock on ``<file>.lock``.
+
+        Re-entrant within a thread, so write primitives can be nested inside
+        larger read-modify-write sections such as ``create_user``.
+        """
+        with self._lock:
+            depth = getattr(self._local, "depth", 0)
+            self._local.depth = depth + 1
+            try:
+                held = self._held_locks.get(file_path)
+                if held is not None:
+                    held[1] += 1
+                    try:
+                        yield
+                    finally:
+                        held[1] -= 1
+                    return
+                fd = os.open(file_path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    self._held_locks[file_path] = [fd, 1]
+                    try:
+                        yield
+                    finally:
+                        del self._held_locks[file_path]
+                        if fcntl is not None:
+                            fcntl.flock(fd, fcntl.LOCK_UN)
+                finally:
+                    os.close(fd)
+            finally:
+                self._local.depth = depth
+
+    # Read cache
+    def _stamp(self, file_path: str) -> Tuple:
+        stamp = []
+        for path in (file_path, self._log_path(file_path)):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _collection(self, file_path: str) -> _CollectionCache:
+        with self._lock:
+            stamp = self._stamp(file_path)
+            cache = self._cache.get(file_path)
+            if cache is None or cache.stamp != stamp:
+                cache = _CollectionCache(self._load_json(file_path), stamp)
+                self._cache[file_path] = cache
+            return cache
+
+    def _rows(self, file_path: str) -> List[dict]:
+        """All rows of a collection; callers must not mutate them"""
+        if file_path in self._shard_keys:
+            return [row for shard in self._shard_files(file_path) for row in self._collection(shard).rows]
+        return self._collection(file_path).rows
+
+    def _iter_rows(self, file_path: str) -> Iterator[dict]:
+        """Stream the rows of a collection in storage order (shard by shard)"""
+        for shard in self._shard_files(file_path):
+            yield from self._collection(shard).rows
+
+    def _lookup(self, file_path: str, field: str, value: Any) -> List[dict]:
+        """Rows whose ``field`` equals ``value``, via a hash index"""
+        shard_key = self._shard_keys.get(file_path)
+        if shard_key is None:
+            return self._collection(file_path).lookup(field, value)
+        if field == shard_key[0]:
+            return self._collection(self._shard_for(file_path, value)).lookup(field, value)
+        return [row for shard in self._shard_files(file_path) for row in self._collection(shard).lookup(field, value)]
+
+    def _first(self, file_path: str, field: str, value: Any) -> Optional[dict]:
+        rows = self._lookup(file_path, field, value)
+        return rows[0] if rows else None
+
+    def _page(
+        self,
+        file_path: str,
+        field: Optional[str] = None,
+        values: Sequence[Any] = (),
+        *,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        newest_first: bool = True,
+        where: Optional[Callable[[dict], bool]] = None,
+    ) -> List[dict]:
+        """Keyset page over a collection in storage order.
+
+        ``after`` is the id of the last row of the previous page. Rows are
+        taken from the ``field`` index buckets for ``values`` (or the whole
+        collection), starting just past that row, and iteration stops as soon
+        as ``limit`` rows pass ``where``.
+        """
+        if file_path in self._shard_keys:
+            return self._page_shards(file_path, field, values, limit=limit, after=after, newest_first=newest_first, where=where)
+        with self._lock:
+            cache = self._collection(file_path)
+            buckets = [cache.rows] if field is None else [cache.lookup(field, value) for value in values]
+            start: Optional[int] = None
+            if after is not None:
+                start = cache.positions.get(after)
+                if start is None:
+                    raise CursorError("Invalid pagination cursor")
+
+            def position(row: dict) -> int:
+                return cache.positions[row.get('id')]
+
+            streams: List[Iterable[dict]] = []
+            for bucket in buckets:
+                lo, hi = 0, len(bucket)
+                if start is not None and newest_first:
+                    hi = bisect.bisect_left(bucket, start, key=position)
+                elif start is not None:
+                    lo = bisect.bisect_right(bucket, start, key=position)
+                streams.append(_walk(bucket, lo, hi, newest_first))
+            if len(streams) == 1:
+                merged: Iterable[dict] = streams[0]
+            else:
+                merged = heapq.merge(*streams, key=(lambda row: -position(row)) if newest_first else position)
+
+            result: List[dict] = []
+            if limit is not None and limit <= 0:
+                return result
+            for row in merged:
+                if where is not None and not where(row):
+                    continue
+                result.append(row)
+                if limit is not None and len(result) >= limit:
+                    break
+            return result
+
+    def _page_shards(
+        self,
+        file_path: str,
+        field: Optional[str],
+        values: Sequence[Any],
+        *,
+        limit: Optional[int],
+        after: Optional[str],
+        newest_first: bool,
+        where: Optional[Callable[[dict], bool]],
+    ) -> List[dict]:
+        """``_page`` over a sharded collection.
+
+        When every value routes to one shard this is that shard's page.
+        Otherwise each shard contributes up to ``limit`` rows past the cursor
+        and pages are merged on (order field, id), which matches storage order
+        as long as rows are appended in time order, as the API does.
+        """
+        key_field, order_field = self._shard_keys[file_path]
+        groups: Dict[str, List[Any]] = {}
+        if field == key_field:
+            for value in values:
+                groups.setdefault(self._shard_for(file_path, value), []).append(value)
+        else:
+            groups = {shard: list(values) for shard in self._shard_files(file_path)}
+        if len(groups) == 1:
+            [(shard, shard_values)] = groups.items()
+            return self._page(shard, field, shard_values, limit=limit, after=after, newest_first=newest_first, where=where)
+
+        def order(row: dict) -> Tuple[str, str]:
+            return str(row.get(order_field) or ''), str(row.get('id'))
+
+        bound: Optional[Tuple[str, str]] = None
+        if after is not None:
+            cursor = self._first(file_path, 'id', after)
+            if cursor is None:
+                raise CursorError("Invalid pagination cursor")
+            bound = order(cursor)
+
+        def keep(row: dict) -> bool:
+            if bound is not None and (order(row) >= bound if newest_first else order(row) <= bound):
+                return False
+            return where is None or where(row)
+
+        pages = [
+            self._page(shard, field, shard_values, limit=limit, newest_first=newest_first, where=keep)
+            for shard, shard_values in groups.items()
+        ]
+        merged = heapq.merge(*pages, key=order, reverse=newest_first)
+        return list(merged if limit is None else islice(merged, max(limit, 0)))
+
+    def _observation_series(self, file_path: str) -> Optional[ObservationSeriesStore]:
+        """Columnar (patient_id, code) index over the cached observations of one file.
+
+        Rebuilt whenever that file's cache is reloaded from disk.
+        """
+        with self._lock:
+            cache = self._collection(file_path)
+            if self._series_sources.get(file_path) is not cache:
+                self._series[file_path] = ObservationSeriesStore.from_rows(cache.rows)
+                self._series_sources[file_path] = cache
+            return self._series[file_path]
+
+    @staticmethod
+    def _hydrate(model: type, rows: Iterable[dict], fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Full models by default; projected view models when ``fields`` is given"""
+        if fields is None:
+            return [model(**row) for row in rows]
+        view = view_model(model, projection(model, fields))
+        return [view.model_validate(row) for row in rows]
+
+    # Write primitives shared by every collection
+    @staticmethod
+    def _to_stored(row: dict) -> dict:
+        # Cached rows must look exactly like rows parsed back from disk
+        return json.loads(json.dumps(row, default=str))
+
+    def _append_rows(self, file_path: str, rows: List[dict]):
+        """Insert rows at the end of a collection"""
+        if not rows:
+            return
+        shard_key = self._shard_keys.get(file_path)
+        if shard_key is not None:
+            groups: Dict[str, List[dict]] = {}
+            for row in rows:
+                groups.setdefault(self._shard_for(file_path, row.get(shard_key[0])), []).append(row)
+            for shard, shard_rows in groups.items():
+                self._append_rows(shard, shard_rows)
+            return
+        rows = [self._to_stored(row) for row in rows]
+        event_log = self._event_logs.get(file_path)
+        with self._locked(file_path):
+            if event_log is not None:
+                event_log.append(rows)
+                return
+            cache = self._collection(file_path)
+            if self.storage_mode == "log":
+                self._append_log(file_path, [{"op": "append", "row": row} for row in rows])
+            elif self._bulk_files is not None:
+                self._append_log(file_path, [{"op": "append", "row": row} for row in rows])
+                self._bulk_files.add(file_path)
+            else:
+                self._save_json(file_path, cache.rows + rows)
+            for row in rows:
+                cache.append(row)
+            cache.stamp = self._stamp(file_path)
+
+    def _upsert_row(self, file_path: str, row: dict, must_exist: bool = False) -> bool:
+        """Replace the row with the same id, appending it if absent.
+
+        Returns ``False`` without writing when ``must_exist`` is set and no row
+        with that id is stored.
+        """
+        row = self._to_stored(row)
+        shard_key = self._shard_keys.get(file_path)
+        if shard_key is not None:
+            file_path = self._shard_for(file_path, row.get(shard_key[0]))
+        with self._locked(file_path):
+            cache = self._collection(file_path)
+            idx = cache.positions.get(row['id'])
+            if idx is None and must_exist:
+                return False
+            if self.storage_mode == "log":
+                self._append_log(file_path, [{"op": "upsert", "row": row}])
+            else:
+                data = list(cache.rows)
+                if idx is None:
+                    data.append(row)
+                else:
+                    data[idx] = row
+                self._save_json(file_path, data)
+            cache.replace(row)
+            cache.stamp = self._stamp(file_path)
+            return True
+
+    def _upsert_rows(self, file_path: str, rows: List[dict]):
+        """_upsert_row for many rows, with one write per file"""
+        if not rows:
+            return
+        shard_key = self._shard_keys.get(file_path)
+        if shard_key is not None:
+            groups: Dict[str, List[dict]] = {}
+            for row in rows:
+                groups.setdefault(self._shard_for(file_path, row.get(shard_key[0])), []).append(row)
+            for shard, shard_rows in groups.items():
+                self._upsert_rows(shard, shard_rows)
+            return
+        rows = [self._to_stored(row) for row in rows]
+        with self._locked(file_path):
+            cache = self._collection(file_path)
+            if self.storage_mode == "log":
+                self._append_log(file_path, [{"op": "upsert", "row": row} for row in rows])
+            else:
+                data = list(cache.rows)
+                appended: Dict[Any, int] = {}
+                for row in rows:
+                    idx = cache.positions.get(row['id'], appended.get(row['id']))
+                    if idx is None:
+                        appended[row['id']] = len(data)
+                        data.append(row)
+                    else:
+                        data[idx] = row
+                self._save_json(file_path, data)
+            for row in rows:
+                cache.replace(row)
+            cache.stamp = self._stamp(file_path)
+
+    def _query_events(
+        self,
+        file_path: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        **filters: Any,
+    ) -> List[dict]:
+        """Rows of an event log in append order, read only from matching segments"""
+        return self._event_logs[file_path].query(start, end, **filters)
+
+    # Group commit
+    def _init_coalescer(self, window: float, max_ops: int):
+        self.coalesce_window = window
+        self.coalesce_max_ops = max_ops
+        self._coalesce_lock = threading.Lock()
+        self._pending: Dict[str, _PendingWrites] = {}
+        self._flush_locks: Dict[str, threading.Lock] = {}
+
+    def _append_coalesced(self, file_path: str, rows: List[dict]):
+        """Append rows as part of a group commit on ``file_path``.
+
+        The first writer of a batch becomes its leader: it waits up to
+        ``coalesce_window`` seconds (or until ``coalesce_max_ops`` rows are
+        queued), then appends every queued row in one write while the others
+        block until that write is durable. Rows queued while a flush is in
+        progress join the next batch, so under load batches grow on their own.
+        Calls made inside a locked section bypass batching, since waiting on
+        another thread there could deadlock.
+        """
+        if not rows:
+            return
+        if getattr(self._local, "depth", 0):
+            self._append_rows(file_path, rows)
+            return
+        with self._coalesce_lock:
+            batch = self._pending.get(file_path)
+            leader = batch is None
+            if leader:
+                batch = self._pending[file_path] = _PendingWrites()
+                flush_lock = self._flush_locks.setdefault(file_path, threading.Lock())
+            batch.rows.extend(rows)
+            if len(batch.rows) >= self.coalesce_max_ops:
+                batch.full.set()
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return
+
+        try:
+            if self.coalesce_window > 0:
+                batch.full.wait(self.coalesce_window)
+            with flush_lock:
+                with self._coalesce_lock:
+                    del self._pending[file_path]
+                self._append_rows(file_path, batch.rows)
+        except BaseException as exc:
+            batch.error = exc
+            raise
+        finally:
+            batch.done.set()
+
+    # Append-log storage
+    @staticmethod
+    def _log_path(file_path: str) -> str:
+        return file_path + ".log"
+
+    def _append_log(self, file_path: str, entries: List[dict]):
+        payload = "".join(json.dumps(entry, default=str) + "\n" for entry in entries).encode()
+        with open(self._log_path(file_path), 'ab+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    # Close off a torn line from an interrupted append so replay can skip it
+                    payload = b"\n" + payload
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_counts[file_path] = self._log_counts.get(file_path, 0) + len(entries)
+
+    def _replay_log(self, file_path: str, data: List[dict]) -> List[dict]:
+        try:
+            f = open(self._log_path(file_path), 'r')
+        except FileNotFoundError:
+            return data
+        positions = {item.get('id'): idx for idx, item in enumerate(data)}
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn trailing line from an interrupted append is ignored
+                    continue
+                row = entry.get("row")
+                idx = positions.get(row.get('id')) if row.get('id') is not None else None
+                if idx is not None:
+                    # An append already in the snapshot (a JSON-mode write saved it) keeps the snapshot's row
+                    if entry.get("op") == "upsert":
+                        data[idx] = row
+                    continue
+                positions[row.get('id')] = len(data)
+                data.append(row)
+        return data
+
+    def compact(self, file_path: Optional[str] = None):
+        """Fold append logs into their JSON snapshots"""
+        targets = [file_path] if file_path else self.data_files
+        for target in targets:
+            with self._locked(target):
+                log_path = self._log_path(target)
+                if not os.path.exists(log_path):
+                    continue
+                data = self._load_json(target)
+                self._save_json(target, data, indent=None)
+                os.remove(log_path)
+                self._log_counts[target] = 0
+                cache = self._cache.get(target)
+                if cache is not None:
+                    cache.stamp = self._stamp(target)
+
+    def _start_compactor(self):
+        for file_path in self.data_files:
+            try:
+                with open(self._log_path(file_path), 'r') as f:
+                    self._log_counts[file_path] = sum(1 for _ in f)
+            except FileNotFoundError:
+                self._log_counts[file_path] = 0
+        self._compactor = threading.Thread(target=self._compaction_loop, name="simpledb-compactor", daemon=True)
+        self._compactor.start()
+
+    def _compaction_loop(self):
+        while not self._compactor_stop.wait(self.compact_interval):
+            for file_path, count in list(self._log_counts.items()):
+                if count >= self.compact_threshold:
+                    try:
+                        self.compact(file_path)
+                    except OSError:
+                        # Retry on the next tick; the log is still authoritative
+                        continue
+
+    @contextmanager
+    def bulk_appends(self) -> Iterator[None]:
+        """Send JSON-mode appends to the append log, compacting each file once at the end.
+
+        Without it every batch of a bulk import rewrites the whole snapshot.
+        """
+        if self._bulk_files is not None or self.storage_mode != "json":
+            yield
+            return
+        self._bulk_files = set()
+        try:
+            yield
+        finally:
+            files, self._bulk_files = self._bulk_files, None
+            for file_path in files:
+                self.compact(file_path)
+
+    def close(self):
+        """Stop the background compactor and flush pending log records"""
+        if self._compactor is not None:
+            self._compactor_stop.set()
+            self._compactor.join()
+            self._compactor = None
+            self.compact()
     
     # User operations
+    def claim_patient_code(self, code: str) -> bool:
+        """Atomically reserve a patient code; False if it is already taken.
+
+        A reservation is an ``O_EXCL`` file under ``patient_codes/``, so the
+        claim is O(1), never reads users.json and is safe across processes.
+        """
+        if not code.isalnum():
+            raise ValueError(f"Invalid patient code: {code!r}")
+        try:
+            fd = os.open(os.path.join(self.patient_codes_dir, code), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        return True
+
+    def release_patient_code(self, code: str):
+        try:
+            os.remove(os.path.join(self.patient_codes_dir, code))
+        except FileNotFoundError:
+            pass
+
     def generate_patient_code(self) -> str:
-        """Generate a unique 8-character patient code"""
+        """Generate and reserve a unique 8-character patient code"""
         while True:
             code = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
-            if not self.get_patient_by_code(code):
+            if self.claim_patient_code(code):
                 return code
     
     def create_user(self, user: User) -> User:
         """Create a new user"""
-        users = self._load_json(self.users_file)
-        
-        # Check if email already exists
-        if any(u.get('email') == user.email for u in users):
-            raise ValueError("Email already exists")
-        
-        # Generate patient code for patients
-        if user.user_type == UserType.PATIENT and not user.patient_code:
-            user.patient_code = self.generate_patient_code()
-        
-        user_dict = user.dict()
-        users.append(user_dict)
-        self._save_json(self.users_file, users)
+        with self._locked(self.users_file):
+            # Check if email already exists
+            if self._lookup(self.users_file, 'email', user.email):
+                raise ValueError("Email already exists")
+
+            # Reserve (or generate) the patient code for patients
+            if user.user_type == UserType.PATIENT:
+                if not user.patient_code:
+                    user.patient_code = self.generate_patient_code()
+                elif not self.claim_patient_code(user.patient_code):
+                    raise ValueError("Patient code already exists")
+
+            try:
+                self._append_rows(self.users_file, [user.dict()])
+            except BaseException:
+                if user.patient_code:
+                    self.release_patient_code(user.patient_code)
+                raise
         return user
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        users = self._load_json(self.users_file)
-        for user_dict in users:
-            if user_dict.get('email') == email:
-                return User(**user_dict)
-        return None
+        user_dict = self._first(self.users_file, 'email', email)
+        return User(**user_dict) if user_dict else None
     
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID"""
-        users = self._load_json(self.users_file)
-        for user_dict in users:
-            if user_dict.get('id') == user_id:
-                return User(**user_dict)
-        return None
+        user_dict = self._first(self.users_file, 'id', user_id)
+        return User(**user_dict) if user_dict else None
     
-    def get_doctors(self) -> List[User]:
-        """Get all doctors"""
-        users = self._load_json(self.users_file)
-        return [User(**u) for u in users if u.get('user_type') == UserType.DOCTOR]
+    def get_doctors(
+        self, *, limit: Optional[int] = None, after: Optional[str] = None, fields: Optional[Sequence[str]] = None
+    ) -> List[User]:
+        """Get doctors in registration order"""
+        rows = self._page(self.users_file, 'user_type', [UserType.DOCTOR], limit=limit, after=after, newest_first=False)
+        return self._hydrate(User, rows, fields)
     
     def get_patients(self) -> List[User]:
         """Get all patients"""
-        users = self._load_json(self.users_file)
-        return [User(**u) for u in users if u.get('user_type') == UserType.PATIENT]
+        return [User(**u) for u in self._lookup(self.users_file, 'user_type', UserType.PATIENT)]
     
     # Clinical record operations
     def create_clinical_record(self, record: ClinicalRecord) -> ClinicalRecord:
         """Create a new clinical record"""
-        records = self._load_json(self.records_file)
-        record_dict = record.dict()
-        records.append(record_dict)
-        self._save_json(self.records_file, records)
+        self._append_rows(self.records_file, [record.dict()])
         return record
     
-    def get_patient_records(self, patient_id: str) -> List[ClinicalRecord]:
-        """Get all clinical records for a patient"""
-        records = self._load_json(self.records_file)
-        return [ClinicalRecord(**r) for r in records if r.get('patient_id') == patient_id]
+    def get_patient_records(
+        self,
+        patient_id: str,
+        *,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[ClinicalRecord]:
+        """Get clinical records for a patient, newest first"""
+        return self.get_records_for_patients([patient_id], limit=limit, after=after, fields=fields)
+
+    def get_records_for_patients(
+        self,
+        patient_ids: Sequence[str],
+        *,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[ClinicalRecord]:
+        """Get clinical records for several patients merged newest first"""
+        rows = self._page(self.records_file, 'patient_id', list(dict.fromkeys(patient_ids)), limit=limit, after=after)
+        return self._hydrate(ClinicalRecord, rows, fields)
     
-    def get_doctor_records(self, doctor_id: str) -> List[ClinicalRecord]:
-        """Get all clinical records created by a doctor"""
-        records = self._load_json(self.records_file)
-        return [ClinicalRecord(**r) for r in records if r.get('doctor_id') == doctor_id]
+    def get_doctor_records(
+        self,
+        doctor_id: str,
+        *,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[ClinicalRecord]:
+        """Get clinical records created by a doctor, newest first"""
+        rows = self._page(self.records_file, 'doctor_id', [doctor_id], limit=limit, after=after)
+        return self._hydrate(ClinicalRecord, rows, fields)
     
     def get_record_by_id(self, record_id: str) -> Optional[ClinicalRecord]:
         """Get clinical record by ID"""
-        records = self._load_json(self.records_file)
-        for record_dict in records:
-            if record_dict.get('id') == record_id:
-                return ClinicalRecord(**record_dict)
-        return None
+        record_dict = self._first(self.records_file, 'id', record_id)
+        return ClinicalRecord(**record_dict) if record_dict else None
     
     # Patient access operations
     def grant_patient_access(self, access: PatientAccess) -> PatientAccess:
         """Grant a doctor access to a patient's records"""
-        accesses = self._load_json(self.access_file)
-        access_dict = access.dict()
-        accesses.append(access_dict)
-        self._save_json(self.access_file, accesses)
+        self._append_rows(self.access_file, [access.dict()])
         return access
     
     def get_patient_accesses(self, patient_id: str) -> List[PatientAccess]:
         """Get all doctors who have access to a patient"""
-        accesses = self._load_json(self.access_file)
-        return [PatientAccess(**a) for a in accesses if a.get('patient_id') == patient_id and a.get('is_active')]
+        return [PatientAccess(**a) for a in self._lookup(self.access_file, 'patient_id', patient_id) if a.get('is_active')]
     
     def get_doctor_accesses(self, doctor_id: str) -> List[PatientAccess]:
         """Get all patients a doctor has access to"""
-        accesses = self._load_json(self.access_file)
-        return [PatientAccess(**a) for a in accesses if a.get('doctor_id') == doctor_id and a.get('is_active')]
+        return [PatientAccess(**a) for a in self._lookup(self.access_file, 'doctor_id', doctor_id) if a.get('is_active')]
     
     def has_patient_access(self, doctor_id: str, patient_id: str) -> bool:
         """Check if a doctor has access to a patient's records"""
-        accesses = self._load_json(self.access_file)
         return any(
-            a.get('doctor_id') == doctor_id and 
-            a.get('patient_id') == patient_id and 
-            a.get('is_active')
-            for a in accesses
+            a.get('patient_id') == patient_id and a.get('is_active')
+            for a in self._lookup(self.access_file, 'doctor_id', doctor_id)
         )
     
     def get_patient_by_code(self, patient_code: str) -> Optional[User]:
         """Get patient by patient code"""
-        users = self._load_json(self.users_file)
-        for user_dict in users:
-            if user_dict.get('patient_code') == patient_code and user_dict.get('user_type') == UserType.PATIENT:
+        for user_dict in self._lookup(self.users_file, 'patient_code', patient_code):
+            if user_dict.get('user_type') == UserType.PATIENT:
                 return User(**user_dict)
         return None
     
 
     # Treatment adjustment operations
     def create_adjustment(self, adjustment: TreatmentAdjustment) -> TreatmentAdjustment:
-        adjustments = self._load_json(self.adjustments_file)
-        adjustments.append(adjustment.dict())
-        self._save_json(self.adjustments_file, adjustments)
+        self._append_rows(self.adjustments_file, [adjustment.dict()])
         for entry in adjustment.audit_trail:
             self._record_audit_event(entry)
         return adjustment
 
     def get_adjustment_by_id(self, adjustment_id: str) -> Optional[TreatmentAdjustment]:
-        adjustments = self._load_json(self.adjustments_file)
-        for item in adjustments:
-            if item.get('id') == adjustment_id:
-                return TreatmentAdjustment(**item)
-        return None
+        item = self._first(self.adjustments_file, 'id', adjustment_id)
+        return TreatmentAdjustment(**item) if item else None
+
+    def list_adjustments(
+        self,
+        *,
+        patient_id: Optional[str] = None,
+        statuses: Optional[Iterable[AdjustmentStatus]] = None,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[TreatmentAdjustment]:
+        """Adjustments in request order, optionally filtered by patient and status"""
+        wanted = None if statuses is None else sorted({_index_key(status) for status in statuses})
+        if wanted == []:
+            return []
+        if patient_id is not None:
+            where = None if wanted is None else (lambda item: item.get('status') in wanted)
+            rows = self._page(self.adjustments_file, 'patient_id', [patient_id], limit=limit, after=after, newest_first=False, where=where)
+        elif wanted is not None:
+            rows = self._page(self.adjustments_file, 'status', wanted, limit=limit, after=after, newest_first=False)
+        else:
+            rows = self._page(self.adjustments_file, limit=limit, after=after, newest_first=False)
+        return self._hydrate(TreatmentAdjustment, rows, fields)
 
     def list_patient_adjustments(self, patient_id: str) -> List[TreatmentAdjustment]:
-        adjustments = self._load_json(self.adjustments_file)
-        return [TreatmentAdjustment(**item) for item in adjustments if item.get('patient_id') == patient_id]
+        return self.list_adjustments(patient_id=patient_id)
 
     def list_all_adjustments(self) -> List[TreatmentAdjustment]:
-        adjustments = self._load_json(self.adjustments_file)
-        return [TreatmentAdjustment(**item) for item in adjustments]
+        return self.list_adjustments()
 
     def list_pending_adjustments(self) -> List[TreatmentAdjustment]:
-        adjustments = self._load_json(self.adjustments_file)
-        return [TreatmentAdjustment(**item) for item in adjustments if item.get('status') in {AdjustmentStatus.REQUESTED, AdjustmentStatus.UNDER_REVIEW}]
+        return self.list_adjustments(statuses=PENDING_ADJUSTMENT_STATUSES)
 
     def update_adjustment(self, adjustment: TreatmentAdjustment) -> TreatmentAdjustment:
-        adjustments = self._load_json(self.adjustments_file)
-        updated = False
-        for idx, item in enumerate(adjustments):
-            if item.get('id') == adjustment.id:
-                adjustments[idx] = adjustment.dict()
-                updated = True
-                break
-        if not updated:
+        if not self._upsert_row(self.adjustments_file, adjustment.dict(), must_exist=True):
             raise ValueError(f"Adjustment {adjustment.id} not found")
-        self._save_json(self.adjustments_file, adjustments)
         if adjustment.audit_trail:
             self._record_audit_event(adjustment.audit_trail[-1])
         return adjustment
 
     def append_adjustment_audit(self, adjustment_id: str, entry: AdjustmentAuditEntry) -> Optional[TreatmentAdjustment]:
-        adjustments = self._load_json(self.adjustments_file)
-        updated_item = None
-        for idx, item in enumerate(adjustments):
-            if item.get('id') == adjustment_id:
-                trail = item.setdefault('audit_trail', [])
-                trail.append(entry.dict())
-                adjustments[idx] = item
-                updated_item = TreatmentAdjustment(**item)
-                break
-        if updated_item is not None:
-            self._save_json(self.adjustments_file, adjustments)
-            self._record_audit_event(entry)
+        with self._locked(self.adjustments_file):
+            stored = self._first(self.adjustments_file, 'id', adjustment_id)
+            if stored is None:
+                return None
+            item = dict(stored)
+            item['audit_trail'] = list(item.get('audit_trail') or []) + [entry.dict()]
+            updated_item = TreatmentAdjustment(**item)
+            self._upsert_row(self.adjustments_file, item)
+        self._record_audit_event(entry)
         return updated_item
 
     # Observation operations
     def add_observations(self, observations: List[Observation]) -> List[Observation]:
-        stored = self._load_json(self.observations_file)
+        if self.events is not None:
+            return self.events.add_observations(observations)
+        groups: Dict[str, List[dict]] = {}
         for observation in observations:
-            stored.append(observation.dict())
-        self._save_json(self.observations_file, stored)
+            groups.setdefault(self._shard_for(self.observations_file, observation.patient_id), []).append(observation.dict())
+        for file_path, rows in groups.items():
+            with self._locked(file_path):
+                series = self._observation_series(file_path)
+                self._append_rows(file_path, rows)
+                if series is not None and self._cache.get(file_path) is self._series_sources.get(file_path):
+                    series.extend(self._cache[file_path].rows[-len(rows):])
         return observations
 
     def list_observations(self, patient_id: str, code: Optional[str] = None) -> List[Observation]:
-        stored = self._load_json(self.observations_file)
+        if self.events is not None:
+            return self.events.list_observations(patient_id, code)
+        series = self._observation_series(self._shard_for(self.observations_file, patient_id))
+        if series is not None:
+            rows = series.range(patient_id, code) if code else series.patient_rows(patient_id)
+            return [Observation(**item) for item in rows]
         result: List[Observation] = []
-        for item in stored:
-            if item.get('patient_id') != patient_id:
-                continue
+        for item in self._lookup(self.observations_file, 'patient_id', patient_id):
             if code and item.get('code') != code:
                 continue
             result.append(Observation(**item))
         result.sort(key=lambda obs: obs.effective_at, reverse=True)
         return result
 
-    def get_last_observation(self, patient_id: str, code: str) -> Optional[Observation]:
+    def get_last_observation(self, patient_id: str, code: Optional[str] = None) -> Optional[Observation]:
+        if self.events is not None:
+            return self.events.get_last_observation(patient_id, code)
+        series = self._observation_series(self._shard_for(self.observations_file, patient_id))
+        if series is not None:
+            item = series.latest(patient_id, code or None)
+            return Observation(**item) if item else None
         observations = self.list_observations(patient_id, code)
         return observations[0] if observations else None
 
     def get_recent_observations(self, patient_id: str, code: str, within_minutes: int) -> List[Observation]:
+        if self.events is not None:
+            return self.events.get_recent_observations(patient_id, code, within_minutes)
         cutoff = datetime.now() - timedelta(minutes=within_minutes)
+        series = self._observation_series(self._shard_for(self.observations_file, patient_id))
+        if series is not None:
+            return [Observation(**item) for item in series.range(patient_id, code, start=cutoff)]
         observations = self.list_observations(patient_id, code)
         return [obs for obs in observations if obs.effective_at >= cutoff]
 
+    def list_observations_since(self, start: datetime, codes: Optional[Sequence[str]] = None) -> List[Observation]:
+        """Every patient's observations at or after ``start``, oldest first"""
+        if self.events is not None:
+            return self.events.list_observations_since(start, codes)
+        rows: List[dict] = []
+        for file_path in self._shard_files(self.observations_file):
+            series = self._observation_series(file_path)
+            if series is not None:
+                rows.extend(series.since(start, codes))
+                continue
+            wanted = None if codes is None else set(codes)
+            rows.extend(row for row in self._iter_rows(file_path) if wanted is None or row.get('code') in wanted)
+        observations = [Observation(**row) for row in rows]
+        observations = [obs for obs in observations if obs.effective_at >= start]
+        observations.sort(key=lambda obs: obs.effective_at)
+        return observations
+
+    def list_recent_observations_by_code(
+        self, patient_id: str, per_code: int, *, fields: Optional[Sequence[str]] = None
+    ) -> List[Observation]:
+        """Latest ``per_code`` observations of each code, newest first"""
+        if self.events is not None:
+            return self.events.list_recent_observations_by_code(patient_id, per_code)
+        series = self._observation_series(self._shard_for(self.observations_file, patient_id))
+        if series is not None:
+            return self._hydrate(Observation, series.recent_by_code(patient_id, per_code), fields)
+        counts: Dict[str, int] = {}
+        result: List[Observation] = []
+        for obs in self.list_observations(patient_id):
+            if counts.get(obs.code, 0) < per_code:
+                counts[obs.code] = counts.get(obs.code, 0) + 1
+                result.append(obs)
+        return result
+
     # Alert operations
     def create_alert(self, alert: Alert, entry: AlertTimelineEntry) -> Alert:
         alert.timeline.append(entry)
         alert.updated_at = datetime.now()
         return self.save_alert(alert, entry)
 
+    def create_alerts(self, alerts: List[Alert]) -> List[Alert]:
+        """Persist new alerts and their timeline entries in one write per collection"""
+        if self.events is not None:
+            return self.events.create_alerts(alerts)
+        self._append_rows(self.alerts_file, [alert.dict() for alert in alerts])
+        self._append_coalesced(self.alert_events_file, [entry.dict() for alert in alerts for entry in alert.timeline])
+        return alerts
+
     def save_alert(self, alert: Alert, timeline_entry: Optional[AlertTimelineEntry] = None) -> Alert:
-        alerts = self._load_json(self.alerts_file)
-        updated = False
-        alert_dict = alert.dict()
-        for idx, item in enumerate(alerts):
-            if item.get('id') == alert.id:
-                alerts[idx] = alert_dict
-                updated = True
-                break
-        if not updated:
-            alerts.append(alert_dict)
-        self._save_json(self.alerts_file, alerts)
+        if self.events is not None:
+            return self.events.save_alert(alert, timeline_entry)
+        self._upsert_row(self.alerts_file, alert.dict())
         if timeline_entry is not None:
             self._record_alert_event(timeline_entry)
         return alert
 
+    def save_alerts(self, alerts: List[Alert], entries: List[AlertTimelineEntry]) -> List[Alert]:
+        """Persist updated alerts and their new timeline entries in one write per collection"""
+        if self.events is not None:
+            return self.events.save_alerts(alerts, entries)
+        self._upsert_rows(self.alerts_file, [alert.dict() for alert in alerts])
+        self._append_coalesced(self.alert_events_file, [entry.dict() for entry in entries])
+        return alerts
+
     def get_alert_by_id(self, alert_id: str) -> Optional[Alert]:
-        alerts = self._load_json(self.alerts_file)
-        for item in alerts:
-            if item.get('id') == alert_id:
-                return Alert(**item)
-        return None
+        if self.events is not None:
+            return self.events.get_alert_by_id(alert_id)
+        item = self._first(self.alerts_file, 'id', alert_id)
+        return Alert(**item) if item else None
 
-    def list_alerts_by_patient(self, patient_id: str, include_closed: bool = False) -> List[Alert]:
-        alerts = self._load_json(self.alerts_file)
-        result: List[Alert] = []
-        for item in alerts:
-            if item.get('patient_id') != patient_id:
-                continue
-            if not include_closed and item.get('status') == AlertStatus.CLOSED:
-                continue
-            result.append(Alert(**item))
-        result.sort(key=lambda alert: alert.created_at, reverse=True)
-        return result
+    def list_alerts_by_patient(
+        self, patient_id: str, include_closed: bool = False, *, fields: Optional[Sequence[str]] = None
+    ) -> List[Alert]:
+        if self.events is not None:
+            return self.events.list_alerts_by_patient(patient_id, include_closed)
+        rows = [
+            item for item in self._lookup(self.alerts_file, 'patient_id', patient_id)
+            if include_closed or item.get('status') != AlertStatus.CLOSED
+        ]
+        rows.sort(key=lambda item: datetime.fromisoformat(item['created_at']), reverse=True)
+        return self._hydrate(Alert, rows, fields)
+
+    def list_alerts_updated_since(self, start: datetime) -> List[Alert]:
+        """Every patient's alerts changed at or after ``start``"""
+        if self.events is not None:
+            return self.events.list_alerts_updated_since(start)
+        return [
+            Alert(**item) for item in self._iter_rows(self.alerts_file)
+            if datetime.fromisoformat(item.get('updated_at') or item['created_at']) >= start
+        ]
 
     def list_active_alerts(self, patient_id: str) -> List[Alert]:
+        if self.events is not None:
+            return self.events.list_active_alerts(patient_id)
         alerts = self.list_alerts_by_patient(patient_id, include_closed=False)
         return [alert for alert in alerts if alert.status in (AlertStatus.OPEN, AlertStatus.ACKNOWLEDGED)]
 
+    def count_active_alerts(self, patient_id: str) -> int:
+        if self.events is not None:
+            return self.events.count_active_alerts(patient_id)
+        active = (AlertStatus.OPEN.value, AlertStatus.ACKNOWLEDGED.value)
+        return sum(1 for item in self._lookup(self.alerts_file, 'patient_id', patient_id) if item.get('status') in active)
+
     def save_alert_with_entry(self, alert: Alert, entry: AlertTimelineEntry) -> Alert:
         alert.timeline.append(entry)
         alert.updated_at = datetime.now()
         return self.save_alert(alert, entry)
 
+    def list_alert_events(
+        self,
+        alert_id: Optional[str] = None,
+        *,
+        actor_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[AlertTimelineEntry]:
+        """Alert timeline events, oldest first, optionally within [start, end]"""
+        if self.events is not None:
+            return self.events.list_alert_events(alert_id, actor_id=actor_id, start=start, end=end)
+        rows = self._query_events(self.alert_events_file, start, end, alert_id=alert_id, actor_id=actor_id)
+        return [AlertTimelineEntry(**item) for item in rows]
+
     def _record_alert_event(self, entry: AlertTimelineEntry):
-        events = self._load_json(self.alert_events_file)
-        events.append(entry.dict())
-        self._save_json(self.alert_events_file, events)
+        self._append_coalesced(self.alert_events_file, [entry.dict()])
 
     # Care plan revisions
     def create_careplan_revision(self, revision: CarePlanRevision) -> CarePlanRevision:
-        revisions = self._load_json(self.careplan_revisions_file)
-        revisions.append(revision.dict())
-        self._save_json(self.careplan_revisions_file, revisions)
+        self._append_rows(self.careplan_revisions_file, [revision.dict()])
         return revision
 
     def list_careplan_revisions(self, patient_id: str) -> List[CarePlanRevision]:
-        revisions = self._load_json(self.careplan_revisions_file)
-        return [CarePlanRevision(**item) for item in revisions if item.get('patient_id') == patient_id]
+        return [CarePlanRevision(**item) for item in self._lookup(self.careplan_revisions_file, 'patient_id', patient_id)]
+
+    def list_careplan_patient_ids(self) -> List[str]:
+        """Patients with at least one care plan revision"""
+        return sorted({item['patient_id'] for item in self._iter_rows(self.careplan_revisions_file)})
+
+    # Change listeners
+    def add_listener(self, listener: Callable[[str, Optional[str], Dict[str, Any]], Any]) -> None:
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable[[str, Optional[str], Dict[str, Any]], Any]) -> None:
+        self._listeners = tuple(item for item in self._listeners if item is not listener)
 
     # Notifications
     def add_notification(self, notification: Notification) -> Notification:
-        notifications = self._load_json(self.notifications_file)
-        notifications.append(notification.dict())
-        self._save_json(self.notifications_file, notifications)
+        row = notification.dict()
+        self._append_coalesced(self.notifications_file, [row])
+        for listener in self._listeners:
+            listener("notification", notification.user_id, row)
         return notification
 
-    def list_notifications(self, user_id: str) -> List[Notification]:
-        notifications = self._load_json(self.notifications_file)
-        return [Notification(**item) for item in notifications if item.get('user_id') == user_id]
+    def list_notifications(
+        self,
+        user_id: str,
+        *,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Notification]:
+        """Notifications for a user, newest first"""
+        rows = self._page(self.notifications_file, 'user_id', [user_id], limit=limit, after=after)
+        return self._hydrate(Notification, rows, fields)
+
+    def list_audit_events(
+        self,
+        adjustment_id: Optional[str] = None,
+        *,
+        actor_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[AdjustmentAuditEntry]:
+        """Adjustment audit events, oldest first, optionally within [start, end]"""
+        rows = self._query_events(self.audit_log_file, start, end, adjustment_id=adjustment_id, actor_id=actor_id)
+        return [AdjustmentAuditEntry(**item) for item in rows]
 
     def _record_audit_event(self, entry: AdjustmentAuditEntry):
-        audit_entries = self._load_json(self.audit_log_file)
-        audit_entries.append(entry.dict())
-        self._save_json(self.audit_log_file, audit_entries)
+        self._append_coalesced(self.audit_log_file, [entry.dict()])
+
+    # Bulk import (python -m backend.storage.bulk)
+    def _missing(self, file_path: str, rows: List[dict], unique: Sequence[str] = ('id',)) -> List[dict]:
+        """Rows whose ``unique`` fields match neither a stored row nor an earlier row of the batch"""
+        seen: Dict[str, set] = {field: set() for field in unique}
+        fresh = []
+        for row in rows:
+            keys = [(field, _index_key(row.get(field))) for field in unique]
+            if any(key in seen[field] or self._first(file_path, field, key) is not None for field, key in keys):
+                continue
+            for field, key in keys:
+                seen[field].add(key)
+            fresh.append(row)
+        return fresh
+
+    def import_users(self, users: List[User]) -> int:
+        """Insert users with a new id and email in one write; returns how many were written.
+
+        Patients keep their code when it is free and are skipped when another
+        patient already holds it; patients without a code get a new one.
+        """
+        with self._locked(self.users_file):
+            rows = []
+            for row in self._missing(self.users_file, [user.dict() for user in users], unique=('id', 'email')):
+                if row['user_type'] == UserType.PATIENT:
+                    if not row.get('patient_code'):
+                        row['patient_code'] = self.generate_patient_code()
+                    elif not self.claim_patient_code(row['patient_code']):
+                        continue
+                rows.append(row)
+            self._append_rows(self.users_file, rows)
+        return len(rows)
+
+    def import_clinical_records(self, records: List[ClinicalRecord]) -> int:
+        with self._locked(self.records_file):
+            rows = self._missing(self.records_file, [record.dict() for record in records])
+            self._append_rows(self.records_file, rows)
+        return len(rows)
+
+    def import_observations(self, observations: List[Observation]) -> int:
+        if self.events is not None:
+            return self.events.import_observations(observations)
+        with self._locked(self.observations_file):
+            fresh = {row['id'] for row in self._missing(self.observations_file, [{'id': obs.id} for obs in observations])}
+            self.add_observations([obs for obs in observations if obs.id in fresh])
+        return len(fresh)
+
+    def import_alerts(self, alerts: List[Alert]) -> int:
+        """Insert alerts with a new id, together with their timeline events"""
+        if self.events is not None:
+            return self.events.import_alerts(alerts)
+        with self._locked(self.alerts_file):
+            fresh = {row['id'] for row in self._missing(self.alerts_file, [{'id': alert.id} for alert in alerts])}
+            alerts = self.create_alerts([alert for alert in alerts if alert.id in fresh])
+        return len(alerts)
 
     def calculate_bmi(self, weight: float, height: float) -> float:
         """Calculate BMI from weight (kg) and height (cm)"""
@@ -342,5 +1351,47 @@ class SimpleDatabase:
         return round(weight / (height_m ** 2), 1)
 
 
+def create_database(settings: Settings) -> SimpleDatabase:
+    """Build the storage backend selected by ``settings.storage_backend``"""
+    events = None
+    if settings.events_backend == "orm":
+        from .db.repository import ClinicalEventRepository
+        from .db.session import SessionLocal
+
+        events = ClinicalEventRepository(SessionLocal)
+    elif settings.events_backend != "json":
+        raise ValueError(f"Unknown events backend: {settings.events_backend}")
+
+    if settings.storage_backend == "sqlite":
+        from .storage.sqlite_store import SQLiteDatabase
+
+        return SQLiteDatabase(
+            settings.sqlite_path or os.path.join(settings.data_dir, "medicai.sqlite3"),
+            data_dir=settings.data_dir,
+            events=events,
+            coalesce_window=settings.storage_coalesce_window_ms / 1000,
+            coalesce_max_ops=settings.storage_coalesce_max_ops,
+        )
+    if settings.storage_backend != "json":
+        raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+    return SimpleDatabase(
+        data_dir=settings.data_dir,
+        storage_mode=settings.storage_mode,
+        storage_format=settings.storage_format,
+        compact_threshold=settings.storage_compact_threshold,
+        compact_interval=settings.storage_compact_interval_s,
+        events=events,
+        coalesce_window=settings.storage_coalesce_window_ms / 1000,
+        coalesce_max_ops=settings.storage_coalesce_max_ops,
+        segment_max_bytes=settings.event_log_segment_bytes,
+        segment_max_age=settings.event_log_segment_age_s,
+        segment_compress=settings.event_log_compress,
+        shards=settings.storage_shards or None,
+    )
+
+
 # Global database instance
-db = SimpleDatabase()
+db = create_database(get_settings())
+
+# Awaitable view of ``db`` for async endpoints
+adb = AsyncDatabase(db, max_workers=get_settings().storage_io_workers)
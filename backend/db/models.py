@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import JSON, DateTime, Float, ForeignKey, String, Text
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, String, Text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -53,7 +53,7 @@ class TreatmentAdjustmentORM(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     patient: Mapped[PatientORM] = relationship()
-    decision: Mapped["AdjustmentDecisionORM" | None] = relationship(back_populates="adjustment", uselist=False, cascade="all, delete-orphan")
+    decision: Mapped["AdjustmentDecisionORM | None"] = relationship(back_populates="adjustment", uselist=False, cascade="all, delete-orphan")
     audit_trail: Mapped[list["AdjustmentAuditEntryORM"]] = relationship(back_populates="adjustment", cascade="all, delete-orphan")
 
 
@@ -85,6 +85,10 @@ class AdjustmentAuditEntryORM(Base):
 
 class ObservationORM(Base):
     __tablename__ = "observations"
+    __table_args__ = (
+        Index("ix_observations_patient_code_effective", "patient_id", "code", "effective_at"),
+        Index("ix_observations_patient_effective", "patient_id", "effective_at"),
+    )
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     patient_id: Mapped[str] = mapped_column(String(64), ForeignKey("patients.id"), nullable=False)
@@ -101,6 +105,10 @@ class ObservationORM(Base):
 
 class AlertORM(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_patient_status_created", "patient_id", "status", "created_at"),
+        Index("ix_alerts_patient_rule", "patient_id", "rule"),
+    )
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     patient_id: Mapped[str] = mapped_column(String(64), ForeignKey("patients.id"), nullable=False)
@@ -109,10 +117,36 @@ class AlertORM(Base):
     severity: Mapped[str] = mapped_column(String(16), nullable=False)
     status: Mapped[str] = mapped_column(String(16), nullable=False, default="open")
     message: Mapped[str | None] = mapped_column(Text)
+    value: Mapped[object | None] = mapped_column(JSON)
+    unit: Mapped[str | None] = mapped_column(String(32))
+    context: Mapped[dict | None] = mapped_column(JSON)
     observed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime)
+    acknowledged_at: Mapped[datetime | None] = mapped_column(DateTime)
+    acknowledged_by: Mapped[str | None] = mapped_column(String(64))
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime)
+    resolved_by: Mapped[str | None] = mapped_column(String(64))
+    closed_at: Mapped[datetime | None] = mapped_column(DateTime)
+    closed_by: Mapped[str | None] = mapped_column(String(64))
 
     patient: Mapped[PatientORM] = relationship(back_populates="alerts")
+    events: Mapped[list["AlertEventORM"]] = relationship(
+        back_populates="alert", cascade="all, delete-orphan", order_by="AlertEventORM.created_at"
+    )
+
+
+class AlertEventORM(Base):
+    __tablename__ = "alert_events"
+
+    id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    alert_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("alerts.id"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    actor_id: Mapped[str | None] = mapped_column(String(64))
+    notes: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    alert: Mapped[AlertORM] = relationship(back_populates="events")
 
 
 __all__ = [
@@ -120,6 +154,7 @@ __all__ = [
     "EncounterORM",
     "ObservationORM",
     "AlertORM",
+    "AlertEventORM",
     "TreatmentAdjustmentORM",
     "AdjustmentDecisionORM",
     "AdjustmentAuditEntryORM",
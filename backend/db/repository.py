@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased, selectinload
+
+from ..models import Alert, AlertStatus, AlertTimelineEntry, Observation
+from .models import AlertEventORM, AlertORM, ObservationORM, PatientORM
+
+
+ACTIVE_ALERT_STATUSES = (AlertStatus.OPEN.value, AlertStatus.ACKNOWLEDGED.value)
+
+
+def _to_float(value: Any) -> float | None:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_uuid(value: str) -> UUID | None:
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+
+class ClinicalEventRepository:
+    """Observations and alerts stored in the SQLAlchemy tables.
+
+    This is the single persistence path for observation ingestion, the alert
+    engine and the dashboard. Every read is a bounded, indexed query rather
+    than a scan of the whole history.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        session = self.session_factory()
+        try:
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _ensure_patients(session: Session, patient_ids: set[str]) -> None:
+        existing = set(session.scalars(select(PatientORM.id).where(PatientORM.id.in_(patient_ids))))
+        for patient_id in patient_ids - existing:
+            session.add(PatientORM(id=patient_id))
+
+    # Observations
+    def add_observations(self, observations: List[Observation]) -> List[Observation]:
+        if not observations:
+            return observations
+        with self._session() as session:
+            self._ensure_patients(session, {obs.patient_id for obs in observations})
+            session.add_all(
+                ObservationORM(
+                    id=_to_uuid(obs.id) or uuid4(),
+                    patient_id=obs.patient_id,
+                    code=obs.code,
+                    unit=obs.unit,
+                    value_text=str(obs.value),
+                    value_numeric=_to_float(obs.value),
+                    effective_at=obs.effective_at,
+                    source=obs.source,
+                )
+                for obs in observations
+            )
+            session.commit()
+        return observations
+
+    def import_observations(self, observations: List[Observation]) -> int:
+        """Insert observations whose id is not stored yet; returns how many were written"""
+        with self._session() as session:
+            existing = self._existing_ids(session, ObservationORM, [obs.id for obs in observations])
+        fresh = [obs for obs in observations if _to_uuid(obs.id) not in existing]
+        self.add_observations(fresh)
+        return len(fresh)
+
+    def iter_observations(self, batch_size: int = 1000) -> Iterator[Observation]:
+        """Every observation, streamed ``batch_size`` rows at a time"""
+        stmt = select(ObservationORM).order_by(ObservationORM.effective_at).execution_options(yield_per=batch_size)
+        with self._session() as session:
+            for row in session.scalars(stmt):
+                yield self._to_observation(row)
+
+    @staticmethod
+    def _existing_ids(session: Session, model: Any, ids: List[str]) -> set[UUID]:
+        keys = [key for key in map(_to_uuid, ids) if key is not None]
+        if not keys:
+            return set()
+        return set(session.scalars(select(model.id).where(model.id.in_(keys))))
+
+    def list_observations(
+        self,
+        patient_id: str,
+        code: Optional[str] = None,
+        *,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[Observation]:
+        stmt = select(ObservationORM).where(ObservationORM.patient_id == patient_id)
+        if code:
+            stmt = stmt.where(ObservationORM.code == code)
+        if since is not None:
+            stmt = stmt.where(ObservationORM.effective_at >= since)
+        stmt = stmt.order_by(ObservationORM.effective_at.desc())
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        with self._session() as session:
+            return [self._to_observation(row) for row in session.scalars(stmt)]
+
+    def get_last_observation(self, patient_id: str, code: Optional[str] = None) -> Optional[Observation]:
+        observations = self.list_observations(patient_id, code, limit=1)
+        return observations[0] if observations else None
+
+    def get_recent_observations(self, patient_id: str, code: str, within_minutes: int) -> List[Observation]:
+        cutoff = datetime.now() - timedelta(minutes=within_minutes)
+        return self.list_observations(patient_id, code, since=cutoff)
+
+    def list_observations_since(self, start: datetime, codes: Optional[Sequence[str]] = None) -> List[Observation]:
+        """Every patient's observations at or after ``start``, oldest first"""
+        stmt = select(ObservationORM).where(ObservationORM.effective_at >= start)
+        if codes is not None:
+            stmt = stmt.where(ObservationORM.code.in_(list(codes)))
+        stmt = stmt.order_by(ObservationORM.effective_at)
+        with self._session() as session:
+            return [self._to_observation(row) for row in session.scalars(stmt)]
+
+    def list_recent_observations_by_code(self, patient_id: str, per_code: int) -> List[Observation]:
+        """Latest ``per_code`` observations of each code, newest first"""
+        rank = func.row_number().over(
+            partition_by=ObservationORM.code,
+            order_by=ObservationORM.effective_at.desc(),
+        ).label("rank")
+        ranked = (
+            select(ObservationORM, rank)
+            .where(ObservationORM.patient_id == patient_id)
+            .subquery()
+        )
+        row = aliased(ObservationORM, ranked)
+        stmt = select(row).where(ranked.c.rank <= per_code).order_by(ranked.c.effective_at.desc())
+        with self._session() as session:
+            return [self._to_observation(item) for item in session.scalars(stmt)]
+
+    @staticmethod
+    def _to_observation(row: ObservationORM) -> Observation:
+        return Observation(
+            id=str(row.id),
+            patient_id=row.patient_id,
+            code=row.code,
+            value=row.value_numeric if row.value_numeric is not None else row.value_text,
+            unit=row.unit,
+            effective_at=row.effective_at,
+            source=row.source,
+        )
+
+    # Alerts
+    @staticmethod
+    def _alert_row(alert: Alert) -> AlertORM:
+        return AlertORM(
+            id=UUID(alert.id),
+            patient_id=alert.patient_id,
+            code=alert.code,
+            rule=alert.context.get("rule") or alert.code,
+            severity=alert.severity.value,
+            status=alert.status.value,
+            message=alert.context.get("message"),
+            value=alert.value,
+            unit=alert.unit,
+            context=alert.context,
+            observed_at=alert.observed_at,
+            created_at=alert.created_at,
+            updated_at=alert.updated_at,
+            acknowledged_at=alert.acknowledged_at,
+            acknowledged_by=alert.acknowledged_by,
+            resolved_at=alert.resolved_at,
+            resolved_by=alert.resolved_by,
+            closed_at=alert.closed_at,
+            closed_by=alert.closed_by,
+        )
+
+    @staticmethod
+    def _event_row(alert_id: str, entry: AlertTimelineEntry) -> AlertEventORM:
+        return AlertEventORM(
+            id=_to_uuid(entry.id) or uuid4(),
+            alert_id=UUID(alert_id),
+            status=entry.status.value,
+            actor_id=entry.actor_id,
+            notes=entry.notes,
+            created_at=entry.created_at,
+        )
+
+    def save_alert(self, alert: Alert, timeline_entry: Optional[AlertTimelineEntry] = None) -> Alert:
+        with self._session() as session:
+            self._ensure_patients(session, {alert.patient_id})
+            session.merge(self._alert_row(alert))
+            if timeline_entry is not None:
+                session.add(self._event_row(alert.id, timeline_entry))
+            session.commit()
+        return alert
+
+    def save_alerts(self, alerts: List[Alert], entries: List[AlertTimelineEntry]) -> List[Alert]:
+        """Update alerts and add their new timeline events in one transaction"""
+        if not alerts and not entries:
+            return alerts
+        with self._session() as session:
+            self._ensure_patients(session, {alert.patient_id for alert in alerts})
+            for alert in alerts:
+                session.merge(self._alert_row(alert))
+            session.add_all(self._event_row(entry.alert_id, entry) for entry in entries)
+            session.commit()
+        return alerts
+
+    def create_alerts(self, alerts: List[Alert]) -> List[Alert]:
+        """Insert new alerts with their timeline events in one transaction"""
+        if not alerts:
+            return alerts
+        with self._session() as session:
+            self._ensure_patients(session, {alert.patient_id for alert in alerts})
+            session.add_all(self._alert_row(alert) for alert in alerts)
+            session.flush()
+            session.add_all(self._event_row(alert.id, entry) for alert in alerts for entry in alert.timeline)
+            session.commit()
+        return alerts
+
+    def import_alerts(self, alerts: List[Alert]) -> int:
+        """Insert alerts whose id is not stored yet, with their timeline events"""
+        with self._session() as session:
+            existing = self._existing_ids(session, AlertORM, [alert.id for alert in alerts])
+        return len(self.create_alerts([alert for alert in alerts if UUID(alert.id) not in existing]))
+
+    def iter_alerts(self, batch_size: int = 500) -> Iterator[Alert]:
+        stmt = (
+            select(AlertORM)
+            .options(selectinload(AlertORM.events))
+            .order_by(AlertORM.created_at)
+            .execution_options(yield_per=batch_size)
+        )
+        with self._session() as session:
+            for row in session.scalars(stmt):
+                yield self._to_alert(row)
+
+    def get_alert_by_id(self, alert_id: str) -> Optional[Alert]:
+        key = _to_uuid(alert_id)
+        if key is None:
+            return None
+        with self._session() as session:
+            row = session.get(AlertORM, key, options=[selectinload(AlertORM.events)])
+            return self._to_alert(row) if row is not None else None
+
+    def list_alerts_by_patient(self, patient_id: str, include_closed: bool = False) -> List[Alert]:
+        stmt = select(AlertORM).where(AlertORM.patient_id == patient_id)
+        if not include_closed:
+            stmt = stmt.where(AlertORM.status != AlertStatus.CLOSED.value)
+        return self._list_alerts(stmt)
+
+    def list_alerts_updated_since(self, start: datetime) -> List[Alert]:
+        """Every patient's alerts changed at or after ``start``"""
+        return self._list_alerts(select(AlertORM).where(AlertORM.updated_at >= start))
+
+    def list_active_alerts(self, patient_id: str) -> List[Alert]:
+        stmt = select(AlertORM).where(
+            AlertORM.patient_id == patient_id,
+            AlertORM.status.in_(ACTIVE_ALERT_STATUSES),
+        )
+        return self._list_alerts(stmt)
+
+    def count_active_alerts(self, patient_id: str) -> int:
+        stmt = select(func.count()).select_from(AlertORM).where(
+            AlertORM.patient_id == patient_id,
+            AlertORM.status.in_(ACTIVE_ALERT_STATUSES),
+        )
+        with self._session() as session:
+            return session.scalar(stmt) or 0
+
+    def list_alert_events(
+        self,
+        alert_id: Optional[str] = None,
+        *,
+        actor_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[AlertTimelineEntry]:
+        stmt = select(AlertEventORM)
+        if alert_id is not None:
+            key = _to_uuid(alert_id)
+            if key is None:
+                return []
+            stmt = stmt.where(AlertEventORM.alert_id == key)
+        if actor_id is not None:
+            stmt = stmt.where(AlertEventORM.actor_id == actor_id)
+        if start is not None:
+            stmt = stmt.where(AlertEventORM.created_at >= start)
+        if end is not None:
+            stmt = stmt.where(AlertEventORM.created_at <= end)
+        with self._session() as session:
+            return [self._to_timeline_entry(event) for event in session.scalars(stmt.order_by(AlertEventORM.created_at))]
+
+    def _list_alerts(self, stmt) -> List[Alert]:
+        stmt = stmt.options(selectinload(AlertORM.events)).order_by(AlertORM.created_at.desc())
+        with self._session() as session:
+            return [self._to_alert(row) for row in session.scalars(stmt)]
+
+    @staticmethod
+    def _to_alert(row: AlertORM) -> Alert:
+        return Alert(
+            id=str(row.id),
+            patient_id=row.patient_id,
+            code=row.code,
+            value=row.value,
+            unit=row.unit,
+            observed_at=row.observed_at,
+            severity=row.severity,
+            status=row.status,
+            created_at=row.created_at,
+            updated_at=row.updated_at or row.created_at,
+            acknowledged_at=row.acknowledged_at,
+            resolved_at=row.resolved_at,
+            closed_at=row.closed_at,
+            acknowledged_by=row.acknowledged_by,
+            resolved_by=row.resolved_by,
+            closed_by=row.closed_by,
+            context=row.context or {"rule": row.rule, "message": row.message},
+            timeline=[ClinicalEventRepository._to_timeline_entry(event) for event in row.events],
+        )
+
+    @staticmethod
+    def _to_timeline_entry(event: AlertEventORM) -> AlertTimelineEntry:
+        return AlertTimelineEntry(
+            id=str(event.id),
+            alert_id=str(event.alert_id),
+            status=event.status,
+            actor_id=event.actor_id,
+            notes=event.notes,
+            created_at=event.created_at,
+        )
+
+
+__all__ = ["ClinicalEventRepository"]
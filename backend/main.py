@@ -1,13 +1,14 @@
 import os
 import json
+import logging
 import subprocess
 import asyncio
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from sqlalchemy.orm import Session
-
-from fastapi import FastAPI, HTTPException, Depends, status
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
@@ -15,7 +16,9 @@ from pydantic import BaseModel, Field
 # Local imports
 from .config import get_settings
 from .services.openai_service import OpenAIAnalyzer, FallbackAnalyzer
-from .services.alert_engine import AlertEngine, basic_threshold_alerts
+from .services.alert_engine import AlertEngine
+from .services.alert_analytics import parse_window
+from .services.event_stream import EventBroker, audience_key
 from .services.icd10_suggester import icd10_suggester
 from .services.calculators import calculators, CalculatorError
 from .services.observation_validator import (
@@ -28,12 +31,17 @@ from .models import (
     PatientRegistrationRequest, TreatmentAdjustment, AdjustmentCreatePayload,
     AdjustmentDecisionPayload, AdjustmentStatus, AdjustmentDecision,
     AdjustmentAuditEntry, CarePlanRevision, Notification, NotificationSeverity,
-    ObservationBatchRequest, Observation, AlertStatusUpdate, AlertStatus
+    ObservationBatchRequest, Observation, AlertStatusUpdate, AlertBulkStatusUpdate, AlertStatus,
+    Alert, AlertTimelineEntry
+)
+from .database import CursorError, PENDING_ADJUSTMENT_STATUSES, adb, db
+from .auth import (
+    hash_password, verify_password, create_token, get_current_user, get_current_doctor, get_current_patient,
+    create_stream_token, get_stream_user,
 )
-from .database import db
-from .db.session import get_session
-from .db.models import AlertORM, ObservationORM, PatientORM
-from .auth import hash_password, verify_password, create_token, get_current_user, get_current_doctor, get_current_patient
+
+
+logger = logging.getLogger(__name__)
 
 
 class AnalyzeRequest(BaseModel):
@@ -74,9 +82,82 @@ class TerminalResponse(BaseModel):
     command: str
 
 
+DEFAULT_PAGE_SIZE = 50
+STREAM_KEEPALIVE_S = 15.0
+MAX_PAGE_SIZE = 200
+
+# ClinicalRecord fields returned by /patients/lookup/{code}
+LOOKUP_RECORD_FIELDS = (
+    "case_text", "differentials", "tests", "vital_signs", "allergies", "current_medications",
+    "past_history", "family_history", "reason_for_visit", "physical_examination", "assessment",
+    "diagnosis", "treatment_plan", "follow_up", "created_at",
+)
+
+
+async def paginate(
+    fetch: Callable[..., Awaitable[List[Any]]], limit: int, after: Optional[str]
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one keyset page and the cursor of the next one (None on the last page)"""
+    try:
+        items = await fetch(limit=limit + 1, after=after)
+    except CursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if len(items) > limit:
+        return items[:limit], items[limit - 1].id
+    return items, None
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title="MedicAI - Clinical Assistant MVP", version="0.1.0")
+    alerts_engine = AlertEngine()
+    broker = EventBroker()
+    alerts_engine.add_listener(broker.publish)
+    # Startup loaders of the alert engine; one that fails (e.g. the events
+    # database is not reachable yet) is retried by the sweeper instead of
+    # keeping the app down. Delta windows also warm on the first batch.
+    pending_warm_ups: List[Callable[[], Any]] = [
+        alerts_engine.warm, alerts_engine.load_missing_data_schedule, alerts_engine.load_response_times,
+    ]
+
+    async def warm_up() -> None:
+        for loader in list(pending_warm_ups):
+            try:
+                await adb.run(loader)
+            except Exception:  # noqa: BLE001
+                logger.warning("Alert engine warm-up %s failed; retrying later", loader.__name__, exc_info=True)
+            else:
+                pending_warm_ups.remove(loader)
+
+    async def sweep_missing_data() -> None:
+        while True:
+            # Sleep until the next deadline, but wake up regularly for newly tracked patients
+            delay = settings.missing_data_sweep_s
+            deadline = alerts_engine.missing_data.next_deadline()
+            if deadline is not None:
+                delay = min(delay, max((deadline - datetime.now()).total_seconds(), 0.0))
+            await asyncio.sleep(delay)
+            if pending_warm_ups:
+                await warm_up()
+            try:
+                await adb.run(alerts_engine.sweep_missing_data)
+            except Exception:  # noqa: BLE001
+                # Keep the sweeper alive; the engine put the unswept patients back on the schedule
+                logger.warning("Missing-data sweep failed; retrying", exc_info=True)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Delta rules need the recent readings before the first batch arrives
+        await warm_up()
+        sweeper = asyncio.create_task(sweep_missing_data())
+        # The database is process-wide, so its listener lives only as long as this app
+        db.add_listener(broker.publish)
+        try:
+            yield
+        finally:
+            db.remove_listener(broker.publish)
+            sweeper.cancel()
+
+    app = FastAPI(title="MedicAI - Clinical Assistant MVP", version="0.1.0", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -95,7 +176,6 @@ def create_app() -> FastAPI:
     if openai_enabled:
         openai_analyzer = OpenAIAnalyzer(api_key=openai_api_key, model=model)
     fallback_analyzer = FallbackAnalyzer()
-    alerts_engine = AlertEngine()
 
     @app.post("/analyze", response_model=AnalyzeResponse)
     async def analyze_case(payload: AnalyzeRequest) -> Any:
@@ -156,7 +236,7 @@ def create_app() -> FastAPI:
                 phone=payload.phone
             )
             
-            created_user = db.create_user(user)
+            created_user = await adb.create_user(user)
             token = create_token(created_user.id, created_user.user_type)
             
             return {
@@ -175,7 +255,7 @@ def create_app() -> FastAPI:
     @app.post("/auth/login")
     async def login(payload: LoginRequest) -> Dict[str, Any]:
         """Login user"""
-        user = db.get_user_by_email(payload.email)
+        user = await adb.get_user_by_email(payload.email)
         if not user or not verify_password(payload.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -229,7 +309,7 @@ def create_app() -> FastAPI:
             symptoms=payload.symptoms
         )
         
-        created_record = db.create_clinical_record(record)
+        created_record = await adb.create_clinical_record(record)
         
         return {
             "message": "Clinical record created successfully",
@@ -267,7 +347,7 @@ def create_app() -> FastAPI:
                 emergency_contact=patient_data.emergency_contact
             )
             
-            created_patient = db.create_user(patient)
+            created_patient = await adb.create_user(patient)
             
             # Create comprehensive clinical record
             record = ClinicalRecord(
@@ -290,7 +370,7 @@ def create_app() -> FastAPI:
                 follow_up=patient_data.follow_up
             )
             
-            created_record = db.create_clinical_record(record)
+            created_record = await adb.create_clinical_record(record)
             
             return {
                 "message": "Patient registered successfully",
@@ -304,21 +384,24 @@ def create_app() -> FastAPI:
 
     @app.get("/clinical-records/my-patients")
     async def get_my_patients_records(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
         current_user: User = Depends(get_current_doctor)
     ) -> Dict[str, Any]:
-        """Get all clinical records for patients I have access to"""
-        accesses = db.get_doctor_accesses(current_user.id)
+        """Get clinical records for patients I have access to, newest first"""
+        accesses = await adb.get_doctor_accesses(current_user.id)
         patient_ids = [access.patient_id for access in accesses]
-        
-        all_records = []
-        for patient_id in patient_ids:
-            records = db.get_patient_records(patient_id)
-            all_records.extend(records)
-        
-        # Sort by creation date (newest first)
-        all_records.sort(key=lambda x: x.created_at, reverse=True)
-        
+
+        all_records, next_cursor = await paginate(
+            lambda **page: adb.get_records_for_patients(
+                patient_ids, fields=("patient_id", "case_text", "differentials", "tests", "created_at"), **page
+            ),
+            limit,
+            after,
+        )
+
         return {
+            "next_cursor": next_cursor,
             "records": [
                 {
                     "id": record.id,
@@ -334,13 +417,21 @@ def create_app() -> FastAPI:
 
     @app.get("/clinical-records/my-history")
     async def get_my_history(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
         current_user: User = Depends(get_current_patient)
     ) -> Dict[str, Any]:
-        """Get my clinical history (patients only)"""
-        records = db.get_patient_records(current_user.id)
-        records.sort(key=lambda x: x.created_at, reverse=True)
-        
+        """Get my clinical history (patients only), newest first"""
+        records, next_cursor = await paginate(
+            lambda **page: adb.get_patient_records(
+                current_user.id, fields=("doctor_id", "case_text", "differentials", "tests", "created_at"), **page
+            ),
+            limit,
+            after,
+        )
+
         return {
+            "next_cursor": next_cursor,
             "records": [
                 {
                     "id": record.id,
@@ -355,16 +446,22 @@ def create_app() -> FastAPI:
         }
 
     @app.get("/patients/lookup/{patient_code}")
-    async def lookup_patient_by_code(patient_code: str) -> Dict[str, Any]:
+    async def lookup_patient_by_code(
+        patient_code: str,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """Look up patient by code and return their clinical records"""
-        patient = db.get_patient_by_code(patient_code)
+        patient = await adb.get_patient_by_code(patient_code)
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
-        
-        records = db.get_patient_records(patient.id)
-        records.sort(key=lambda x: x.created_at, reverse=True)
-        
+
+        records, next_cursor = await paginate(
+            lambda **page: adb.get_patient_records(patient.id, fields=LOOKUP_RECORD_FIELDS, **page), limit, after
+        )
+
         return {
+            "next_cursor": next_cursor,
             "patient": {
                 "name": patient.full_name,
                 "date_of_birth": patient.date_of_birth,
@@ -406,7 +503,7 @@ def create_app() -> FastAPI:
                 detail="Can only share your own records"
             )
         
-        doctor = db.get_user_by_email(payload.doctor_email)
+        doctor = await adb.get_user_by_email(payload.doctor_email)
         if not doctor or doctor.user_type != UserType.DOCTOR:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -414,7 +511,7 @@ def create_app() -> FastAPI:
             )
         
         # Check if access already exists
-        if db.has_patient_access(doctor.id, current_user.id):
+        if await adb.has_patient_access(doctor.id, current_user.id):
             return {"message": "Doctor already has access to your records"}
         
         access = PatientAccess(
@@ -423,7 +520,7 @@ def create_app() -> FastAPI:
             access_level=payload.access_level
         )
         
-        db.grant_patient_access(access)
+        await adb.grant_patient_access(access)
         
         return {
             "message": f"Access granted to Dr. {doctor.full_name}",
@@ -464,7 +561,7 @@ def create_app() -> FastAPI:
         )
         adjustment.audit_trail.append(audit_entry)
 
-        adjustment = db.create_adjustment(adjustment)
+        adjustment = await adb.create_adjustment(adjustment)
 
         return {"adjustment": adjustment.dict()}
 
@@ -473,6 +570,8 @@ def create_app() -> FastAPI:
     async def list_adjustment_requests(
         status_filter: Optional[str] = None,
         patient_id: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
         current_user: User = Depends(get_current_user)
     ) -> Dict[str, Any]:
         status_enum: Optional[AdjustmentStatus] = None
@@ -491,21 +590,22 @@ def create_app() -> FastAPI:
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Patients can only view their own adjustments"
                 )
-            adjustments = db.list_patient_adjustments(current_user.id)
+            target_patient: Optional[str] = current_user.id
+            statuses: Optional[set] = None
         else:
-            adjustments = db.list_all_adjustments()
-            if patient_id:
-                adjustments = [adj for adj in adjustments if adj.patient_id == patient_id]
-            else:
-                adjustments = [
-                    adj for adj in adjustments
-                    if adj.status in (AdjustmentStatus.REQUESTED, AdjustmentStatus.UNDER_REVIEW)
-                ]
+            target_patient = patient_id or None
+            statuses = None if patient_id else set(PENDING_ADJUSTMENT_STATUSES)
 
         if status_enum is not None:
-            adjustments = [adj for adj in adjustments if adj.status == status_enum]
+            statuses = {status_enum} if statuses is None else statuses & {status_enum}
 
-        return {"adjustments": [adj.dict() for adj in adjustments]}
+        adjustments, next_cursor = await paginate(
+            lambda **page: adb.list_adjustments(patient_id=target_patient, statuses=statuses, **page),
+            limit,
+            after,
+        )
+
+        return {"adjustments": [adj.dict() for adj in adjustments], "next_cursor": next_cursor}
 
     @app.post("/adjustments/{adjustment_id}/decision")
     async def decide_adjustment_request(
@@ -513,7 +613,7 @@ def create_app() -> FastAPI:
         payload: AdjustmentDecisionPayload,
         current_doctor: User = Depends(get_current_doctor)
     ) -> Dict[str, Any]:
-        adjustment = db.get_adjustment_by_id(adjustment_id)
+        adjustment = await adb.get_adjustment_by_id(adjustment_id)
         if adjustment is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -542,7 +642,7 @@ def create_app() -> FastAPI:
         )
         adjustment.audit_trail.append(audit_entry)
 
-        adjustment = db.update_adjustment(adjustment)
+        adjustment = await adb.update_adjustment(adjustment)
 
         revision_dict: Optional[Dict[str, Any]] = None
         if payload.status == AdjustmentStatus.APPROVED:
@@ -554,7 +654,8 @@ def create_app() -> FastAPI:
                 revised_from=adjustment.order_id,
                 created_by=current_doctor.id,
             )
-            db.create_careplan_revision(revision)
+            await adb.create_careplan_revision(revision)
+            await adb.run(alerts_engine.track_careplan, adjustment.patient_id)
             revision_dict = revision.dict()
 
         severity = NotificationSeverity.INFO if payload.status == AdjustmentStatus.APPROVED else NotificationSeverity.WARNING
@@ -569,7 +670,7 @@ def create_app() -> FastAPI:
             severity=severity,
             metadata={"adjustmentId": adjustment.id, "status": payload.status.value},
         )
-        db.add_notification(notification)
+        await adb.add_notification(notification)
 
         return {
             "adjustment": adjustment.dict(),
@@ -617,7 +718,6 @@ def create_app() -> FastAPI:
     async def ingest_observation_batch(
         payload: ObservationBatchRequest,
         current_user: User = Depends(get_current_user),
-        session: Session = Depends(get_session),
     ) -> Dict[str, Any]:
         if current_user.user_type == UserType.PATIENT and payload.patient_id != current_user.id:
             raise HTTPException(
@@ -630,53 +730,36 @@ def create_app() -> FastAPI:
                 detail="At least one observation is required"
             )
 
-        generated_alerts: List[Dict[str, str]] = []
-        accepted = 0
-
+        observations: List[Observation] = []
         try:
-            patient = session.get(PatientORM, payload.patient_id)
-            if patient is None:
-                patient = PatientORM(id=payload.patient_id)
-                session.add(patient)
-
             for obs_input in payload.observations:
-                normalized_code, numeric_value = validate_observation(
+                normalized_code, _ = validate_observation(
                     obs_input.code,
                     obs_input.unit,
                     obs_input.value,
                 )
-
-                observation_row = ObservationORM(
+                observations.append(Observation(
                     patient_id=payload.patient_id,
                     code=normalized_code,
+                    value=obs_input.value,
                     unit=obs_input.unit.lower() if obs_input.unit else None,
-                    value_text=str(obs_input.value),
-                    value_numeric=numeric_value,
                     effective_at=obs_input.effective_at,
                     source=obs_input.source or "manual",
-                )
-                session.add(observation_row)
-                accepted += 1
-
-                for alert in basic_threshold_alerts(normalized_code, numeric_value):
-                    alert_row = AlertORM(
-                        patient_id=payload.patient_id,
-                        code=normalized_code,
-                        rule=alert["rule"],
-                        severity=alert["severity"],
-                        message=alert["message"],
-                        observed_at=obs_input.effective_at,
-                    )
-                    session.add(alert_row)
-                    generated_alerts.append(alert)
-
-            session.commit()
+                ))
         except ObservationValidationError as exc:
-            session.rollback()
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
-        except Exception:
-            session.rollback()
-            raise
+
+        # Same store the alert engine and the dashboard read from
+        await adb.add_observations(observations)
+        accepted = len(observations)
+
+        # Every rule over the whole batch (delta rules against the engine's
+        # sliding windows), new alerts persisted in one write
+        alerts = await adb.run(alerts_engine.evaluate_batch, observations)
+        generated_alerts = [
+            {"rule": alert.context["rule"], "severity": alert.severity.value, "message": alert.context["message"]}
+            for alert in alerts
+        ]
 
         return {"ingested": accepted, "generatedAlerts": generated_alerts}
 
@@ -686,7 +769,7 @@ def create_app() -> FastAPI:
         payload: AlertStatusUpdate,
         current_user: User = Depends(get_current_doctor)
     ) -> Dict[str, Any]:
-        alert = db.get_alert_by_id(alert_id)
+        alert = await adb.get_alert_by_id(alert_id)
         if alert is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -694,7 +777,8 @@ def create_app() -> FastAPI:
             )
 
         try:
-            updated = alerts_engine.transition_alert(
+            updated = await adb.run(
+                alerts_engine.transition_alert,
                 alert,
                 payload.status,
                 actor_id=current_user.id,
@@ -708,6 +792,98 @@ def create_app() -> FastAPI:
 
         return {"alert": updated.dict()}
 
+    @app.post("/alerts/status")
+    async def update_alert_statuses(
+        payload: AlertBulkStatusUpdate,
+        current_user: User = Depends(get_current_doctor)
+    ) -> Dict[str, Any]:
+        """Move many alerts to one status in a single write.
+
+        Alerts reach the target through the intermediate statuses (resolving
+        an open alert acknowledges it first). Unknown alerts and alerts that
+        cannot reach the target are reported in ``failed``; the rest are saved.
+        """
+        def apply() -> Tuple[List[Alert], List[Dict[str, str]]]:
+            changes: List[Tuple[Alert, List[AlertStatus]]] = []
+            failed: List[Dict[str, str]] = []
+            for alert_id in dict.fromkeys(payload.alert_ids):
+                alert = db.get_alert_by_id(alert_id)
+                if alert is None:
+                    failed.append({"id": alert_id, "detail": "Alert not found"})
+                    continue
+                try:
+                    changes.append((alert, alerts_engine.transition_path(alert.status, payload.status)))
+                except ValueError as exc:
+                    failed.append({"id": alert_id, "detail": str(exc)})
+            updated = alerts_engine.apply_transition_paths(changes, current_user.id, payload.notes) if changes else []
+            return updated, failed
+
+        updated, failed = await adb.run(apply)
+        return {"alerts": [alert.dict() for alert in updated], "failed": failed}
+
+    @app.get("/alerts/response-times")
+    async def get_alert_response_times(
+        window: str = Query("24h", description="Rolling window: <n>m, <n>h or <n>d, up to 7d"),
+        group_by: str = Query("rule", description="rule, severity or doctor"),
+        current_user: User = Depends(get_current_doctor),
+    ) -> Dict[str, Any]:
+        """p50/p90/p99 of time to acknowledge, resolve and close alerts, from in-memory sketches"""
+        try:
+            metrics = alerts_engine.response_times.summary(parse_window(window), group_by)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        return {"window": window, "groupBy": group_by, "metrics": metrics}
+
+    @app.get("/alerts/stats")
+    async def get_alert_stats(current_user: User = Depends(get_current_doctor)) -> Dict[str, Any]:
+        """Per-rule counts of emitted and suppressed alerts since startup"""
+        return {"rules": alerts_engine.alert_counters()}
+
+    @app.post("/stream/token")
+    async def issue_stream_token(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+        """Short-lived token for ``/stream?stream_token=``; it opens the stream and nothing else"""
+        return {"token": create_stream_token(current_user.id), "expires_in": settings.stream_token_expires_s}
+
+    @app.get("/stream")
+    async def stream_events(
+        request: Request,
+        last_event_id: Optional[str] = Query(None),
+        current_user: User = Depends(get_stream_user),
+    ) -> StreamingResponse:
+        """Server-Sent Events: new alerts, alert transitions and notifications the user may see.
+
+        Doctors get the alerts of every patient they have access to (as of
+        connecting), patients their own; both get their notifications.
+        Reconnects resume after ``Last-Event-ID`` (or ``?last_event_id=``).
+        """
+        audience = {audience_key("user", current_user.id)}
+        if current_user.user_type == UserType.DOCTOR:
+            accesses = await adb.get_doctor_accesses(current_user.id)
+            audience.update(audience_key("patient", access.patient_id) for access in accesses)
+        else:
+            audience.add(audience_key("patient", current_user.id))
+        subscription, backlog = broker.subscribe(audience, request.headers.get("last-event-id") or last_event_id)
+
+        async def frames():
+            try:
+                for event in backlog:
+                    yield event.encode()
+                while True:
+                    try:
+                        event = await asyncio.wait_for(subscription.get(), timeout=STREAM_KEEPALIVE_S)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield event.encode()
+            finally:
+                broker.unsubscribe(subscription)
+
+        return StreamingResponse(
+            frames(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @app.get("/dashboard/{patient_id}")
     async def get_dashboard_summary(
         patient_id: str,
@@ -719,13 +895,13 @@ def create_app() -> FastAPI:
                 detail="Patients can only view their own dashboard"
             )
 
-        patient = db.get_user_by_id(patient_id)
+        patient = await adb.get_user_by_id(patient_id)
         if patient is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
 
-        alerts_engine.evaluate_missing_data(patient_id)
-
-        observations = db.list_observations(patient_id)
+        observations = await adb.list_recent_observations_by_code(
+            patient_id, per_code=10, fields=("code", "value", "unit", "effective_at")
+        )
         last_vitals: Dict[str, Dict[str, Any]] = {}
         for obs in observations:
             if obs.code not in last_vitals:
@@ -750,8 +926,12 @@ def create_app() -> FastAPI:
                 ],
             })
 
-        active_alerts = db.list_active_alerts(patient_id)
-        alert_items = db.list_alerts_by_patient(patient_id, include_closed=False)
+        active_alert_count = await adb.run(alerts_engine.count_active_alerts, patient_id)
+        alert_items = await adb.list_alerts_by_patient(
+            patient_id,
+            include_closed=False,
+            fields=("code", "severity", "status", "observed_at", "context", "acknowledged_at", "resolved_at", "closed_at"),
+        )
         alerts_payload = [
             {
                 "id": alert.id,
@@ -767,13 +947,13 @@ def create_app() -> FastAPI:
             for alert in alert_items
         ]
 
-        careplan_active = bool(db.list_careplan_revisions(patient_id))
+        careplan_active = bool(await adb.list_careplan_revisions(patient_id))
 
         return {
             "patientId": patient_id,
             "patientName": patient.full_name,
             "careplanActive": careplan_active,
-            "activeAlerts": len(active_alerts),
+            "activeAlerts": active_alert_count,
             "alerts": alerts_payload,
             "lastVitals": last_vitals,
             "timeseries": timeseries,
@@ -781,15 +961,29 @@ def create_app() -> FastAPI:
         }
 
     @app.get("/notifications")
-    async def list_notifications(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
-        notifications = db.list_notifications(current_user.id)
-        return {"notifications": [note.dict() for note in notifications]}
+    async def list_notifications(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+        current_user: User = Depends(get_current_user)
+    ) -> Dict[str, Any]:
+        notifications, next_cursor = await paginate(
+            lambda **page: adb.list_notifications(current_user.id, **page), limit, after
+        )
+        return {"notifications": [note.dict() for note in notifications], "next_cursor": next_cursor}
 
     @app.get("/doctors")
-    async def get_doctors() -> Dict[str, Any]:
-        """Get list of all doctors"""
-        doctors = db.get_doctors()
+    async def get_doctors(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get list of doctors"""
+        doctors, next_cursor = await paginate(
+            lambda **page: adb.get_doctors(fields=("full_name", "specialization", "license_number"), **page),
+            limit,
+            after,
+        )
         return {
+            "next_cursor": next_cursor,
             "doctors": [
                 {
                     "id": doctor.id,
@@ -0,0 +1,59 @@
+"""Alert lifecycle columns, alert timeline table and range-query indexes."""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0002_alert_lifecycle"
+down_revision = "0001_core_tables"
+branch_labels = None
+depends_on = None
+
+
+ALERT_COLUMNS = [
+    sa.Column("value", sa.JSON(), nullable=True),
+    sa.Column("unit", sa.String(length=32), nullable=True),
+    sa.Column("context", sa.JSON(), nullable=True),
+    sa.Column("updated_at", sa.DateTime(), nullable=True),
+    sa.Column("acknowledged_at", sa.DateTime(), nullable=True),
+    sa.Column("acknowledged_by", sa.String(length=64), nullable=True),
+    sa.Column("resolved_at", sa.DateTime(), nullable=True),
+    sa.Column("resolved_by", sa.String(length=64), nullable=True),
+    sa.Column("closed_at", sa.DateTime(), nullable=True),
+    sa.Column("closed_by", sa.String(length=64), nullable=True),
+]
+
+
+def upgrade() -> None:
+    for column in ALERT_COLUMNS:
+        op.add_column("alerts", column)
+
+    op.create_table(
+        "alert_events",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("alert_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("alerts.id"), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("actor_id", sa.String(length=64), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_alert_events_alert_id", "alert_events", ["alert_id"])
+    op.create_index("ix_alert_events_created_at", "alert_events", ["created_at"])
+
+    op.create_index("ix_observations_patient_code_effective", "observations", ["patient_id", "code", "effective_at"])
+    op.create_index("ix_observations_patient_effective", "observations", ["patient_id", "effective_at"])
+    op.create_index("ix_alerts_patient_status_created", "alerts", ["patient_id", "status", "created_at"])
+    op.create_index("ix_alerts_patient_rule", "alerts", ["patient_id", "rule"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alerts_patient_rule", table_name="alerts")
+    op.drop_index("ix_alerts_patient_status_created", table_name="alerts")
+    op.drop_index("ix_observations_patient_effective", table_name="observations")
+    op.drop_index("ix_observations_patient_code_effective", table_name="observations")
+    op.drop_index("ix_alert_events_created_at", table_name="alert_events")
+    op.drop_index("ix_alert_events_alert_id", table_name="alert_events")
+    op.drop_table("alert_events")
+    for column in reversed(ALERT_COLUMNS):
+        op.drop_column("alerts", column.name)
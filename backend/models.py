@@ -306,3 +306,8 @@ class AlertStatusUpdate(BaseModel):
         return value
 
 
+class AlertBulkStatusUpdate(AlertStatusUpdate):
+    """Move many alerts to one status, e.g. acknowledge a ward's alerts during rounds"""
+    alert_ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
@@ -0,0 +1,188 @@
+"""Rolling response-time quantiles for alerts (time to acknowledge, resolve, close).
+
+Every transition adds its duration to a mergeable quantile sketch per
+(metric, dimension value) and time slot, so a query merges the slots inside
+its window instead of scanning stored alerts. Windows are resolved to
+``SLOT_SECONDS`` and cannot exceed ``RETENTION``.
+"""
+import math
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models import Alert, AlertStatus
+
+SLOT_SECONDS = 300
+RETENTION = timedelta(days=7)
+QUANTILES = (0.5, 0.9, 0.99)
+DIMENSIONS = ("rule", "severity", "doctor")
+
+# status -> (context duration, timestamp field, actor field)
+STATUS_METRICS = {
+    AlertStatus.ACKNOWLEDGED: ("time_to_ack_seconds", "acknowledged_at", "acknowledged_by"),
+    AlertStatus.RESOLVED: ("time_to_resolve_seconds", "resolved_at", "resolved_by"),
+    AlertStatus.CLOSED: ("time_to_close_seconds", "closed_at", "closed_by"),
+}
+METRICS = tuple(metric for metric, _, _ in STATUS_METRICS.values())
+
+_WINDOW = re.compile(r"^(\d+)([mhd])$")
+_WINDOW_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch with logarithmic buckets (as in DDSketch).
+
+    Any quantile is estimated within ``relative_accuracy`` of a true value,
+    memory grows with the log of the value range, and two sketches merge
+    exactly by adding bucket counts.
+    """
+
+    __slots__ = ("relative_accuracy", "_gamma", "_log_gamma", "buckets", "zeros", "count", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        if value <= 0:
+            self.zeros += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return max(self.min, 0.0)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                estimate = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+
+def parse_window(window: str) -> timedelta:
+    """``"15m"``, ``"24h"``, ``"7d"``... up to RETENTION"""
+    match = _WINDOW.match(window.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid window {window!r}: use <n>m, <n>h or <n>d")
+    span = timedelta(**{_WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+    if span > RETENTION:
+        raise ValueError(f"Window {window!r} exceeds the {RETENTION.days}d retention")
+    return span
+
+
+class ResponseTimeStats:
+    """Time-slotted sketches of alert response times by rule, severity and doctor"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        # (metric, dimension, value) -> slot -> sketch
+        self._sketches: Dict[Tuple[str, str, str], Dict[int, QuantileSketch]] = {}
+        self._oldest_slot = 0
+        self._lock = threading.Lock()
+
+    def record(self, metric: str, seconds: float, at: datetime, **dimensions: Optional[str]) -> None:
+        slot = int(at.timestamp()) // SLOT_SECONDS
+        with self._lock:
+            if slot < self._oldest_slot:
+                return
+            for dimension in DIMENSIONS:
+                value = dimensions.get(dimension) or "unknown"
+                slots = self._sketches.setdefault((metric, dimension, value), {})
+                sketch = slots.get(slot)
+                if sketch is None:
+                    sketch = slots[slot] = QuantileSketch(self.relative_accuracy)
+                sketch.add(seconds)
+            self._prune(slot)
+
+    def record_alert(self, alert: Alert, statuses: Optional[Iterable[AlertStatus]] = None) -> None:
+        """Record the durations ``alert`` gained by reaching ``statuses`` (default: every one it reached)"""
+        wanted = set(statuses) if statuses is not None else set(STATUS_METRICS)
+        for status, (metric, at_field, actor_field) in STATUS_METRICS.items():
+            seconds, at = alert.context.get(metric), getattr(alert, at_field)
+            if status not in wanted or seconds is None or at is None:
+                continue
+            self.record(
+                metric, float(seconds), at,
+                rule=alert.context.get("rule"), severity=alert.severity.value, doctor=getattr(alert, actor_field),
+            )
+
+    def summary(
+        self, window: timedelta, group_by: str = "rule", now: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        """metric -> group (plus ``"all"``) -> count and quantiles over the last ``window``"""
+        if group_by not in DIMENSIONS:
+            raise ValueError(f"group_by must be one of: {', '.join(DIMENSIONS)}")
+        first_slot = int(((now or datetime.now()) - window).timestamp()) // SLOT_SECONDS
+        result: Dict[str, Dict[str, Dict[str, Optional[float]]]] = {}
+        with self._lock:
+            for metric in METRICS:
+                groups: Dict[str, QuantileSketch] = {}
+                overall = QuantileSketch(self.relative_accuracy)
+                for (name, dimension, value), slots in self._sketches.items():
+                    if name != metric or dimension not in (group_by, "severity"):
+                        continue
+                    for slot, sketch in slots.items():
+                        if slot < first_slot:
+                            continue
+                        if dimension == group_by:
+                            groups.setdefault(value, QuantileSketch(self.relative_accuracy)).merge(sketch)
+                        if dimension == "severity":
+                            # Every duration has exactly one severity, so these add up to the total
+                            overall.merge(sketch)
+                if overall.count:
+                    groups["all"] = overall
+                result[metric] = {value: self._describe(sketch) for value, sketch in sorted(groups.items())}
+        return result
+
+    def _prune(self, slot: int) -> None:
+        oldest = slot - int(RETENTION.total_seconds()) // SLOT_SECONDS
+        if oldest <= self._oldest_slot:
+            return
+        self._oldest_slot = oldest
+        for key in list(self._sketches):
+            slots = self._sketches[key]
+            for stale in [stale for stale in slots if stale < oldest]:
+                del slots[stale]
+            if not slots:
+                del self._sketches[key]
+
+    @staticmethod
+    def _describe(sketch: QuantileSketch) -> Dict[str, Optional[float]]:
+        described: Dict[str, Optional[float]] = {"count": sketch.count}
+        for q in QUANTILES:
+            value = sketch.quantile(q)
+            described[f"p{round(q * 100)}"] = round(value, 3) if value is not None else None
+        return described
+
+
+__all__ = [
+    "DIMENSIONS", "METRICS", "QuantileSketch", "ResponseTimeStats", "STATUS_METRICS", "parse_window",
+]
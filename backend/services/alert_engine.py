@@ -1,5 +1,6 @@
+import threading
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 from ..models import (
     Observation,
@@ -8,33 +9,41 @@ from ..models import (
     AlertStatus,
     AlertTimelineEntry,
 )
-from ..database import db
+from ..config import get_settings
+from ..database import SimpleDatabase, db
+from .alert_rules import CompiledRule, RulePack, load_rule_pack
+from .alert_analytics import RETENTION, ResponseTimeStats
+from .alert_index import ActiveAlertIndex
+from .alert_throttle import AlertThrottle
+from .alert_windows import WindowStore
+from .early_warning import EarlyWarningScorer
+from .missing_data import MissingDataSchedule
 
 
 class AlertEngine:
-    """Rule-based alert evaluation for physiological observations."""
-
-    THRESHOLD_RULES = [
-        {
-            "rule": "low_spo2",
-            "code": "spo2",
-            "operator": "lt",
-            "value": 88.0,
-            "severity": AlertSeverity.CRITICAL,
-            "message": "SpO2 por debajo de 88%",
-        },
-        {
-            "rule": "low_glucose",
-            "code": "glucose",
-            "operator": "lt",
-            "value": 54.0,
-            "severity": AlertSeverity.CRITICAL,
-            "message": "Glucosa por debajo de 54 mg/dL",
-        },
-    ]
-
-    HEART_RATE_CODES = {"heart_rate", "hr"}
+    """Rule-based alert evaluation for physiological observations.
+
+    Rules come from a declarative rule pack (see alert_rules), compiled into
+    a dispatch table keyed by normalized code. A batch of observations is
+    evaluated at once and its new alerts are persisted in a single write.
+    Delta rules read their baselines from in-memory sliding windows per
+    (patient, code), warmed from storage once and fed by every evaluated batch.
+    Open and acknowledged alerts are indexed by (patient, rule), so dedup
+    checks and active counts never scan stored alerts; suppression windows,
+    hysteresis and rate limits are enforced from memory by AlertThrottle. Missing-data alerts
+    are raised by sweep_missing_data from a schedule of per-patient deadlines.
+    Response times of transitions feed rolling quantile sketches. Vital signs
+    update an in-memory NEWS2 state per patient; each new score is stored as a
+    ``news2`` observation and evaluated with the batch, so score bands alert
+    through ordinary rules.
+    """
+
+    # Callables (kind, patient_id, alert dict) told about new and transitioned alerts
+    _listeners: Tuple[Callable[[str, Optional[str], Dict[str, Any]], Any], ...] = ()
+
     MISSING_DATA_RULE_ID = "missing_data"
+    MISSING_DATA_AFTER = timedelta(hours=12)
+    MISSING_DATA_RETRY = timedelta(minutes=1)
 
     ALLOWED_TRANSITIONS = {
         AlertStatus.OPEN: {AlertStatus.ACKNOWLEDGED},
@@ -42,43 +51,199 @@ class AlertEngine:
         AlertStatus.RESOLVED: {AlertStatus.CLOSED},
     }
 
-    def __init__(self):
-        self.db = db
+    def __init__(
+        self,
+        rules: Optional[RulePack] = None,
+        database: Optional[SimpleDatabase] = None,
+        *,
+        window_points: int = 512,
+        early_warning_max_age: timedelta = timedelta(hours=12),
+    ):
+        self.db = database or db
+        self.rules = rules or load_rule_pack(get_settings().alert_rules_path)
+        self.active = ActiveAlertIndex(self.db, max_age=get_settings().active_alert_refresh_s)
+        self.throttle = AlertThrottle()
+        self.response_times = ResponseTimeStats()
+        # Normalized code -> its rules with a hysteresis band
+        self._hysteresis_rules: Dict[str, Tuple[CompiledRule, ...]] = {}
+        for code, rules_for_code in self.rules.by_code.items():
+            banded = tuple(rule for rule in rules_for_code if rule.hysteresis is not None)
+            if banded:
+                self._hysteresis_rules[code] = banded
+        self.missing_data = MissingDataSchedule(self.MISSING_DATA_AFTER)
+        # Normalized code -> widest delta window (seconds) of its rules
+        self._window_codes: Dict[str, float] = {}
+        for code, rules_for_code in self.rules.by_code.items():
+            windows = [rule.window_minutes * 60 for rule in rules_for_code if rule.kind == "delta"]
+            if windows:
+                self._window_codes[code] = max(windows)
+        self.windows = WindowStore(max(self._window_codes.values(), default=0.0), max_points=window_points)
+        self.early_warning = EarlyWarningScorer(self.rules.normalize, early_warning_max_age)
+        self._warm_lock = threading.Lock()
+        self._warmed = False
+        # Held from the dedup check until new alerts are stored and indexed
+        self._raise_lock = threading.Lock()
+
+    def warm(self) -> int:
+        """Load the readings inside the delta windows and the early-warning age from storage; runs once.
+
+        Returns the number of readings loaded into the delta windows.
+        """
+        with self._warm_lock:
+            if self._warmed:
+                return 0
+            loaded = 0
+            if self._window_codes:
+                codes = set(self._window_codes)
+                codes.update(alias for alias, code in self.rules.aliases.items() if code in self._window_codes)
+                start = datetime.now() - timedelta(seconds=self.windows.horizon)
+                history = self.db.list_observations_since(start, sorted(codes))
+                self._remember(history)
+                loaded = len(history)
+            start = datetime.now() - self.early_warning.max_age
+            vitals = self.db.list_observations_since(start, self.early_warning.codes(self.rules.aliases))
+            for observation in vitals:
+                self.early_warning.update(observation)
+            self._warmed = True
+            return loaded
 
     def process_observations(self, patient_id: str, observations: List[Observation]) -> List[Alert]:
         if not observations:
             return []
 
-        # Persist observations
-        self.db.add_observations(observations)
-
-        generated: List[Alert] = []
         for observation in observations:
             observation.code = observation.code.lower()
-            generated.extend(self._evaluate_threshold_rules(observation))
-            delta_alert = self._evaluate_delta_rule(observation)
-            if delta_alert:
-                generated.append(delta_alert)
 
-        # Any new data resolves missing-data alerts automatically
-        self._resolve_missing_data_alert(patient_id)
-        return [alert for alert in generated if alert is not None]
+        # Persist observations
+        self.db.add_observations(observations)
+        return self.evaluate_batch(observations)
+
+    def evaluate_batch(self, observations: List[Observation]) -> List[Alert]:
+        """Apply every rule to an already stored batch and persist the new alerts together.
+
+        Like one-at-a-time evaluation, a rule raises at most one alert per
+        patient while an alert for it is active. Matches are throttled in
+        observation time order, with readings that clear a hysteresis band
+        interleaved. Early-warning scores derived from the batch are stored
+        and evaluated along with it, and the batch resolves the missing-data
+        alerts of its patients.
+        """
+        self.warm()
+        derived = self.early_warning.observe(observations)
+        if derived:
+            self.db.add_observations(derived)
+            observations = observations + derived
+        baselines = self._delta_baselines(observations)
+        self._remember(observations)
+        matches = self.rules.evaluate_batch(
+            [observation.code for observation in observations],
+            [self._to_float(observation.value) for observation in observations],
+            timestamps=[observation.effective_at for observation in observations],
+            series=[observation.patient_id for observation in observations],
+            baselines=baselines,
+        )
+        fired: Dict[int, List[Tuple[CompiledRule, Dict[str, Any]]]] = {}
+        for index, rule, extras in matches:
+            fired.setdefault(index, []).append((rule, extras))
+        banded: Dict[int, Tuple[CompiledRule, ...]] = {}
+        if self._hysteresis_rules:
+            for index, observation in enumerate(observations):
+                rules_for_code = self._hysteresis_rules.get(self.rules.normalize(observation.code))
+                if rules_for_code:
+                    banded[index] = rules_for_code
+
+        raised: Set[Tuple[str, str]] = set()
+        alerts: List[Alert] = []
+        with self._raise_lock:
+            for index in sorted(fired.keys() | banded.keys(), key=lambda index: (observations[index].effective_at, index)):
+                observation = observations[index]
+                if index in banded:
+                    value = self._to_float(observation.value)
+                    for rule in banded[index]:
+                        if value is not None and rule.clears(value):
+                            self.throttle.clear(observation.patient_id, rule.rule)
+                for rule, extras in fired.get(index, ()):
+                    key = (observation.patient_id, rule.rule)
+                    active = key in raised or self.active.confirm(*key) is not None
+                    if self.throttle.admit(observation.patient_id, rule, observation.effective_at, active):
+                        raised.add(key)
+                        alerts.append(self._build_alert(observation, rule, extras))
+            created = self.db.create_alerts(alerts)
+            for alert in created:
+                self.active.update(alert)
+        for alert in created:
+            self._publish("alert", alert)
+
+        latest: Dict[str, datetime] = {}
+        for observation in observations:
+            if observation.patient_id not in latest or observation.effective_at > latest[observation.patient_id]:
+                latest[observation.patient_id] = observation.effective_at
+        for patient_id, observed_at in latest.items():
+            self.missing_data.observed(patient_id, observed_at)
+            # Any new data resolves missing-data alerts automatically
+            self._resolve_missing_data_alert(patient_id)
+        return created
+
+    def count_active_alerts(self, patient_id: str) -> int:
+        return self.active.count(patient_id)
+
+    def alert_counters(self) -> Dict[str, Dict[str, int]]:
+        """Alerts emitted and suppressed (in total and per reason) for every rule that matched"""
+        return self.throttle.counters()
+
+    def load_missing_data_schedule(self) -> int:
+        """Schedule every patient with a care plan; returns how many are tracked"""
+        patient_ids = self.db.list_careplan_patient_ids()
+        for patient_id in patient_ids:
+            self.track_careplan(patient_id)
+        return len(patient_ids)
+
+    def track_careplan(self, patient_id: str) -> None:
+        latest = self.db.get_last_observation(patient_id)
+        self.missing_data.track(patient_id, latest.effective_at if latest else None)
+
+    def sweep_missing_data(self, now: Optional[datetime] = None) -> List[Alert]:
+        """Raise missing-data alerts for every patient whose deadline has passed.
+
+        If storage fails mid-sweep, the patients not yet handled are put back
+        on the schedule ``MISSING_DATA_RETRY`` from now and the error is raised.
+        """
+        raised: List[Alert] = []
+        due = self.missing_data.pop_due(now or datetime.now())
+        for position, patient_id in enumerate(due):
+            try:
+                latest = self.db.get_last_observation(patient_id)
+                if latest is not None and datetime.now() - latest.effective_at < self.MISSING_DATA_AFTER:
+                    # Observed through another process since it was scheduled
+                    self.missing_data.observed(patient_id, latest.effective_at)
+                    continue
+                alert = self.evaluate_missing_data(patient_id)
+            except Exception:
+                self.missing_data.retry(due[position:], datetime.now() + self.MISSING_DATA_RETRY)
+                raise
+            if alert is not None:
+                raised.append(alert)
+        return raised
 
     def evaluate_missing_data(self, patient_id: str) -> Optional[Alert]:
         if not self.db.list_careplan_revisions(patient_id):
             return None
 
-        observations = self.db.list_observations(patient_id)
-        if not observations:
+        latest = self.db.get_last_observation(patient_id)
+        if latest is None:
             return None
 
-        latest = observations[0]
-        if datetime.now() - latest.effective_at < timedelta(hours=12):
+        if datetime.now() - latest.effective_at < self.MISSING_DATA_AFTER:
             return None
 
-        if self._find_active_alert(patient_id, self.MISSING_DATA_RULE_ID):
-            return None
+        with self._raise_lock:
+            if self.active.confirm(patient_id, self.MISSING_DATA_RULE_ID):
+                return None
+            alert = self._store_missing_data_alert(patient_id, latest)
+        self._publish("alert", alert)
+        return alert
 
+    def _store_missing_data_alert(self, patient_id: str, latest: Observation) -> Alert:
         context = {
             "rule": self.MISSING_DATA_RULE_ID,
             "message": "Sin observaciones en mas de 12 horas",
@@ -98,7 +263,9 @@ class AlertEngine:
             status=AlertStatus.OPEN,
             notes=context["message"],
         )
-        return self.db.create_alert(alert, entry)
+        alert = self.db.create_alert(alert, entry)
+        self.active.update(alert)
+        return alert
 
     def transition_alert(
         self,
@@ -109,12 +276,85 @@ class AlertEngine:
         *,
         force: bool = False,
     ) -> Alert:
-        if not force:
-            allowed = self.ALLOWED_TRANSITIONS.get(alert.status, set())
-            if new_status not in allowed:
-                raise ValueError(f"Transition {alert.status.value} -> {new_status.value} no permitida")
+        return self.apply_transition_path(alert, [new_status], actor_id, notes, force=force)
+
+    def apply_transition_path(
+        self,
+        alert: Alert,
+        path: Sequence[AlertStatus],
+        actor_id: Optional[str],
+        notes: Union[None, str, Sequence[Optional[str]]] = None,
+        *,
+        force: bool = False,
+    ) -> Alert:
+        """Walk an alert through several statuses and persist the result once.
+
+        ``notes`` is one note for every step or one per step. Nothing is
+        changed unless every step is allowed (or ``force`` is set).
+        """
+        return self.apply_transition_paths([(alert, path)], actor_id, notes, force=force)[0]
+
+    def apply_transition_paths(
+        self,
+        changes: Sequence[Tuple[Alert, Sequence[AlertStatus]]],
+        actor_id: Optional[str],
+        notes: Union[None, str, Sequence[Optional[str]]] = None,
+        *,
+        force: bool = False,
+    ) -> List[Alert]:
+        """apply_transition_path for many alerts, all validated first and saved in one write"""
+        for alert, path in changes:
+            if not path:
+                raise ValueError(f"Empty transition path for alert {alert.id}")
+            if isinstance(notes, (list, tuple)) and len(notes) != len(path):
+                raise ValueError("Expected one note per transition step")
+            if force:
+                continue
+            current = alert.status
+            for new_status in path:
+                if new_status not in self.ALLOWED_TRANSITIONS.get(current, set()):
+                    raise ValueError(f"Transition {current.value} -> {new_status.value} no permitida")
+                current = new_status
 
         now = datetime.now()
+        entries: List[AlertTimelineEntry] = []
+        for alert, path in changes:
+            for step, new_status in enumerate(path):
+                note = notes[step] if isinstance(notes, (list, tuple)) else notes
+                entries.append(self._stamp_transition(alert, new_status, actor_id, note, now))
+        alerts = self.db.save_alerts([alert for alert, _ in changes], entries)
+        for alert, path in changes:
+            self.active.update(alert)
+            self.response_times.record_alert(alert, path)
+            self._publish("alert_status", alert)
+        return alerts
+
+    def load_response_times(self) -> int:
+        """Seed the response-time sketches from alerts changed within their retention"""
+        alerts = self.db.list_alerts_updated_since(datetime.now() - RETENTION)
+        for alert in alerts:
+            self.response_times.record_alert(alert)
+        return len(alerts)
+
+    @classmethod
+    def transition_path(cls, current: AlertStatus, target: AlertStatus) -> List[AlertStatus]:
+        """The allowed steps leading from ``current`` to ``target``"""
+        path: List[AlertStatus] = []
+        status = current
+        while status != target:
+            following = cls.ALLOWED_TRANSITIONS.get(status)
+            if not following:
+                raise ValueError(f"Transition {current.value} -> {target.value} no permitida")
+            status = next(iter(following))
+            path.append(status)
+        if not path:
+            raise ValueError(f"Transition {current.value} -> {target.value} no permitida")
+        return path
+
+    @staticmethod
+    def _stamp_transition(
+        alert: Alert, new_status: AlertStatus, actor_id: Optional[str], notes: Optional[str], now: datetime
+    ) -> AlertTimelineEntry:
         if new_status == AlertStatus.ACKNOWLEDGED:
             alert.acknowledged_at = now
             alert.acknowledged_by = actor_id
@@ -131,126 +371,88 @@ class AlertEngine:
             alert.context["time_to_close_seconds"] = (now - alert.created_at).total_seconds()
 
         alert.status = new_status
+        alert.updated_at = now
         entry = AlertTimelineEntry(
             alert_id=alert.id,
             status=new_status,
             actor_id=actor_id,
             notes=notes,
+            created_at=now,
         )
-        return self.db.save_alert_with_entry(alert, entry)
+        alert.timeline.append(entry)
+        return entry
 
-    def _evaluate_threshold_rules(self, observation: Observation) -> List[Alert]:
-        generated: List[Alert] = []
-        value = self._to_float(observation.value)
-        if value is None:
-            return generated
+    def add_listener(self, listener: Callable[[str, Optional[str], Dict[str, Any]], Any]) -> None:
+        self._listeners = self._listeners + (listener,)
 
-        for rule in self.THRESHOLD_RULES:
-            if observation.code != rule["code"]:
-                continue
-            if rule["operator"] == "lt" and value < rule["value"]:
-                alert = self._raise_alert(
-                    observation,
-                    rule_id=rule["rule"],
-                    severity=rule["severity"],
-                    message=rule["message"],
-                    extras={"threshold": rule["value"]},
-                )
-                if alert:
-                    generated.append(alert)
-        return generated
-
-    def _evaluate_delta_rule(self, observation: Observation) -> Optional[Alert]:
-        normalized_code = observation.code.lower()
-        if normalized_code not in self.HEART_RATE_CODES:
-            return None
+    def remove_listener(self, listener: Callable[[str, Optional[str], Dict[str, Any]], Any]) -> None:
+        self._listeners = tuple(item for item in self._listeners if item is not listener)
 
-        current_value = self._to_float(observation.value)
-        if current_value is None:
-            return None
+    def _publish(self, kind: str, alert: Alert) -> None:
+        if self._listeners:
+            data = alert.dict()
+            for listener in self._listeners:
+                listener(kind, alert.patient_id, data)
 
-        recent = self.db.get_recent_observations(observation.patient_id, normalized_code, within_minutes=10)
-        previous = None
-        for candidate in recent:
-            if candidate.effective_at < observation.effective_at:
-                previous = candidate
-                break
-        if not previous:
-            return None
-
-        previous_value = self._to_float(previous.value)
-        if previous_value is None:
-            return None
-
-        delta = current_value - previous_value
-        if delta <= 40:
-            return None
-
-        rule_id = "hr_delta_spike"
-        message = f"Incremento de {delta:.1f} bpm en menos de 10 minutos"
-        return self._raise_alert(
-            observation,
-            rule_id=rule_id,
-            severity=AlertSeverity.WARNING,
-            message=message,
-            extras={
-                "delta": delta,
-                "baseline": previous_value,
-                "baseline_at": previous.effective_at.isoformat(),
-            },
-        )
-
-    def _resolve_missing_data_alert(self, patient_id: str) -> Optional[Alert]:
-        active = self._find_active_alert(patient_id, self.MISSING_DATA_RULE_ID)
-        if not active:
-            return None
-
-        try:
-            alert = self.transition_alert(active, AlertStatus.ACKNOWLEDGED, actor_id="system", notes="Datos retomados", force=True)
-            alert = self.transition_alert(alert, AlertStatus.RESOLVED, actor_id="system", notes="Resolucion automatica", force=True)
-            alert = self.transition_alert(alert, AlertStatus.CLOSED, actor_id="system", notes="Cierre automatico", force=True)
-            return alert
-        except ValueError:
-            return None
-
-    def _raise_alert(
-        self,
-        observation: Observation,
-        *,
-        rule_id: str,
-        severity: AlertSeverity,
-        message: str,
-        extras: Optional[Dict[str, Any]] = None,
-    ) -> Optional[Alert]:
-        if self._find_active_alert(observation.patient_id, rule_id):
-            return None
-
-        context: Dict[str, Any] = {"rule": rule_id, "message": message}
-        if extras:
-            context.update(extras)
+    def _delta_baselines(self, observations: List[Observation]) -> Dict[Tuple[str, str], Tuple[datetime, float]]:
+        """Windowed reading just before the batch for every (patient, code) with delta rules"""
+        # (patient, normalized code) -> earliest reading in the batch
+        starts: Dict[Tuple[str, str], datetime] = {}
+        for observation in observations:
+            code = self.rules.normalize(observation.code)
+            if code not in self._window_codes:
+                continue
+            key = (observation.patient_id, code)
+            if key not in starts or observation.effective_at < starts[key]:
+                starts[key] = observation.effective_at
+
+        baselines: Dict[Tuple[str, str], Tuple[datetime, float]] = {}
+        for key, start in starts.items():
+            previous = self.windows.previous(key, start)
+            if previous is not None:
+                baselines[key] = (previous[2], previous[1])
+        return baselines
+
+    def _remember(self, observations: List[Observation]) -> None:
+        """Push numeric readings of windowed codes into their sliding windows"""
+        for observation in observations:
+            code = self.rules.normalize(observation.code)
+            if code not in self._window_codes:
+                continue
+            value = self._to_float(observation.value)
+            if value is not None:
+                self.windows.push((observation.patient_id, code), observation.effective_at, value)
 
+    def _build_alert(self, observation: Observation, rule: CompiledRule, extras: Dict[str, Any]) -> Alert:
         numeric_value = self._to_float(observation.value)
+        message = rule.format_message(numeric_value, extras)
         alert = Alert(
             patient_id=observation.patient_id,
             code=observation.code,
             value=numeric_value if numeric_value is not None else observation.value,
             unit=observation.unit,
             observed_at=observation.effective_at,
-            severity=severity,
-            context=context,
+            severity=rule.severity,
+            context={"rule": rule.rule, "message": message, **extras},
         )
-        entry = AlertTimelineEntry(
-            alert_id=alert.id,
-            status=AlertStatus.OPEN,
-            notes=message,
+        alert.timeline.append(AlertTimelineEntry(alert_id=alert.id, status=AlertStatus.OPEN, notes=message))
+        return alert
+
+    def _resolve_missing_data_alert(self, patient_id: str) -> Optional[Alert]:
+        # Only an indexed alert is confirmed; this runs for every patient in a batch
+        active = self.active.get(patient_id, self.MISSING_DATA_RULE_ID) and self.active.confirm(
+            patient_id, self.MISSING_DATA_RULE_ID
         )
-        return self.db.create_alert(alert, entry)
+        if not active:
+            return None
 
-    def _find_active_alert(self, patient_id: str, rule_id: str) -> Optional[Alert]:
-        for alert in self.db.list_active_alerts(patient_id):
-            if alert.context.get("rule") == rule_id:
-                return alert
-        return None
+        return self.apply_transition_path(
+            active,
+            [AlertStatus.ACKNOWLEDGED, AlertStatus.RESOLVED, AlertStatus.CLOSED],
+            actor_id="system",
+            notes=["Datos retomados", "Resolucion automatica", "Cierre automatico"],
+            force=True,
+        )
 
     @staticmethod
     def _to_float(value: Any) -> Optional[float]:
@@ -263,26 +465,3 @@ class AlertEngine:
 
 
 alert_engine = AlertEngine()
-def basic_threshold_alerts(code: str, numeric_value: Optional[float]) -> List[Dict[str, str]]:
-    """Evaluate simple threshold-based alerts for a single observation."""
-    if numeric_value is None:
-        return []
-
-    normalized = code.lower()
-    alerts: List[Dict[str, str]] = []
-
-    if normalized in {"spo2", "oxygen_saturation"} and numeric_value < 88:
-        alerts.append({
-            "rule": "low_spo2",
-            "severity": "critical",
-            "message": "SpO2 below 88%",
-        })
-
-    if normalized == "glucose" and numeric_value < 54:
-        alerts.append({
-            "rule": "low_glucose",
-            "severity": "critical",
-            "message": "Glucose below 54 mg/dL",
-        })
-
-    return alerts
@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from ..models import Alert, AlertStatus
+
+ACTIVE_STATUSES = (AlertStatus.OPEN, AlertStatus.ACKNOWLEDGED)
+
+
+class _PatientAlerts:
+    __slots__ = ("by_id", "by_rule", "loaded_at")
+
+    def __init__(self) -> None:
+        self.by_id: Dict[str, Alert] = {}
+        self.by_rule: Dict[Optional[str], Alert] = {}
+        self.loaded_at = time.monotonic()
+
+    def add(self, alert: Alert) -> None:
+        self.by_id[alert.id] = alert
+        current = self.by_rule.get(alert.context.get("rule"))
+        if current is None or current.id == alert.id:
+            self.by_rule[alert.context.get("rule")] = alert
+
+    def discard(self, alert: Alert) -> None:
+        if self.by_id.pop(alert.id, None) is None:
+            return
+        rule = alert.context.get("rule")
+        current = self.by_rule.get(rule)
+        if current is not None and current.id == alert.id:
+            del self.by_rule[rule]
+            # Another active alert of the same rule (stored before dedup) takes over
+            for other in self.by_id.values():
+                if other.context.get("rule") == rule:
+                    self.by_rule[rule] = other
+                    break
+
+
+class ActiveAlertIndex:
+    """Open and acknowledged alerts keyed by (patient_id, rule).
+
+    A patient's entry is loaded from storage on first use and must see every
+    alert this engine writes. Other workers sharing the storage can change
+    alerts behind its back, so entries are reloaded once older than
+    ``max_age`` seconds, and ``confirm`` checks storage before an indexed
+    alert suppresses a new one, or before a missing one lets it be raised.
+    """
+
+    def __init__(self, database, max_age: Optional[float] = None):
+        self.db = database
+        self.max_age = max_age
+        self._patients: Dict[str, _PatientAlerts] = {}
+        self._lock = threading.RLock()
+
+    def _patient(self, patient_id: str) -> _PatientAlerts:
+        entry = self._patients.get(patient_id)
+        if entry is None or (self.max_age is not None and time.monotonic() - entry.loaded_at > self.max_age):
+            entry = self._load(patient_id)
+        return entry
+
+    def _load(self, patient_id: str) -> _PatientAlerts:
+        entry = _PatientAlerts()
+        for alert in self.db.list_active_alerts(patient_id):
+            entry.add(alert)
+        self._patients[patient_id] = entry
+        return entry
+
+    def get(self, patient_id: str, rule: str) -> Optional[Alert]:
+        with self._lock:
+            return self._patient(patient_id).by_rule.get(rule)
+
+    def confirm(self, patient_id: str, rule: str) -> Optional[Alert]:
+        """``get`` checked against storage, so an alert raised or closed by another worker is seen"""
+        with self._lock:
+            entry = self._patients.get(patient_id)
+            alert = entry.by_rule.get(rule) if entry is not None else None
+            if alert is not None:
+                stored = self.db.get_alert_by_id(alert.id)
+                if stored is not None and stored.status in ACTIVE_STATUSES:
+                    entry.add(stored)
+                    return stored
+            # Not indexed, or no longer active: reload the patient from storage
+            return self._load(patient_id).by_rule.get(rule)
+
+    def count(self, patient_id: str) -> int:
+        with self._lock:
+            return len(self._patient(patient_id).by_id)
+
+    def update(self, alert: Alert) -> None:
+        """Record a created or transitioned alert"""
+        with self._lock:
+            entry = self._patient(alert.patient_id)
+            if alert.status in ACTIVE_STATUSES:
+                entry.add(alert)
+            else:
+                entry.discard(alert)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._patients.clear()
+
+
+__all__ = ["ACTIVE_STATUSES", "ActiveAlertIndex"]
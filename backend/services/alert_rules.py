@@ -0,0 +1,365 @@
+"""Declarative alert rule packs.
+
+A rule pack is a JSON document with code ``aliases`` and a list of ``rules``::
+
+    {"rule": "low_spo2", "type": "threshold", "codes": ["spo2"],
+     "operator": "lt", "value": 88, "severity": "critical", "message": "SpO2 below 88%"}
+
+Rule types:
+
+* ``threshold``: fires when ``value <operator> <rule value>``.
+* ``range``: fires when the value falls outside ``[min, max]`` (either bound optional).
+* ``band``: fires when the value falls inside ``[min, max]`` (either bound optional),
+  e.g. one band of a score.
+* ``delta``: fires when the rise over the previous reading of the same code
+  within ``window_minutes`` satisfies ``<operator> <rule value>``; it needs
+  history, so only AlertEngine evaluates it.
+
+Any rule may also throttle its alerts per patient (see alert_throttle):
+
+* ``suppress_minutes``: no new alert for that many minutes after the last one.
+* ``hysteresis``: once fired, the rule stays in alarm until a reading clears
+  the threshold (or range or band bound) by this band; not for delta rules.
+* ``rate_limit``: ``{"alerts": n, "per_minutes": m}`` token bucket, at most
+  ``n`` alerts in a burst refilled over ``m`` minutes.
+
+Pack-level ``defaults`` are merged into every rule (rule fields win).
+
+Messages are ``str.format`` templates over the rule fields and the match
+(``value``, ``delta``, ``baseline``...). The pack is compiled once into a dict
+keyed by normalized code, so evaluating an observation costs O(rules for
+that code). ``RulePack.evaluate_batch`` applies every rule to a whole batch
+at once, with NumPy masks when NumPy is installed.
+"""
+import json
+import operator
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:  # Optional dependency: vectorizes batch evaluation when available
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+from ..models import AlertSeverity
+
+# (index in the batch, rule, alert context extras)
+Match = Tuple[int, "CompiledRule", Dict[str, Any]]
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "alert_rules.json")
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+}
+RULE_TYPES = {"threshold", "range", "band", "delta"}
+
+
+def _compare(op: Callable[[float, float], bool], limit: float) -> Callable[[float], bool]:
+    return lambda value: op(value, limit)
+
+
+def _outside(lower: Optional[float], upper: Optional[float]) -> Callable[[float], bool]:
+    if lower is None:
+        return lambda value: value > upper
+    if upper is None:
+        return lambda value: value < lower
+    return lambda value: not lower <= value <= upper
+
+
+def _inside(lower: Optional[float], upper: Optional[float]) -> Callable[[float], bool]:
+    outside = _outside(lower, upper)
+    return lambda value: not outside(value)
+
+
+class CompiledRule:
+    """One rule with its comparator prebuilt"""
+
+    __slots__ = (
+        "rule", "kind", "codes", "severity", "message", "params", "check", "op", "limit", "window_minutes",
+        "suppress_seconds", "hysteresis", "rate_capacity", "rate_per_second",
+    )
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.rule = spec.get("rule")
+        if not self.rule:
+            raise ValueError("Alert rule without a 'rule' id")
+        self.kind = spec.get("type", "threshold")
+        if self.kind not in RULE_TYPES:
+            raise ValueError(f"Alert rule {self.rule}: unknown type {self.kind!r}")
+        self.codes = tuple(code.strip().lower() for code in spec.get("codes") or [spec.get("code", "")] if code)
+        if not self.codes:
+            raise ValueError(f"Alert rule {self.rule}: no codes")
+        try:
+            self.severity = AlertSeverity(spec.get("severity", "warning"))
+        except ValueError as exc:
+            raise ValueError(f"Alert rule {self.rule}: {exc}") from exc
+        self.message = spec.get("message") or self.rule
+        self.window_minutes: Optional[float] = None
+        self.op: Optional[Callable[[Any, Any], Any]] = None
+        self.limit: Optional[float] = None
+        self._compile_throttle(spec)
+
+        if self.kind in ("range", "band"):
+            lower, upper = spec.get("min"), spec.get("max")
+            if lower is None and upper is None:
+                raise ValueError(f"Alert rule {self.rule}: {self.kind} needs 'min' or 'max'")
+            self.params = {"min": lower, "max": upper}
+            self.check = _outside(lower, upper) if self.kind == "range" else _inside(lower, upper)
+            return
+        op = OPERATORS.get(spec.get("operator", ""))
+        if op is None or not isinstance(spec.get("value"), (int, float)):
+            raise ValueError(f"Alert rule {self.rule}: needs an operator ({', '.join(OPERATORS)}) and a numeric value")
+        self.params = {"threshold": spec["value"]}
+        self.op, self.limit = op, float(spec["value"])
+        self.check = _compare(op, self.limit)
+        if self.kind == "delta":
+            self.window_minutes = float(spec.get("window_minutes", 10))
+
+    def _compile_throttle(self, spec: Dict[str, Any]) -> None:
+        suppress = spec.get("suppress_minutes", 0)
+        hysteresis = spec.get("hysteresis")
+        rate_limit = spec.get("rate_limit")
+        if not isinstance(suppress, (int, float)) or suppress < 0:
+            raise ValueError(f"Alert rule {self.rule}: 'suppress_minutes' must be a non-negative number")
+        if hysteresis is not None:
+            if self.kind == "delta":
+                raise ValueError(f"Alert rule {self.rule}: hysteresis does not apply to delta rules")
+            if not isinstance(hysteresis, (int, float)) or hysteresis < 0:
+                raise ValueError(f"Alert rule {self.rule}: 'hysteresis' must be a non-negative number")
+            hysteresis = float(hysteresis)
+        self.suppress_seconds = float(suppress) * 60
+        self.hysteresis: Optional[float] = hysteresis
+        self.rate_capacity: Optional[float] = None
+        self.rate_per_second: Optional[float] = None
+        if rate_limit is not None:
+            alerts = rate_limit.get("alerts") if isinstance(rate_limit, dict) else None
+            minutes = rate_limit.get("per_minutes") if isinstance(rate_limit, dict) else None
+            if not isinstance(alerts, int) or alerts < 1 or not isinstance(minutes, (int, float)) or minutes <= 0:
+                raise ValueError(f"Alert rule {self.rule}: 'rate_limit' needs 'alerts' >= 1 and 'per_minutes' > 0")
+            self.rate_capacity = float(alerts)
+            self.rate_per_second = alerts / (minutes * 60)
+
+    def clears(self, value: float) -> bool:
+        """Whether ``value`` is past the hysteresis band, ending an alarm"""
+        band = self.hysteresis or 0.0
+        if self.kind == "range":
+            lower, upper = self.params["min"], self.params["max"]
+            return (lower is None or value >= lower + band) and (upper is None or value <= upper - band)
+        if self.kind == "band":
+            lower, upper = self.params["min"], self.params["max"]
+            return (lower is not None and value < lower - band) or (upper is not None and value > upper + band)
+        if self.op in (operator.lt, operator.le):
+            return value >= self.limit + band
+        return value <= self.limit - band
+
+    def match(self, value: float) -> Optional[Dict[str, Any]]:
+        """Alert context extras when a threshold, range or band rule fires on ``value``"""
+        return dict(self.params) if self.check(value) else None
+
+    def mask(self, values: "np.ndarray") -> "np.ndarray":
+        """Vectorized ``check`` over an array of values (NaN never fires)"""
+        if self.kind not in ("range", "band"):
+            return self.op(values, self.limit)
+        lower, upper = self.params["min"], self.params["max"]
+        if self.kind == "band":
+            fired = ~np.isnan(values)
+            if lower is not None:
+                fired &= values >= lower
+            if upper is not None:
+                fired &= values <= upper
+            return fired
+        fired = np.zeros(values.shape, dtype=bool)
+        if lower is not None:
+            fired |= values < lower
+        if upper is not None:
+            fired |= values > upper
+        return fired
+
+    def match_delta(self, value: float, baseline: float) -> Optional[Dict[str, Any]]:
+        delta = value - baseline
+        return {"delta": delta, "baseline": baseline} if self.check(delta) else None
+
+    def format_message(self, value: Any, extras: Dict[str, Any]) -> str:
+        fields = {"window_minutes": self.window_minutes, **self.params, **extras, "value": value}
+        try:
+            return self.message.format(**fields)
+        except (KeyError, IndexError, ValueError):
+            return self.message
+
+
+class RulePack:
+    """Compiled rule pack: normalized code -> rules for that code"""
+
+    def __init__(self, rules: Iterable[CompiledRule], aliases: Optional[Dict[str, str]] = None):
+        self.aliases = {key.strip().lower(): value.strip().lower() for key, value in (aliases or {}).items()}
+        self.rules: List[CompiledRule] = list(rules)
+        by_code: Dict[str, List[CompiledRule]] = {}
+        for rule in self.rules:
+            for code in rule.codes:
+                by_code.setdefault(self.normalize(code), []).append(rule)
+        self.by_code: Dict[str, Tuple[CompiledRule, ...]] = {code: tuple(rules) for code, rules in by_code.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RulePack":
+        defaults = data.get("defaults") or {}
+        rules = [CompiledRule({**defaults, **spec}) for spec in data.get("rules", [])]
+        seen = set()
+        for rule in rules:
+            if rule.rule in seen:
+                raise ValueError(f"Duplicate alert rule: {rule.rule}")
+            seen.add(rule.rule)
+        return cls(rules, data.get("aliases"))
+
+    @classmethod
+    def load(cls, path: str) -> "RulePack":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def normalize(self, code: str) -> str:
+        code = code.strip().lower()
+        return self.aliases.get(code, code)
+
+    def rules_for(self, code: str) -> Tuple[CompiledRule, ...]:
+        return self.by_code.get(self.normalize(code), ())
+
+    def evaluate(self, code: str, value: Optional[float]) -> List[Tuple[CompiledRule, Dict[str, Any]]]:
+        """Threshold, range and band rules firing for one reading, with their context extras"""
+        if value is None:
+            return []
+        matches = []
+        for rule in self.rules_for(code):
+            if rule.kind == "delta":
+                continue
+            extras = rule.match(value)
+            if extras is not None:
+                matches.append((rule, extras))
+        return matches
+
+    def evaluate_batch(
+        self,
+        codes: Sequence[str],
+        values: Sequence[Optional[float]],
+        timestamps: Optional[Sequence[datetime]] = None,
+        series: Optional[Sequence[Any]] = None,
+        baselines: Optional[Dict[Tuple[Any, str], Tuple[datetime, float]]] = None,
+    ) -> List[Match]:
+        """Rules firing across a batch of readings, in batch order.
+
+        Readings are grouped by normalized code and each rule is applied to
+        its whole group at once. Delta rules run only when ``timestamps`` are
+        given: every reading is compared with the previous reading of the
+        same ``series`` key (e.g. patient id) and code, or with
+        ``baselines[(key, code)]`` for the earliest one, when that reading is
+        at most ``window_minutes`` older.
+        """
+        normalized = {code: self.normalize(code) for code in set(codes)}
+        if not any(code in self.by_code for code in normalized.values()):
+            return []
+        series = series if series is not None else [None] * len(codes)
+        evaluate = _evaluate_arrays if np is not None else _evaluate_lists
+        matches = evaluate(self.by_code, normalized, codes, values, timestamps, series, baselines or {})
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+def _evaluate_arrays(by_code, normalized, codes, values, timestamps, series, baselines) -> List[Match]:
+    """evaluate_batch on NumPy columns: one boolean mask per rule and code group"""
+    code_column = np.array(codes, dtype=object)
+    value_column = np.array(values, dtype=float)  # None -> NaN, which never fires
+    series_ids: Dict[Any, int] = {}
+
+    groups: Dict[str, "np.ndarray"] = {}
+    for raw, code in normalized.items():
+        if code in by_code:
+            selected = np.flatnonzero(code_column == raw)
+            groups[code] = selected if code not in groups else np.union1d(groups[code], selected)
+
+    matches: List[Match] = []
+    for code, indices in groups.items():
+        group_values = value_column[indices]
+        for rule in by_code[code]:
+            if rule.kind != "delta":
+                fired = indices[rule.mask(group_values)]
+                matches.extend((index, rule, dict(rule.params)) for index in fired.tolist())
+                continue
+            if timestamps is None:
+                continue
+            # Only delta groups need time and series columns
+            members = indices.tolist()
+            group_stamps = np.fromiter((timestamps[index].timestamp() for index in members), dtype=float, count=len(members))
+            group_series = np.fromiter(
+                (series_ids.setdefault(series[index], len(series_ids)) for index in members), dtype=np.int64, count=len(members)
+            )
+            # Sort by (series, time) so each reading follows its predecessor
+            ranks = np.lexsort((group_stamps, group_series))
+            order = indices[ranks]
+            current, stamps, owners = value_column[order], group_stamps[ranks], group_series[ranks]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = owners[1:] != owners[:-1]
+            previous = np.empty(len(order))
+            previous_stamps = np.empty(len(order))
+            previous[1:], previous_stamps[1:] = current[:-1], stamps[:-1]
+            previous[first] = previous_stamps[first] = np.nan
+            for pos in np.flatnonzero(first).tolist():
+                baseline = baselines.get((series[order[pos]], code))
+                if baseline is not None:
+                    previous[pos], previous_stamps[pos] = baseline[1], baseline[0].timestamp()
+            gaps = stamps - previous_stamps
+            with np.errstate(invalid="ignore"):
+                hits = rule.op(current - previous, rule.limit) & (gaps > 0) & (gaps <= rule.window_minutes * 60)
+            for pos in np.flatnonzero(hits).tolist():
+                index = int(order[pos])
+                if first[pos]:
+                    baseline_at = baselines[(series[index], code)][0]
+                else:
+                    baseline_at = timestamps[int(order[pos - 1])]
+                extras = {"delta": float(current[pos] - previous[pos]), "baseline": float(previous[pos]), "baseline_at": baseline_at.isoformat()}
+                matches.append((index, rule, extras))
+    return [(int(index), rule, extras) for index, rule, extras in matches]
+
+
+def _evaluate_lists(by_code, normalized, codes, values, timestamps, series, baselines) -> List[Match]:
+    """evaluate_batch without NumPy: the same grouping, rule by rule in Python"""
+    groups: Dict[str, List[int]] = {}
+    for index, raw in enumerate(codes):
+        code = normalized[raw]
+        if code in by_code:
+            groups.setdefault(code, []).append(index)
+
+    matches: List[Match] = []
+    for code, indices in groups.items():
+        for rule in by_code[code]:
+            if rule.kind != "delta":
+                matches.extend(
+                    (index, rule, dict(rule.params))
+                    for index in indices
+                    if values[index] is not None and rule.check(values[index])
+                )
+                continue
+            if timestamps is None:
+                continue
+            window = rule.window_minutes * 60
+            previous: Dict[Any, Tuple[datetime, Optional[float]]] = {}
+            for index in sorted(indices, key=lambda index: timestamps[index]):
+                key, value, stamp = series[index], values[index], timestamps[index]
+                last = previous.get(key) or baselines.get((key, code))
+                previous[key] = (stamp, value)
+                if last is None or value is None or last[1] is None:
+                    continue
+                if 0 < (stamp - last[0]).total_seconds() <= window and rule.check(value - last[1]):
+                    matches.append((index, rule, {"delta": value - last[1], "baseline": last[1], "baseline_at": last[0].isoformat()}))
+    return matches
+
+
+@lru_cache(maxsize=None)
+def load_rule_pack(path: Optional[str] = None) -> RulePack:
+    """The compiled pack at ``path`` (default: the bundled alert_rules.json), cached per path"""
+    return RulePack.load(path or DEFAULT_RULES_PATH)
+
+
+__all__ = ["CompiledRule", "DEFAULT_RULES_PATH", "OPERATORS", "RulePack", "load_rule_pack"]
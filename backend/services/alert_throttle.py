@@ -0,0 +1,94 @@
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from .alert_rules import CompiledRule
+
+# Why a matching reading did not raise an alert, in the order they are checked
+SUPPRESSION_REASONS = ("hysteresis", "active", "window", "rate_limit")
+
+
+class _RuleState:
+    __slots__ = ("in_alarm", "last_emitted", "tokens", "refilled_at")
+
+    def __init__(self) -> None:
+        self.in_alarm = False
+        self.last_emitted: Optional[float] = None
+        self.tokens: Optional[float] = None
+        self.refilled_at = 0.0
+
+
+class AlertThrottle:
+    """Per (patient, rule) suppression state, kept in memory only.
+
+    ``admit`` decides whether a match becomes an alert: not while a
+    hysteresis alarm is still on, not while an alert for the rule is active,
+    not inside the rule's suppression window and not beyond its token
+    bucket. Time is the observation's ``effective_at``, so a backlog
+    replays the same way it would have live.
+    """
+
+    def __init__(self) -> None:
+        self._state: Dict[Tuple[str, str], _RuleState] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def in_alarm(self, patient_id: str, rule: str) -> bool:
+        with self._lock:
+            state = self._state.get((patient_id, rule))
+            return state is not None and state.in_alarm
+
+    def clear(self, patient_id: str, rule: str) -> None:
+        """End a hysteresis alarm: the next match may alert again"""
+        with self._lock:
+            state = self._state.get((patient_id, rule))
+            if state is not None:
+                state.in_alarm = False
+
+    def admit(self, patient_id: str, rule: CompiledRule, at: datetime, active: bool) -> bool:
+        ts = at.timestamp()
+        with self._lock:
+            state = self._state.get((patient_id, rule.rule))
+            if state is None:
+                state = self._state[(patient_id, rule.rule)] = _RuleState()
+            reason = None
+            if rule.hysteresis is not None:
+                if state.in_alarm:
+                    reason = "hysteresis"
+                state.in_alarm = True
+            if reason is None and active:
+                reason = "active"
+            if (
+                reason is None and rule.suppress_seconds and state.last_emitted is not None
+                and ts - state.last_emitted < rule.suppress_seconds
+            ):
+                reason = "window"
+            if reason is None and rule.rate_capacity is not None:
+                if state.tokens is None:
+                    state.tokens = rule.rate_capacity
+                elif ts > state.refilled_at:
+                    state.tokens = min(rule.rate_capacity, state.tokens + (ts - state.refilled_at) * rule.rate_per_second)
+                state.refilled_at = max(state.refilled_at, ts)
+                if state.tokens < 1:
+                    reason = "rate_limit"
+                else:
+                    state.tokens -= 1
+
+            counters = self._counters.get(rule.rule)
+            if counters is None:
+                counters = self._counters[rule.rule] = dict.fromkeys(("emitted", "suppressed", *SUPPRESSION_REASONS), 0)
+            if reason is not None:
+                counters["suppressed"] += 1
+                counters[reason] += 1
+                return False
+            counters["emitted"] += 1
+            state.last_emitted = ts if state.last_emitted is None else max(state.last_emitted, ts)
+            return True
+
+    def counters(self) -> Dict[str, Dict[str, int]]:
+        """Per rule: alerts emitted, suppressed, and suppressed per reason"""
+        with self._lock:
+            return {rule: dict(counts) for rule, counts in self._counters.items()}
+
+
+__all__ = ["AlertThrottle", "SUPPRESSION_REASONS"]
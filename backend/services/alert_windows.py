@@ -0,0 +1,77 @@
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# (timestamp, value, effective_at)
+Point = Tuple[float, float, datetime]
+
+
+class SlidingWindow:
+    """Recent readings of one series, oldest first.
+
+    Bounded twice: readings more than ``horizon`` seconds older than the
+    newest one are evicted, and at most ``max_points`` are kept. Readings
+    usually arrive in order, so pushes and lookups touch only the newest end.
+    """
+
+    __slots__ = ("horizon", "max_points", "points")
+
+    def __init__(self, horizon: float, max_points: int):
+        self.horizon = horizon
+        self.max_points = max_points
+        self.points: Deque[Point] = deque()
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def push(self, effective_at: datetime, value: float) -> None:
+        point = (effective_at.timestamp(), value, effective_at)
+        points = self.points
+        if not points or point[0] >= points[-1][0]:
+            points.append(point)
+        else:
+            # Late arrival: insert in order, scanning back from the newest reading
+            idx = len(points)
+            while idx and points[idx - 1][0] > point[0]:
+                idx -= 1
+            points.insert(idx, point)
+        newest = points[-1][0]
+        while len(points) > self.max_points or points[0][0] < newest - self.horizon:
+            points.popleft()
+
+    def previous(self, before: datetime) -> Optional[Point]:
+        """The newest reading strictly older than ``before``"""
+        ts = before.timestamp()
+        for point in reversed(self.points):
+            if point[0] < ts:
+                return point
+        return None
+
+
+class WindowStore:
+    """Sliding windows keyed by (patient_id, code), safe to share between threads"""
+
+    def __init__(self, horizon: float, max_points: int = 512):
+        self.horizon = horizon
+        self.max_points = max_points
+        self._windows: Dict[Tuple[Any, str], SlidingWindow] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def push(self, key: Tuple[Any, str], effective_at: datetime, value: float) -> None:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = SlidingWindow(self.horizon, self.max_points)
+            window.push(effective_at, value)
+
+    def previous(self, key: Tuple[Any, str], before: datetime) -> Optional[Point]:
+        with self._lock:
+            window = self._windows.get(key)
+            return window.previous(before) if window is not None else None
+
+
+__all__ = ["SlidingWindow", "WindowStore"]
@@ -0,0 +1,131 @@
+"""NEWS2-style early-warning score kept current per patient from the latest vitals.
+
+Each component reading is turned into NEWS2 points as it arrives and the
+latest points per (patient, component) are held in memory, so a new reading
+rescores the patient from that state instead of re-reading stored
+observations. A score needs every REQUIRED component observed within
+``max_age``; consciousness and supplemental oxygen default to alert / room
+air when not recorded. Scores are emitted as ``news2`` observations, and
+alerts on score bands come from ordinary rules on that code.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..models import Observation
+
+SCORE_CODE = "news2"
+REQUIRED = ("respiratory_rate", "spo2", "temperature", "systolic_bp", "heart_rate")
+COMPONENTS = REQUIRED + ("consciousness", "supplemental_oxygen")
+
+# Ascending (inclusive upper bound, points); the last band is open-ended
+SCORE_BANDS: Dict[str, Tuple[Tuple[Optional[float], int], ...]] = {
+    "respiratory_rate": ((8, 3), (11, 1), (20, 0), (24, 2), (None, 3)),
+    "spo2": ((91, 3), (93, 2), (95, 1), (None, 0)),  # SpO2 scale 1
+    "temperature": ((35.0, 3), (36.0, 1), (38.0, 0), (39.0, 1), (None, 2)),
+    "systolic_bp": ((90, 3), (100, 2), (110, 1), (219, 0), (None, 3)),
+    "heart_rate": ((40, 3), (50, 1), (90, 0), (110, 1), (130, 2), (None, 3)),
+}
+_CONSCIOUSNESS = {"a": 0, "c": 3, "v": 3, "p": 3, "u": 3}
+_YES = {"1", "true", "yes", "y", "o2", "oxygen"}
+_NO = {"0", "false", "no", "n", "air", "room air"}
+
+
+def component_points(component: str, value: Any, unit: Optional[str] = None) -> Optional[int]:
+    """NEWS2 points for one reading, or None when the value cannot be scored"""
+    if component == "consciousness":
+        text = str(value).strip().lower()
+        return _CONSCIOUSNESS.get(text[:1]) if text else None
+    if component == "supplemental_oxygen":
+        text = str(value).strip().lower()
+        if text in _YES:
+            return 2
+        return 0 if text in _NO else None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if component == "temperature" and (unit or "").lower() == "f":
+        number = (number - 32) * 5 / 9
+    for upper, points in SCORE_BANDS[component]:
+        if upper is None or number <= upper:
+            return points
+    return None
+
+
+class EarlyWarningScorer:
+    """Latest NEWS2 points per (patient, component), rescored on every new reading"""
+
+    def __init__(self, normalize: Callable[[str], str], max_age: timedelta = timedelta(hours=12)):
+        self.normalize = normalize
+        self.max_age = max_age
+        self._latest: Dict[str, Dict[str, Tuple[datetime, int]]] = {}
+        self._lock = threading.Lock()
+
+    def component(self, code: str) -> Optional[str]:
+        component = self.normalize(code)
+        return component if component in COMPONENTS else None
+
+    def update(self, observation: Observation) -> bool:
+        """Keep a reading if it is the newest scorable one of its component"""
+        component = self.component(observation.code)
+        if component is None:
+            return False
+        points = component_points(component, observation.value, observation.unit)
+        if points is None:
+            return False
+        with self._lock:
+            latest = self._latest.setdefault(observation.patient_id, {})
+            known = latest.get(component)
+            if known is not None and known[0] > observation.effective_at:
+                return False
+            latest[component] = (observation.effective_at, points)
+            return True
+
+    def score(self, patient_id: str, at: datetime) -> Optional[Tuple[int, Dict[str, int]]]:
+        """Total and per-component points as of ``at``, if every required component is recent"""
+        with self._lock:
+            latest = dict(self._latest.get(patient_id, {}))
+        breakdown: Dict[str, int] = {}
+        for component in COMPONENTS:
+            known = latest.get(component)
+            if known is None or at - known[0] > self.max_age:
+                if component in REQUIRED:
+                    return None
+                continue
+            breakdown[component] = known[1]
+        return sum(breakdown.values()), breakdown
+
+    def observe(self, observations: List[Observation]) -> List[Observation]:
+        """Fold a batch into the state; one derived score per (patient, time) that changed it"""
+        readings = sorted(
+            (observation for observation in observations if self.component(observation.code) is not None),
+            key=lambda observation: (observation.patient_id, observation.effective_at),
+        )
+        derived: List[Observation] = []
+        idx = 0
+        while idx < len(readings):
+            # Readings taken together (one vitals round) are scored once
+            patient_id, at = readings[idx].patient_id, readings[idx].effective_at
+            changed = False
+            while idx < len(readings) and (readings[idx].patient_id, readings[idx].effective_at) == (patient_id, at):
+                changed = self.update(readings[idx]) or changed
+                idx += 1
+            scored = self.score(patient_id, at) if changed else None
+            if scored is not None:
+                derived.append(Observation(
+                    patient_id=patient_id,
+                    code=SCORE_CODE,
+                    value=scored[0],
+                    unit="score",
+                    effective_at=at,
+                    source=SCORE_CODE,
+                ))
+        return derived
+
+    def codes(self, aliases: Dict[str, str]) -> List[str]:
+        """Stored codes that feed the score, aliases included"""
+        return sorted(set(COMPONENTS) | {alias for alias, code in aliases.items() if code in COMPONENTS})
+
+
+__all__ = ["COMPONENTS", "EarlyWarningScorer", "REQUIRED", "SCORE_BANDS", "SCORE_CODE", "component_points"]
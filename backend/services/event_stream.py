@@ -0,0 +1,139 @@
+"""In-process pub/sub behind the ``GET /stream`` Server-Sent Events endpoint.
+
+Publishers (AlertEngine, SimpleDatabase) call ``EventBroker.publish`` with an
+audience, the patient id for alerts and the recipient user id for
+notifications. The broker files each event under ``<namespace>:<audience>``
+(``patient:`` for alert events, ``user:`` for notifications), so a patient's
+alerts and their private notifications never share a key. Subscribers
+register the keys they may see (see ``audience_key``) and receive matching
+events on an asyncio queue, so fan-out costs O(interested subscribers) per
+event.
+
+Event ids are ``<boot>-<seq>``. A reconnecting client sends its last id and
+gets the events it missed from a bounded history; when they are no longer
+there (history overflowed, server restarted, client too slow) it gets a
+``resync`` event and should reload its views.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Event kind -> namespace of its audience key
+AUDIENCE_NAMESPACES = {"alert": "patient", "alert_status": "patient", "notification": "user"}
+
+
+def audience_key(namespace: str, audience: str) -> str:
+    """Subscription key for a patient's alert events (``"patient"``) or a user's notifications (``"user"``)"""
+    return f"{namespace}:{audience}"
+
+
+class StreamEvent(NamedTuple):
+    id: str
+    kind: str
+    audience: Optional[str]
+    data: Dict[str, Any]
+
+    def encode(self) -> str:
+        """One SSE frame"""
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class Subscription:
+    """One client's queue; filled from publisher threads via the event loop"""
+
+    def __init__(self, keys: Set[str], loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.keys = keys
+        self.loop = loop
+        self.queue: "asyncio.Queue[StreamEvent]" = asyncio.Queue(maxsize)
+
+    def offer(self, event: StreamEvent, resync: StreamEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client fell behind: drop what it has not read and make it reload
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(resync)
+
+    async def get(self) -> StreamEvent:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """Thread-safe publisher with a bounded replay history"""
+
+    def __init__(self, history: int = 1024, queue_size: int = 256):
+        self.boot = str(int(time.time()))
+        self.queue_size = queue_size
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._history: Deque[Tuple[int, StreamEvent]] = deque(maxlen=history)
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, kind: str, audience: Optional[str], data: Dict[str, Any]) -> StreamEvent:
+        key = audience_key(AUDIENCE_NAMESPACES.get(kind, kind), audience) if audience is not None else None
+        with self._lock:
+            seq = self._last_seq = next(self._seq)
+            event = StreamEvent(f"{self.boot}-{seq}", kind, key, data)
+            self._history.append((seq, event))
+            # Scheduled under the lock so every subscriber sees events in id order
+            closed = []
+            for subscription in self._subscribers.get(key, ()):
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.offer, event, self._resync(seq))
+                except RuntimeError:
+                    # Its event loop is gone; the publisher's write already succeeded
+                    closed.append(subscription)
+            for subscription in closed:
+                self._unsubscribe(subscription)
+        return event
+
+    def subscribe(
+        self, keys: Iterable[str], last_event_id: Optional[str] = None
+    ) -> Tuple[Subscription, List[StreamEvent]]:
+        """Register for ``keys``; returns the subscription and the events to replay first.
+
+        Must be called from the event loop that will read the subscription.
+        """
+        subscription = Subscription(set(keys), asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+            backlog = self._backlog(subscription.keys, last_event_id)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._unsubscribe(subscription)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+    def _backlog(self, keys: Set[str], last_event_id: Optional[str]) -> List[StreamEvent]:
+        if not last_event_id:
+            return []
+        boot, _, seq = last_event_id.partition("-")
+        oldest = self._history[0][0] if self._history else self._last_seq + 1
+        if boot != self.boot or not seq.isdigit() or int(seq) > self._last_seq or int(seq) + 1 < oldest:
+            return [self._resync(self._last_seq)]
+        return [event for event_seq, event in self._history if event_seq > int(seq) and event.audience in keys]
+
+    def _resync(self, seq: int) -> StreamEvent:
+        return StreamEvent(f"{self.boot}-{seq}", "resync", None, {})
+
+
+__all__ = ["AUDIENCE_NAMESPACES", "EventBroker", "StreamEvent", "Subscription", "audience_key"]
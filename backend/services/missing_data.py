@@ -0,0 +1,75 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class MissingDataSchedule:
+    """Min-heap of "next observation due" deadlines for patients with a care plan.
+
+    Each tracked patient has one live deadline (last observation + ``grace``)
+    in ``_due``; rescheduling pushes a new heap entry and older entries are
+    skipped when they surface, so every update is O(log n).
+    """
+
+    def __init__(self, grace: timedelta):
+        self.grace = grace
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+        self._tracked: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def track(self, patient_id: str, last_observed_at: Optional[datetime]) -> None:
+        """Start watching a patient; without observations there is nothing to miss yet"""
+        with self._lock:
+            self._tracked.add(patient_id)
+            if last_observed_at is not None:
+                self._schedule(patient_id, (last_observed_at + self.grace).timestamp())
+
+    def observed(self, patient_id: str, observed_at: datetime) -> None:
+        """Push a tracked patient's deadline past a new observation"""
+        with self._lock:
+            if patient_id not in self._tracked:
+                return
+            deadline = (observed_at + self.grace).timestamp()
+            if deadline > self._due.get(patient_id, float("-inf")):
+                self._schedule(patient_id, deadline)
+
+    def pop_due(self, now: datetime) -> List[str]:
+        """Patients whose deadline is at or before ``now``; they stay unscheduled until observed"""
+        ts = now.timestamp()
+        due: List[str] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= ts:
+                deadline, patient_id = heapq.heappop(self._heap)
+                if self._due.get(patient_id) == deadline:
+                    del self._due[patient_id]
+                    due.append(patient_id)
+        return due
+
+    def retry(self, patient_ids: List[str], at: datetime) -> None:
+        """Reschedule popped patients whose sweep failed, unless observed since"""
+        with self._lock:
+            for patient_id in patient_ids:
+                if patient_id in self._tracked and patient_id not in self._due:
+                    self._schedule(patient_id, at.timestamp())
+
+    def next_deadline(self) -> Optional[datetime]:
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return datetime.fromtimestamp(self._heap[0][0]) if self._heap else None
+
+    def _schedule(self, patient_id: str, deadline: float) -> None:
+        self._due[patient_id] = deadline
+        heapq.heappush(self._heap, (deadline, patient_id))
+        if len(self._heap) > 2 * len(self._due) + 64:
+            # Frequent observers leave a trail of stale entries; rebuild from the live ones
+            self._heap = [(due, patient) for patient, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+
+__all__ = ["MissingDataSchedule"]
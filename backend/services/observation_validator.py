@@ -15,6 +15,12 @@ ALLOWED_UNITS: dict[str, set[str]] = {
     "glucose": {"mg/dl", "mmol/l"},
     "weight": {"kg", "lb"},
     "temperature": {"c", "f"},
+    "respiratory_rate": {"/min"},
+    "rr": {"/min"},
+    "resp_rate": {"/min"},
+    "systolic_bp": {"mmhg"},
+    "sbp": {"mmhg"},
+    "bp_systolic": {"mmhg"},
 }
 
 VALUE_LIMITS: dict[str, tuple[float | None, float | None]] = {
@@ -25,6 +31,12 @@ VALUE_LIMITS: dict[str, tuple[float | None, float | None]] = {
     "glucose": (20, 800),
     "temperature": (30, 45),
     "weight": (1, 500),
+    "respiratory_rate": (0, 80),
+    "rr": (0, 80),
+    "resp_rate": (0, 80),
+    "systolic_bp": (30, 300),
+    "sbp": (30, 300),
+    "bp_systolic": (30, 300),
 }
 
 
@@ -0,0 +1 @@
+"Alternative storage engines behind the SimpleDatabase interface."
@@ -0,0 +1,59 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from ..database import SimpleDatabase
+
+T = TypeVar("T")
+
+
+class AsyncDatabase:
+    """Awaitable facade over a SimpleDatabase.
+
+    ``await adb.get_user_by_id(...)`` runs ``db.get_user_by_id(...)`` on a
+    bounded thread pool so file and SQLite I/O never blocks the event loop.
+    Every public method of the wrapped database is exposed this way; ``run``
+    offloads any other blocking callable (e.g. the alert engine) the same way.
+    With ``max_workers=0`` calls run inline on the loop, as they did before.
+    """
+
+    def __init__(self, database: "SimpleDatabase", max_workers: int = 8):
+        if max_workers < 0:
+            raise ValueError("max_workers must be >= 0")
+        self.database = database
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-io") if max_workers else None
+        )
+        self._methods: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._executor is None:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = self._methods.get(name)
+        if method is None:
+            target = getattr(self.database, name)
+            if not callable(target):
+                raise AttributeError(f"{name} is not a database method")
+
+            @functools.wraps(target)
+            async def method(*args: Any, **kwargs: Any) -> Any:
+                return await self.run(target, *args, **kwargs)
+
+            self._methods[name] = method
+        return method
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+__all__ = ["AsyncDatabase"]
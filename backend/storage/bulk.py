@@ -0,0 +1,210 @@
+"""Streaming NDJSON import/export for the data store.
+
+    python -m backend.storage.bulk export users > users.ndjson
+    python -m backend.storage.bulk import clinical_records records.ndjson [--batch-size 1000]
+    python -m backend.storage.bulk migrate-events --to orm
+
+Rows are streamed one line at a time and written in batches, so memory stays
+bounded by ``--batch-size`` rather than the size of the file; a JSON store
+appends the batches to the collection's log and folds it into the snapshot
+once at the end. Imports skip rows whose id is already stored, which makes an
+interrupted import safe to re-run, and stop at the first invalid line with its
+number and the reason. ``migrate-events`` copies observations and alerts between the JSON
+store and the SQLAlchemy tables (``EVENTS_BACKEND`` json <-> orm).
+"""
+import argparse
+import json
+import sys
+from itertools import islice
+from typing import Callable, Dict, IO, Iterable, Iterator, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from ..config import Settings, get_settings
+from ..database import SimpleDatabase, create_database
+from ..models import Alert, ClinicalRecord, Observation, User
+
+# collection -> (model, data file attribute, import method)
+COLLECTIONS: Dict[str, Tuple[Type[BaseModel], str, str]] = {
+    "users": (User, "users_file", "import_users"),
+    "clinical_records": (ClinicalRecord, "records_file", "import_clinical_records"),
+    "observations": (Observation, "observations_file", "import_observations"),
+    "alerts": (Alert, "alerts_file", "import_alerts"),
+}
+EVENT_COLLECTIONS = ("observations", "alerts")
+
+Progress = Callable[[str, int, int], None]
+
+
+def _collection(name: str) -> Tuple[Type[BaseModel], str, str]:
+    if name not in COLLECTIONS:
+        raise ValueError(f"Unknown collection: {name}")
+    return COLLECTIONS[name]
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def export_rows(database: SimpleDatabase, collection: str) -> Iterator[dict]:
+    """Stream every row of ``collection``"""
+    _, file_attr, _ = _collection(collection)
+    if collection in EVENT_COLLECTIONS and database.events is not None:
+        items = getattr(database.events, f"iter_{collection}")()
+        return (item.dict() for item in items)
+    return database._iter_rows(getattr(database, file_attr))
+
+
+def _import(
+    database: SimpleDatabase,
+    collection: str,
+    rows: Iterable[Tuple[int, dict]],
+    label: str,
+    batch_size: int,
+    progress: Optional[Progress],
+) -> Tuple[int, int]:
+    model, _, method = _collection(collection)
+    insert = getattr(database, method)
+    written = skipped = 0
+    with database.bulk_appends():
+        for batch in _batches(rows, batch_size):
+            items = []
+            for number, row in batch:
+                try:
+                    items.append(model(**row))
+                except (TypeError, ValidationError) as exc:
+                    raise ValueError(f"Invalid {collection} {label} {number}: {_reason(exc)}") from exc
+            count = insert(items)
+            written += count
+            skipped += len(batch) - count
+            if progress is not None:
+                progress(collection, written, skipped)
+    return written, skipped
+
+
+def _reason(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+        )
+    return str(exc)
+
+
+def import_rows(
+    database: SimpleDatabase,
+    collection: str,
+    rows: Iterable[dict],
+    batch_size: int = 1000,
+    progress: Optional[Progress] = None,
+) -> Tuple[int, int]:
+    """Validate and insert ``rows`` batch by batch; returns (written, skipped)"""
+    return _import(database, collection, enumerate(rows, 1), "row", batch_size, progress)
+
+
+def import_ndjson(
+    database: SimpleDatabase,
+    collection: str,
+    source: IO[str],
+    batch_size: int = 1000,
+    progress: Optional[Progress] = None,
+) -> Tuple[int, int]:
+    """import_rows over NDJSON lines; errors name the offending line"""
+    return _import(database, collection, _numbered_ndjson(source), "line", batch_size, progress)
+
+
+def export_ndjson(database: SimpleDatabase, collection: str, out: IO[str], progress: Optional[Progress] = None) -> int:
+    count = 0
+    for row in export_rows(database, collection):
+        out.write(json.dumps(row, default=str) + "\n")
+        count += 1
+        if progress is not None and count % 1000 == 0:
+            progress(collection, count, 0)
+    return count
+
+
+def _numbered_ndjson(source: IO[str]) -> Iterator[Tuple[int, dict]]:
+    for number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"Invalid JSON on line {number}: {exc}") from exc
+        if not isinstance(row, dict):
+            raise ValueError(f"Invalid JSON on line {number}: expected an object")
+        yield number, row
+
+
+def read_ndjson(source: IO[str]) -> Iterator[dict]:
+    return (row for _, row in _numbered_ndjson(source))
+
+
+def migrate_events(
+    settings: Settings, to: str, batch_size: int = 1000, progress: Optional[Progress] = None
+) -> Dict[str, Tuple[int, int]]:
+    """Copy observations and alerts from the other events backend into ``to``"""
+    if to not in ("json", "orm"):
+        raise ValueError(f"Unknown events backend: {to}")
+    source = create_database(settings.model_copy(update={"events_backend": "json" if to == "orm" else "orm"}))
+    target = create_database(settings.model_copy(update={"events_backend": to}))
+    try:
+        return {
+            collection: import_rows(target, collection, export_rows(source, collection), batch_size, progress)
+            for collection in EVENT_COLLECTIONS
+        }
+    finally:
+        source.close()
+        target.close()
+
+
+def _report(collection: str, written: int, skipped: int):
+    print(f"\r{collection}: {written} written, {skipped} skipped", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream data store collections to and from NDJSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write a collection as NDJSON")
+    export.add_argument("collection", choices=list(COLLECTIONS))
+    export.add_argument("path", nargs="?", default="-", help="output file (default: stdout)")
+    load = commands.add_parser("import", help="insert NDJSON rows, skipping ids already stored")
+    load.add_argument("collection", choices=list(COLLECTIONS))
+    load.add_argument("path", nargs="?", default="-", help="input file (default: stdin)")
+    load.add_argument("--batch-size", type=int, default=1000)
+    migrate = commands.add_parser("migrate-events", help="copy observations and alerts between events backends")
+    migrate.add_argument("--to", required=True, choices=["json", "orm"])
+    migrate.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    if args.command == "migrate-events":
+        for collection, (written, skipped) in migrate_events(settings, args.to, args.batch_size, _report).items():
+            print(f"\r{collection}: {written} written, {skipped} skipped", file=sys.stderr)
+        return
+
+    database = create_database(settings)
+    try:
+        if args.command == "export":
+            if args.path == "-":
+                count = export_ndjson(database, args.collection, sys.stdout, _report)
+            else:
+                with open(args.path, "w") as out:
+                    count = export_ndjson(database, args.collection, out, _report)
+            print(f"\r{args.collection}: {count} exported", file=sys.stderr)
+        else:
+            source = sys.stdin if args.path == "-" else open(args.path, "r")
+            try:
+                with source:
+                    written, skipped = import_ndjson(database, args.collection, source, args.batch_size, _report)
+            except ValueError as exc:
+                # Earlier batches are stored; fix the line and re-run to resume
+                parser.exit(1, f"\n{exc}\n")
+            print(f"\r{args.collection}: {written} written, {skipped} skipped", file=sys.stderr)
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
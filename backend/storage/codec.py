@@ -0,0 +1,51 @@
+import json
+from typing import IO, Any, Dict, List, Optional, Tuple, Type
+
+try:  # Optional dependency: only needed for STORAGE_FORMAT=msgpack
+    import msgpack
+except ImportError:  # pragma: no cover - exercised when msgpack is absent
+    msgpack = None
+
+
+class JsonCodec:
+    """Human-readable JSON arrays (the historical on-disk format)"""
+
+    name = "json"
+    suffix = ".json"
+    errors: Tuple[Type[BaseException], ...] = (ValueError,)
+
+    def dump(self, rows: List[dict], f: IO[bytes], indent: Optional[int] = 2):
+        f.write(json.dumps(rows, indent=indent, default=str).encode())
+
+    def load(self, f: IO[bytes]) -> List[dict]:
+        return json.loads(f.read())
+
+
+class MsgpackCodec:
+    """Compact binary encoding: smaller files and faster parsing than indented JSON"""
+
+    name = "msgpack"
+    suffix = ".msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ValueError("STORAGE_FORMAT=msgpack requires the msgpack package (pip install msgpack)")
+        self.errors: Tuple[Type[BaseException], ...] = (ValueError, msgpack.UnpackException)
+
+    def dump(self, rows: List[dict], f: IO[bytes], indent: Optional[int] = None):
+        f.write(msgpack.packb(rows, default=str, use_bin_type=True))
+
+    def load(self, f: IO[bytes]) -> List[Any]:
+        return msgpack.unpackb(f.read(), raw=False)
+
+
+CODECS: Dict[str, Type] = {"json": JsonCodec, "msgpack": MsgpackCodec}
+
+
+def get_codec(name: str):
+    if name not in CODECS:
+        raise ValueError(f"Unknown storage format: {name}")
+    return CODECS[name]()
+
+
+__all__ = ["CODECS", "JsonCodec", "MsgpackCodec", "get_codec", "msgpack"]
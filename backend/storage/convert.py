@@ -0,0 +1,47 @@
+"""Convert a SimpleDatabase data dir between snapshot formats.
+
+    python -m backend.storage.convert --data-dir data --to msgpack [--from json] [--remove]
+
+Pending ``.log`` records of the source are folded in first. Source files are
+kept unless ``--remove`` is given; point ``STORAGE_FORMAT`` at the target
+format afterwards.
+"""
+import argparse
+import os
+from typing import Dict
+
+from ..database import SimpleDatabase
+
+
+def convert(data_dir: str, source: str, target: str, remove: bool = False) -> Dict[str, int]:
+    """Rewrite every collection of ``data_dir`` from ``source`` to ``target``; returns row counts"""
+    if source == target:
+        raise ValueError("Source and target formats are the same")
+    # Log mode so snapshots are read together with any un-compacted appends
+    src = SimpleDatabase(data_dir=data_dir, storage_mode="log", storage_format=source)
+    src.close()
+    dst = SimpleDatabase(data_dir=data_dir, storage_format=target)
+    counts: Dict[str, int] = {}
+    for src_file, dst_file in zip(src.data_files, dst.data_files):
+        with src._locked(src_file), dst._locked(dst_file):
+            rows = src._load_json(src_file)
+            dst._save_json(dst_file, rows, indent=None)
+        counts[os.path.basename(dst_file)] = len(rows)
+        if remove:
+            os.remove(src_file)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the data dir between JSON and msgpack snapshots")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--from", dest="source", default="json", choices=["json", "msgpack"])
+    parser.add_argument("--to", dest="target", required=True, choices=["json", "msgpack"])
+    parser.add_argument("--remove", action="store_true", help="delete the source files after converting")
+    args = parser.parse_args()
+    for name, count in convert(args.data_dir, args.source, args.target, remove=args.remove).items():
+        print(f"{name}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
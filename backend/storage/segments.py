@@ -0,0 +1,271 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+MANIFEST = "index.json"
+_SEGMENT_NAME = re.compile(r"^seg-(\d{6})\.ndjson(\.gz)?$")
+
+
+def _to_timestamp(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _atomic_write(path: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Segment:
+    """Index entry for one segment: row count, time range and key values"""
+
+    __slots__ = ("name", "count", "start", "end", "keys")
+
+    def __init__(self, name: str, index_fields: Sequence[str]):
+        self.name = name
+        self.count = 0
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.keys: Dict[str, set] = {field: set() for field in index_fields}
+
+    def add(self, row: dict, ts: Optional[float]):
+        self.count += 1
+        if ts is not None:
+            self.start = ts if self.start is None else min(self.start, ts)
+            self.end = ts if self.end is None else max(self.end, ts)
+        for field, values in self.keys.items():
+            if row.get(field) is not None:
+                values.add(row[field])
+
+    def may_contain(self, start: Optional[float], end: Optional[float], filters: Dict[str, Any]) -> bool:
+        if not self.count:
+            return False
+        if start is not None and self.end is not None and self.end < start:
+            return False
+        if end is not None and self.start is not None and self.start > end:
+            return False
+        return all(value in self.keys[field] for field, value in filters.items() if field in self.keys)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "count": self.count,
+            "start": self.start,
+            "end": self.end,
+            "keys": {field: sorted(values) for field, values in self.keys.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, index_fields: Sequence[str]) -> "Segment":
+        segment = cls(data["name"], index_fields)
+        segment.count = data.get("count", 0)
+        segment.start = data.get("start")
+        segment.end = data.get("end")
+        for field in index_fields:
+            segment.keys[field] = set(data.get("keys", {}).get(field, ()))
+        return segment
+
+
+class SegmentedLog:
+    """Append-only NDJSON event log split into rotating segment files.
+
+    Rows are appended to the active ``seg-NNNNNN.ndjson`` file, so an append
+    costs O(batch) regardless of history size. Once the active segment
+    reaches ``max_bytes`` or is older than ``max_age`` seconds it is sealed:
+    its index entry (time range of ``time_field`` and the values seen for
+    each of ``index_fields``) is recorded in ``index.json`` and the file is
+    gzipped when ``compress`` is set. Queries only open segments whose index
+    entry can match.
+
+    Index refreshes, appends and rotations share an internal lock, so
+    queries may run alongside appends from other threads; readers also pick
+    up segments rotated or rows appended by other processes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        time_field: str,
+        index_fields: Sequence[str] = (),
+        max_bytes: int = 1 << 20,
+        max_age: float = 86400.0,
+        compress: bool = True,
+    ):
+        self.directory = directory
+        self.time_field = time_field
+        self.index_fields = tuple(index_fields)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+        self._manifest_stamp: Optional[tuple] = None
+        self._sealed: List[Segment] = []
+        self._active: Optional[Segment] = None
+        self._active_offset = 0
+        self._lock = threading.RLock()
+        self._refresh()
+
+    @property
+    def segments(self) -> List[Segment]:
+        with self._lock:
+            self._refresh()
+            return list(self._sealed) + ([self._active] if self._active.count else [])
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # Index maintenance (callers hold self._lock)
+    def _refresh(self):
+        manifest_path = self._path(MANIFEST)
+        try:
+            stat = os.stat(manifest_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._manifest_stamp or self._active is None:
+            self._manifest_stamp = stamp
+            self._sealed = []
+            if stamp is not None:
+                with open(manifest_path, "r") as f:
+                    data = json.load(f)
+                self._sealed = [Segment.from_dict(item, self.index_fields) for item in data.get("segments", [])]
+            self._open_active()
+        self._scan_active()
+
+    def _open_active(self):
+        sealed = {segment.name for segment in self._sealed}
+        last = 0
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_NAME.match(name)
+            if not match:
+                continue
+            if match.group(2) is None and name + ".gz" in sealed:
+                # Left behind by a rotation that crashed after compressing
+                os.remove(self._path(name))
+            last = max(last, int(match.group(1)))
+        name = f"seg-{last:06d}.ndjson"
+        if last == 0 or name in sealed or name + ".gz" in sealed:
+            name = f"seg-{last + 1:06d}.ndjson"
+        if self._active is None or self._active.name != name:
+            self._active = Segment(name, self.index_fields)
+            self._active_offset = 0
+
+    def _scan_active(self):
+        """Index rows appended to the active segment since the last scan"""
+        try:
+            f = open(self._path(self._active.name), "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self._active_offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                row = json.loads(line)
+                self._active.add(row, _to_timestamp(row.get(self.time_field)))
+        self._active_offset += end
+
+    def _save_manifest(self):
+        payload = json.dumps({"segments": [segment.to_dict() for segment in self._sealed]}).encode()
+        _atomic_write(self._path(MANIFEST), payload)
+        stat = os.stat(self._path(MANIFEST))
+        self._manifest_stamp = (stat.st_mtime_ns, stat.st_size)
+
+    # Writes
+    def append(self, rows: Iterable[dict]):
+        rows = list(rows)
+        if not rows:
+            return
+        payload = "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+        with self._lock:
+            self._refresh()
+            if self._active.count and (
+                self._active_offset >= self.max_bytes
+                or (self._active.start is not None and time.time() - self._active.start > self.max_age)
+            ):
+                self.rotate()
+            with open(self._path(self._active.name), "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._scan_active()
+
+    def rotate(self):
+        """Seal the active segment (compressing it if enabled) and start a new one"""
+        with self._lock:
+            self._refresh()
+            segment = self._active
+            if not segment.count:
+                return
+            path = self._path(segment.name)
+            if self.compress:
+                with open(path, "rb") as f:
+                    _atomic_write(path + ".gz", gzip.compress(f.read()))
+                segment.name += ".gz"
+            self._sealed.append(segment)
+            self._save_manifest()
+            if self.compress:
+                os.remove(path)
+            self._active = None
+            self._open_active()
+
+    # Reads
+    def _read(self, name: str) -> Iterator[dict]:
+        path = self._path(name)
+        opener = gzip.open if name.endswith(".gz") else open
+        try:
+            f = opener(path, "rt")
+        except FileNotFoundError:
+            if not self.compress or name.endswith(".gz"):
+                return
+            # Sealed and compressed since the segment list was taken
+            yield from self._read(name + ".gz")
+            return
+        with f:
+            for line in f:
+                if line.endswith("\n") and line.strip():
+                    yield json.loads(line)
+
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None, **filters: Any) -> List[dict]:
+        """Rows with ``start <= time_field <= end`` matching every filter, in append order"""
+        filters = {field: value for field, value in filters.items() if value is not None}
+        lo = start.timestamp() if start is not None else None
+        hi = end.timestamp() if end is not None else None
+        with self._lock:
+            self._refresh()
+            segments = list(self._sealed) + [self._active]
+            names = [segment.name for segment in segments if segment.may_contain(lo, hi, filters)]
+        result = []
+        for name in names:
+            for row in self._read(name):
+                if any(row.get(field) != value for field, value in filters.items()):
+                    continue
+                if lo is not None or hi is not None:
+                    ts = _to_timestamp(row.get(self.time_field))
+                    if ts is None or (lo is not None and ts < lo) or (hi is not None and ts > hi):
+                        continue
+                result.append(row)
+        return result
+
+
+__all__ = ["Segment", "SegmentedLog"]
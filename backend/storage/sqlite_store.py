@@ -0,0 +1,291 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..database import EVENT_LOGS, CursorError, SimpleDatabase, _index_key
+
+if TYPE_CHECKING:
+    from ..db.repository import ClinicalEventRepository
+
+
+# Columns extracted from each collection's rows and indexed. Every table also
+# has ``seq`` (storage order), a unique ``id`` and the full row in ``body``.
+TABLE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "users": ("email", "patient_code", "user_type"),
+    "clinical_records": ("patient_id", "doctor_id"),
+    "patient_access": ("patient_id", "doctor_id"),
+    "adjustments": ("patient_id", "status"),
+    "observations": ("patient_id", "code"),
+    "careplan_revisions": ("patient_id",),
+    "audit_log": ("adjustment_id",),
+    "notifications": ("user_id",),
+    "alerts": ("patient_id", "status"),
+    "alert_events": ("alert_id",),
+}
+
+
+class SQLiteDatabase(SimpleDatabase):
+    """SimpleDatabase backed by an embedded SQLite file in WAL mode.
+
+    Only the storage primitives are overridden, so the public method surface
+    is exactly SimpleDatabase's. Lookups on indexed columns become indexed
+    queries, and each read-modify-write section runs in one
+    ``BEGIN IMMEDIATE`` transaction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        data_dir: str = "data",
+        events: Optional["ClinicalEventRepository"] = None,
+        coalesce_window: float = 0.002,
+        coalesce_max_ops: int = 64,
+    ):
+        self._init_paths(data_dir)
+        self._init_shards(0)
+        self.data_dir = data_dir
+        self.events = events
+        self.path = path
+        self.storage_mode = "sqlite"
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._init_coalescer(coalesce_window, coalesce_max_ops)
+        self._create_schema()
+
+    # Connection management
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        for table, columns in TABLE_COLUMNS.items():
+            extra = "".join(f", {column} TEXT" for column in columns)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, "
+                f"body TEXT NOT NULL{extra})"
+            )
+            for column in columns:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_observations_patient_code_seq ON observations (patient_id, code, seq)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS patient_codes (code TEXT PRIMARY KEY)")
+        conn.execute(
+            "INSERT OR IGNORE INTO patient_codes (code) SELECT patient_code FROM users WHERE patient_code IS NOT NULL"
+        )
+
+    def claim_patient_code(self, code: str) -> bool:
+        cursor = self._connection().execute("INSERT OR IGNORE INTO patient_codes (code) VALUES (?)", (code,))
+        return cursor.rowcount == 1
+
+    def release_patient_code(self, code: str):
+        self._connection().execute("DELETE FROM patient_codes WHERE code = ?", (code,))
+
+    @staticmethod
+    def _table(file_path: str) -> str:
+        table = os.path.splitext(os.path.basename(file_path))[0]
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown collection: {file_path}")
+        return table
+
+    def _init_files(self):
+        """Tables are created in ``_create_schema``; there are no JSON files"""
+
+    @contextmanager
+    def _locked(self, file_path: str) -> Iterator[None]:
+        """Run the enclosed block in a single write transaction (re-entrant)"""
+        conn = self._connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield
+        except BaseException:
+            self._local.depth = 0
+            conn.execute("ROLLBACK")
+            raise
+        self._local.depth = 0
+        conn.execute("COMMIT")
+
+    # Read primitives
+    def _query(self, sql: str, params: Tuple = ()) -> List[dict]:
+        return [json.loads(body) for (body,) in self._connection().execute(sql, params)]
+
+    def _load_json(self, file_path: str) -> List[dict]:
+        return self._rows(file_path)
+
+    def _rows(self, file_path: str) -> List[dict]:
+        return self._query(f"SELECT body FROM {self._table(file_path)} ORDER BY seq")
+
+    def _iter_rows(self, file_path: str) -> Iterator[dict]:
+        for (body,) in self._connection().execute(f"SELECT body FROM {self._table(file_path)} ORDER BY seq"):
+            yield json.loads(body)
+
+    @staticmethod
+    def _column(table: str, field: str) -> str:
+        if field == "id" or field in TABLE_COLUMNS[table]:
+            return field
+        return f"json_extract(body, '$.{field}')"
+
+    def _lookup(self, file_path: str, field: str, value: Any) -> List[dict]:
+        table = self._table(file_path)
+        column = self._column(table, field)
+        key = _index_key(value)
+        if key is None:
+            return self._query(f"SELECT body FROM {table} WHERE {column} IS NULL ORDER BY seq")
+        return self._query(f"SELECT body FROM {table} WHERE {column} = ? ORDER BY seq", (key,))
+
+    def _page(
+        self,
+        file_path: str,
+        field: Optional[str] = None,
+        values: Sequence[Any] = (),
+        *,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        newest_first: bool = True,
+        where: Optional[Callable[[dict], bool]] = None,
+    ) -> List[dict]:
+        table = self._table(file_path)
+        conn = self._connection()
+        clauses: List[str] = []
+        params: List[Any] = []
+        if field is not None:
+            keys = [_index_key(value) for value in values]
+            if not keys:
+                return []
+            clauses.append(f"{self._column(table, field)} IN ({', '.join('?' for _ in keys)})")
+            params.extend(keys)
+        if after is not None:
+            found = conn.execute(f"SELECT seq FROM {table} WHERE id = ?", (after,)).fetchone()
+            if found is None:
+                raise CursorError("Invalid pagination cursor")
+            clauses.append("seq < ?" if newest_first else "seq > ?")
+            params.append(found[0])
+        sql = f"SELECT body FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY seq DESC" if newest_first else " ORDER BY seq"
+        if limit is not None and where is None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        result: List[dict] = []
+        if limit is not None and limit <= 0:
+            return result
+        for (body,) in conn.execute(sql, params):
+            row = json.loads(body)
+            if where is not None and not where(row):
+                continue
+            result.append(row)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def _query_events(
+        self,
+        file_path: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        **filters: Any,
+    ) -> List[dict]:
+        table = self._table(file_path)
+        time_column = self._column(table, EVENT_LOGS[table][0])
+        clauses: List[str] = []
+        params: List[Any] = []
+        for field, value in filters.items():
+            if value is not None:
+                clauses.append(f"{self._column(table, field)} = ?")
+                params.append(_index_key(value))
+        # Stored timestamps are str(datetime), which sorts chronologically
+        if start is not None:
+            clauses.append(f"{time_column} >= ?")
+            params.append(str(start))
+        if end is not None:
+            clauses.append(f"{time_column} <= ?")
+            params.append(str(end))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(f"SELECT body FROM {table}{where} ORDER BY seq", tuple(params))
+
+    def _observation_series(self, file_path: str) -> None:
+        # Rows live in SQLite; there is no file cache to key the index on
+        return None
+
+    # Write primitives
+    def _encode(self, table: str, row: dict) -> Tuple[List[str], List[Any]]:
+        body = json.dumps(row, default=str)
+        stored = json.loads(body)
+        columns = ["id", "body", *TABLE_COLUMNS[table]]
+        values = [stored.get("id"), body, *(stored.get(column) for column in TABLE_COLUMNS[table])]
+        return columns, values
+
+    def _append_rows(self, file_path: str, rows: List[dict]):
+        if not rows:
+            return
+        table = self._table(file_path)
+        with self._locked(file_path):
+            conn = self._connection()
+            for row in rows:
+                columns, values = self._encode(table, row)
+                placeholders = ", ".join("?" for _ in columns)
+                conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values)
+
+    def _upsert_row(self, file_path: str, row: dict, must_exist: bool = False) -> bool:
+        table = self._table(file_path)
+        columns, values = self._encode(table, row)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        with self._locked(file_path):
+            conn = self._connection()
+            if must_exist and conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (values[0],)).fetchone() is None:
+                return False
+            conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                values,
+            )
+        return True
+
+    def _upsert_rows(self, file_path: str, rows: List[dict]):
+        if not rows:
+            return
+        with self._locked(file_path):
+            for row in rows:
+                self._upsert_row(file_path, row)
+
+    # Maintenance
+    def compact(self, file_path: Optional[str] = None):
+        """Checkpoint the WAL back into the main database file"""
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+__all__ = ["SQLiteDatabase", "TABLE_COLUMNS"]
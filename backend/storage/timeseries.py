@@ -0,0 +1,161 @@
+import bisect
+import heapq
+import math
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _to_timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value))
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class ObservationSeries:
+    """One (patient_id, code) series as parallel arrays sorted by effective_at.
+
+    ``timestamps`` and ``values`` are compact ``array('d')`` columns (NaN for
+    non-numeric values); ``rows`` keeps the stored row for each point so only
+    the rows a query returns are ever hydrated.
+    """
+
+    __slots__ = ("timestamps", "values", "rows")
+
+    def __init__(self) -> None:
+        self.timestamps = array("d")
+        self.values = array("d")
+        self.rows: List[dict] = []
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, row: dict) -> None:
+        ts = _to_timestamp(row.get("effective_at"))
+        value = _to_float(row.get("value"))
+        if not self.timestamps or ts >= self.timestamps[-1]:
+            self.timestamps.append(ts)
+            self.values.append(value)
+            self.rows.append(row)
+            return
+        # Late arrival: keep the columns sorted, after equal timestamps
+        idx = bisect.bisect_right(self.timestamps, ts)
+        self.timestamps.insert(idx, ts)
+        self.values.insert(idx, value)
+        self.rows.insert(idx, row)
+
+    def bounds(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[int, int]:
+        lo = 0 if start is None else bisect.bisect_left(self.timestamps, start.timestamp())
+        hi = len(self.timestamps) if end is None else bisect.bisect_right(self.timestamps, end.timestamp())
+        return lo, max(lo, hi)
+
+    def newest_first(self, lo: int = 0, hi: Optional[int] = None) -> Iterator[dict]:
+        hi = len(self.rows) if hi is None else hi
+        for idx in range(hi - 1, lo - 1, -1):
+            yield self.rows[idx]
+
+
+class ObservationSeriesStore:
+    """Columnar in-memory index of observations keyed by (patient_id, code).
+
+    Ingestion is append-only; range and "latest" queries are binary searches
+    over the timestamp column instead of a sort of the patient's history.
+    """
+
+    def __init__(self) -> None:
+        self._series: Dict[str, Dict[str, ObservationSeries]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "ObservationSeriesStore":
+        store = cls()
+        store.extend(rows)
+        return store
+
+    def extend(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def append(self, row: dict) -> None:
+        codes = self._series.setdefault(row.get("patient_id"), {})
+        series = codes.get(row.get("code"))
+        if series is None:
+            series = codes[row.get("code")] = ObservationSeries()
+        series.append(row)
+
+    def series(self, patient_id: str, code: str) -> Optional[ObservationSeries]:
+        return self._series.get(patient_id, {}).get(code)
+
+    def codes(self, patient_id: str) -> List[str]:
+        return list(self._series.get(patient_id, {}))
+
+    def range(
+        self,
+        patient_id: str,
+        code: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[dict]:
+        """Rows with ``start <= effective_at <= end``, newest first"""
+        series = self.series(patient_id, code)
+        if series is None:
+            return []
+        lo, hi = series.bounds(start, end)
+        return list(series.newest_first(lo, hi))
+
+    def tail(self, patient_id: str, code: str, count: int) -> List[dict]:
+        """The ``count`` most recent rows of one series, newest first"""
+        series = self.series(patient_id, code)
+        if series is None or count <= 0:
+            return []
+        return list(series.newest_first(max(0, len(series) - count)))
+
+    def recent_by_code(self, patient_id: str, per_code: int) -> List[dict]:
+        """The ``per_code`` most recent rows of each of a patient's codes, newest first"""
+        if per_code <= 0:
+            return []
+        streams = []
+        for series in self._series.get(patient_id, {}).values():
+            lo = max(0, len(series) - per_code)
+            streams.append(zip([-ts for ts in reversed(series.timestamps[lo:])], reversed(series.rows[lo:])))
+        return [row for _, row in heapq.merge(*streams, key=lambda item: item[0])]
+
+    def latest(self, patient_id: str, code: Optional[str] = None) -> Optional[dict]:
+        if code is not None:
+            series = self.series(patient_id, code)
+            return series.rows[-1] if series else None
+        candidates = [series for series in self._series.get(patient_id, {}).values() if series]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda series: series.timestamps[-1]).rows[-1]
+
+    def since(self, start: datetime, codes: Optional[Iterable[str]] = None) -> Iterator[dict]:
+        """Rows of every patient with ``effective_at >= start``, series by series"""
+        wanted = None if codes is None else set(codes)
+        for by_code in self._series.values():
+            for code, series in by_code.items():
+                if wanted is None or code in wanted:
+                    lo, hi = series.bounds(start)
+                    yield from series.rows[lo:hi]
+
+    def patient_rows(self, patient_id: str) -> Iterator[dict]:
+        """Every row of a patient across codes, newest first (k-way merge)"""
+        streams = [
+            zip((-ts for ts in reversed(series.timestamps)), series.newest_first())
+            for series in self._series.get(patient_id, {}).values()
+        ]
+        for _, row in heapq.merge(*streams, key=lambda item: item[0]):
+            yield row
+
+
+__all__ = ["ObservationSeries", "ObservationSeriesStore"]
@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Sequence, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+def projection(model: Type[BaseModel], fields: Sequence[str]) -> Tuple[str, ...]:
+    """Normalize a field projection: always includes ``id``, rejects unknown names"""
+    fields = tuple(dict.fromkeys(("id", *fields)))
+    unknown = [field for field in fields if field not in model.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown {model.__name__} fields: {', '.join(unknown)}")
+    return fields
+
+
+@lru_cache(maxsize=None)
+def view_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """A model holding only ``fields`` of ``model``, with the same annotations.
+
+    Stored rows were validated when written, so the view skips the model's
+    validators and every field outside the projection; parsing happens in
+    a single pydantic-core call per row, and other keys are ignored.
+    """
+    return create_model(
+        f"{model.__name__}View",
+        __config__=ConfigDict(populate_by_name=True, extra="ignore"),
+        **{field: (model.model_fields[field].annotation, model.model_fields[field]) for field in fields},
+    )
+
+
+__all__ = ["projection", "view_model"]
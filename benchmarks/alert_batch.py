@@ -0,0 +1,114 @@
+"""One-at-a-time vs batch alert evaluation for 10k and 100k observation batches.
+
+    python benchmarks/alert_batch.py [--sizes 10000 100000] [--single-sample 2000]
+
+``rules`` times rule evaluation alone: a per-observation loop over the
+compiled rules against RulePack.evaluate_batch (NumPy masks when NumPy is
+installed). ``engine`` times AlertEngine end to end on a log-mode JSON store:
+process_observations called once per observation (measured on
+``--single-sample`` observations and scaled up) against one call for the
+whole batch, which persists all new alerts in one write.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import SimpleDatabase  # noqa: E402
+from backend.models import Observation  # noqa: E402
+from backend.services.alert_engine import AlertEngine  # noqa: E402
+from backend.services.alert_rules import load_rule_pack, np  # noqa: E402
+
+CODES = [("heart_rate", "bpm", 60, 130), ("spo2", "%", 80, 100), ("glucose", "mg/dl", 40, 200), ("weight", "kg", 60, 90)]
+
+
+def _batch(count, patients=50):
+    rng = random.Random(7)
+    start = datetime.now() - timedelta(seconds=count)
+    observations = []
+    for i in range(count):
+        code, unit, low, high = CODES[i % len(CODES)]
+        observations.append(Observation(
+            patient_id=f"patient-{i % patients}",
+            code=code,
+            value=round(rng.uniform(low, high), 1),
+            unit=unit,
+            effective_at=start + timedelta(seconds=i),
+        ))
+    return observations
+
+
+def _scalar(pack, observations):
+    """Per-observation evaluation against the compiled rules"""
+    previous = {}
+    fired = 0
+    for observation in observations:
+        value = float(observation.value)
+        for rule in pack.rules_for(observation.code):
+            if rule.kind != "delta":
+                fired += rule.match(value) is not None
+                continue
+            key = (observation.patient_id, observation.code)
+            last = previous.get(key)
+            if last is not None and (observation.effective_at - last[0]).total_seconds() <= rule.window_minutes * 60:
+                fired += rule.match_delta(value, last[1]) is not None
+        previous[(observation.patient_id, observation.code)] = (observation.effective_at, value)
+    return fired
+
+
+def _engine():
+    database = SimpleDatabase(data_dir=tempfile.mkdtemp(), storage_mode="log", events=None, compact_interval=3600)
+    return AlertEngine(load_rule_pack(), database=database), database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--single-sample", type=int, default=2_000)
+    args = parser.parse_args()
+    pack = load_rule_pack()
+
+    print(f"NumPy: {'yes' if np is not None else 'no (pure-Python fallback)'}")
+    print(f"{'size':>8}  {'stage':<8}{'one-at-a-time s':>18}{'batch s':>10}{'speedup':>10}")
+    for size in args.sizes:
+        observations = _batch(size)
+        codes = [observation.code for observation in observations]
+        values = [float(observation.value) for observation in observations]
+        times = [observation.effective_at for observation in observations]
+        patients = [observation.patient_id for observation in observations]
+
+        began = time.perf_counter()
+        _scalar(pack, observations)
+        single = time.perf_counter() - began
+        began = time.perf_counter()
+        pack.evaluate_batch(codes, values, timestamps=times, series=patients)
+        batch = time.perf_counter() - began
+        print(f"{size:>8}  {'rules':<8}{single:>18.3f}{batch:>10.3f}{single / batch:>9.1f}x")
+
+        sample = observations[:min(size, args.single_sample)]
+        engine, database = _engine()
+        began = time.perf_counter()
+        for observation in sample:
+            engine.process_observations(observation.patient_id, [observation])
+        single = (time.perf_counter() - began) * size / len(sample)
+        database.close()
+
+        engine, database = _engine()
+        began = time.perf_counter()
+        # process_observations for a multi-patient batch
+        engine.db.add_observations(observations)
+        engine.evaluate_batch(observations)
+        for patient in set(patients):
+            engine._resolve_missing_data_alert(patient)
+        batch = time.perf_counter() - began
+        database.close()
+        print(f"{size:>8}  {'engine':<8}{single:>18.3f}{batch:>10.3f}{single / batch:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
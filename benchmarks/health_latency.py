@@ -0,0 +1,114 @@
+"""p99 latency of ``/health`` while other clients hammer a write endpoint.
+
+Runs the app in-process over ASGI once with storage calls executed inline on
+the event loop (``STORAGE_IO_WORKERS=0``, the old behaviour) and once through
+the async storage facade's thread pool, then prints both distributions.
+
+    python benchmarks/health_latency.py [--seed 20000] [--duration 5] [--writers 4] [--workers 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _measure(args):
+    import httpx
+
+    from backend.database import db
+    from backend.main import create_app
+    from backend.models import Observation
+
+    start = datetime.now() - timedelta(days=30)
+    db.add_observations([
+        Observation(patient_id="seed", code="heart_rate", value=70, unit="bpm", effective_at=start + timedelta(minutes=i))
+        for i in range(args.seed)
+    ])
+
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/auth/register", json={
+            "email": "bench@example.com", "password": "bench", "full_name": "Bench", "user_type": "doctor",
+        })
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        deadline = time.perf_counter() + args.duration
+        writes = 0
+
+        async def writer():
+            nonlocal writes
+            while time.perf_counter() < deadline:
+                await client.post("/observations/batch", headers=headers, json={
+                    "patientId": "bench-patient",
+                    "observations": [{"code": "heart_rate", "value": 72, "unit": "bpm", "effectiveAt": datetime.now().isoformat()}],
+                })
+                writes += 1
+
+        async def prober():
+            # Latency is measured from when each probe was due, so time spent
+            # waiting for a blocked loop counts (no coordinated omission)
+            latencies = []
+            due = time.perf_counter()
+            while due < deadline:
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/health")
+                latencies.append((time.perf_counter() - due) * 1000)
+                due += args.interval
+            return latencies
+
+        results = await asyncio.gather(prober(), *(writer() for _ in range(args.writers)))
+    latencies = results[0]
+    return {
+        "samples": len(latencies),
+        "writes": writes,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+
+def _run_child(args):
+    sys.path.insert(0, ROOT)
+    print(json.dumps(asyncio.run(_measure(args))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=20000, help="observations stored before the run")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per run")
+    parser.add_argument("--writers", type=int, default=4, help="concurrent writing clients")
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between /health probes")
+    parser.add_argument("--workers", type=int, default=8, help="STORAGE_IO_WORKERS for the async run")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _run_child(args)
+        return
+
+    print(f"{'mode':<24}{'samples':>8}{'writes':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, workers in (("blocking (workers=0)", 0), (f"offloaded (workers={args.workers})", args.workers)):
+        env = dict(os.environ, DATA_DIR=tempfile.mkdtemp(), EVENTS_BACKEND="json", STORAGE_IO_WORKERS=str(workers))
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", "--seed", str(args.seed),
+             "--duration", str(args.duration), "--writers", str(args.writers), "--interval", str(args.interval)],
+            env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:<24}{stats['samples']:>8}{stats['writes']:>8}"
+              f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
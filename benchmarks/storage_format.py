@@ -0,0 +1,69 @@
+"""Load time, file size and memory of a 100k-row collection per snapshot format.
+
+    python benchmarks/storage_format.py [--rows 100000]
+
+Rows are clinical records shaped like the ones the API stores. Memory is the
+tracemalloc peak while loading and the size still held by the loaded rows.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import SimpleDatabase  # noqa: E402
+from backend.models import ClinicalRecord, VitalSigns  # noqa: E402
+from backend.storage.codec import msgpack  # noqa: E402
+
+
+def _rows(count):
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        yield SimpleDatabase._to_stored(ClinicalRecord(
+            patient_id=f"patient-{i % 500}",
+            doctor_id=f"doctor-{i % 20}",
+            case_text="Paciente con fiebre y tos de 3 dias de evolucion",
+            differentials=[{"condition": "Neumonia", "probability": "alta"}],
+            tests=[{"name": "Radiografia de torax"}],
+            created_at=start + timedelta(minutes=i),
+            vital_signs=VitalSigns(heart_rate=80 + i % 40, temperature=37.5, oxygen_saturation=96),
+            symptoms=["fiebre", "tos"],
+        ).dict())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    rows = list(_rows(args.rows))
+
+    formats = ["json"] + (["msgpack"] if msgpack is not None else [])
+    print(f"{'format':<10}{'size MB':>10}{'load s':>10}{'peak MB':>10}{'held MB':>10}")
+    for storage_format in formats:
+        database = SimpleDatabase(data_dir=tempfile.mkdtemp(), storage_format=storage_format)
+        database._save_json(database.records_file, rows)
+        size = os.path.getsize(database.records_file) / 1e6
+
+        timings = []
+        for _ in range(3):
+            began = time.perf_counter()
+            database._load_json(database.records_file)
+            timings.append(time.perf_counter() - began)
+
+        tracemalloc.start()
+        loaded = database._load_json(database.records_file)
+        held, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(loaded) == len(rows)
+        del loaded
+        print(f"{storage_format:<10}{size:>10.1f}{min(timings):>10.3f}{peak / 1e6:>10.1f}{held / 1e6:>10.1f}")
+    if msgpack is None:
+        print("msgpack is not installed; pip install msgpack to compare")
+
+
+if __name__ == "__main__":
+    main()
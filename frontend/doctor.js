@@ -84,6 +84,25 @@ async function apiCall(endpoint, options = {}) {
   return response;
 }
 
+// List endpoints return one page at a time (next_cursor); lists show the first
+// page and a "Cargar ms" button appends the next one
+function pagedUrl(endpoint, after) {
+  return after ? `${endpoint}?after=${encodeURIComponent(after)}` : endpoint;
+}
+
+function appendLoadMore(container, cursor, loadNext) {
+  if (!cursor) return;
+  const button = document.createElement("button");
+  button.type = "button";
+  button.className = "btn-secondary";
+  button.textContent = "Cargar ms";
+  button.addEventListener("click", () => {
+    button.disabled = true;
+    loadNext(cursor);
+  });
+  container.appendChild(button);
+}
+
 function renderResults(data) {
   diffList.innerHTML = "";
   testList.innerHTML = "";
@@ -221,12 +240,16 @@ function renderAcceptedIcd() {
   });
 }
 
-async function loadPatients() {
+let patientRecords = [];
+
+async function loadPatients(after = null) {
   try {
-    const resp = await apiCall("/clinical-records/my-patients");
+    const resp = await apiCall(pagedUrl("/clinical-records/my-patients", after));
     const data = await resp.json();
     if (!resp.ok) throw new Error(data.detail || "No fue posible cargar la informacin");
-    displayPatients(data.records || []);
+    patientRecords = after ? patientRecords.concat(data.records || []) : data.records || [];
+    displayPatients(patientRecords);
+    appendLoadMore(patientsItems, data.next_cursor, loadPatients);
   } catch (e) {
     alert(e.message);
   }
@@ -254,12 +277,16 @@ function displayPatients(records) {
   patientsList.classList.remove("hidden");
 }
 
-async function loadAdjustments() {
+let adjustmentItems = [];
+
+async function loadAdjustments(after = null) {
   try {
-    const resp = await apiCall("/adjustments");
+    const resp = await apiCall(pagedUrl("/adjustments", after));
     const data = await resp.json();
     if (!resp.ok) throw new Error(data.detail || "No fue posible cargar ajustes");
-    renderAdjustments(data.adjustments || []);
+    adjustmentItems = after ? adjustmentItems.concat(data.adjustments || []) : data.adjustments || [];
+    renderAdjustments(adjustmentItems);
+    appendLoadMore(adjustmentsContainer, data.next_cursor, loadAdjustments);
   } catch (error) {
     adjustmentsContainer.innerHTML = `<p class="error">${error.message}</p>`;
   }
@@ -528,12 +555,51 @@ function renderCalculatorResult(result) {
   calculatorResult.classList.remove("hidden");
 }
 
+// EventSource cannot send headers, so each connection opens with a short-lived
+// stream token; once the server refuses a reconnect, a fresh token resumes the
+// stream after the last event seen
+let lastEventId = null;
+
+async function subscribeToEvents() {
+  if (!window.EventSource) return;
+  let token;
+  try {
+    const response = await apiCall("/stream/token", { method: "POST" });
+    if (!response.ok) return;
+    token = (await response.json()).token;
+  } catch (error) {
+    return;
+  }
+  const params = new URLSearchParams({ stream_token: token });
+  if (lastEventId) params.set("last_event_id", lastEventId);
+  const source = new EventSource(`${API_BASE}/stream?${params}`);
+  const refreshDashboard = (event) => {
+    lastEventId = event.lastEventId || lastEventId;
+    if (!lastDashboardPatientId) return;
+    const data = event.data ? JSON.parse(event.data) : {};
+    if (event.type === "resync" || data.patient_id === lastDashboardPatientId) {
+      loadDashboard(lastDashboardPatientId);
+    }
+  };
+  source.addEventListener("alert", refreshDashboard);
+  source.addEventListener("alert_status", refreshDashboard);
+  source.addEventListener("resync", refreshDashboard);
+  source.addEventListener("notification", (event) => {
+    lastEventId = event.lastEventId || lastEventId;
+    loadAdjustments();
+  });
+  source.addEventListener("error", () => {
+    if (source.readyState === EventSource.CLOSED) setTimeout(subscribeToEvents, 3000);
+  });
+}
+
 async function init() {
   if (!checkAuth()) return;
 
   renderCalculatorInputs(calculatorSelect.value);
   renderAcceptedIcd();
   await loadAdjustments();
+  subscribeToEvents();
 }
 
 logoutBtn.addEventListener("click", () => {
@@ -544,8 +610,8 @@ logoutBtn.addEventListener("click", () => {
 
 analyzeBtn.addEventListener("click", analyze);
 suggestIcdBtn.addEventListener("click", suggestIcd);
-loadPatientsBtn.addEventListener("click", loadPatients);
-loadAdjustmentsBtn.addEventListener("click", loadAdjustments);
+loadPatientsBtn.addEventListener("click", () => loadPatients());
+loadAdjustmentsBtn.addEventListener("click", () => loadAdjustments());
 loadDashboardBtn.addEventListener("click", () => {
   const patientId = dashboardPatientIdInput.value.trim();
   if (!patientId) {
@@ -1,5 +1,14 @@
 ﻿const API_BASE = "http://127.0.0.1:8000";
 
+// Records come one page at a time (next_cursor); a "Cargar m\u00e1s" button appends the next page
+let lookupCode = null;
+let lookupRecords = [];
+
+function lookupUrl(patientCode, after) {
+  const url = `${API_BASE}/patients/lookup/${encodeURIComponent(patientCode)}`;
+  return after ? `${url}?after=${encodeURIComponent(after)}` : url;
+}
+
 document.getElementById("lookupForm").addEventListener("submit", async function(e) {
   e.preventDefault();
 
@@ -12,10 +21,12 @@ document.getElementById("lookupForm").addEventListener("submit", async function(
   setLoading(true);
 
   try {
-    const response = await fetch(`${API_BASE}/patients/lookup/${patientCode}`);
+    const response = await fetch(lookupUrl(patientCode));
     const data = await response.json();
 
     if (response.ok) {
+      lookupCode = patientCode;
+      lookupRecords = data.records;
       showPatientInfo(data);
     } else {
       showNotFound();
@@ -27,6 +38,18 @@ document.getElementById("lookupForm").addEventListener("submit", async function(
   }
 });
 
+async function loadMoreRecords(after) {
+  try {
+    const response = await fetch(lookupUrl(lookupCode, after));
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.detail || "No fue posible cargar m\u00e1s registros");
+    lookupRecords = lookupRecords.concat(data.records);
+    displayRecords(lookupRecords, data.next_cursor);
+  } catch (error) {
+    alert("Error de red: " + error.message);
+  }
+}
+
 function setLoading(loading) {
   const btn = document.getElementById("lookupBtn");
   const status = document.getElementById("status");
@@ -51,12 +74,12 @@ function showPatientInfo(data) {
   document.getElementById("patientPhone").textContent = data.patient.phone || "No especificado";
   document.getElementById("patientEmergency").textContent = data.patient.emergency_contact || "No especificado";
 
-  displayRecords(data.records);
+  displayRecords(lookupRecords, data.next_cursor);
 
   document.getElementById("patientInfo").classList.remove("hidden");
 }
 
-function displayRecords(records) {
+function displayRecords(records, nextCursor) {
   const recordsList = document.getElementById("recordsList");
 
   if (!records.length) {
@@ -162,6 +185,18 @@ function displayRecords(records) {
       ` : ''}
     </div>
   `).join('');
+
+  if (nextCursor) {
+    const button = document.createElement("button");
+    button.type = "button";
+    button.className = "btn-secondary";
+    button.textContent = "Cargar m\u00e1s";
+    button.addEventListener("click", () => {
+      button.disabled = true;
+      loadMoreRecords(nextCursor);
+    });
+    recordsList.appendChild(button);
+  }
 }
 
 function showNotFound() {
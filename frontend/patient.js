@@ -65,12 +65,35 @@ async function apiCall(endpoint, options = {}) {
   return resp;
 }
 
-async function loadHistory() {
+// List endpoints return one page at a time (next_cursor); lists show the first
+// page and a "Cargar mas" button appends the next one
+function pagedUrl(endpoint, after) {
+  return after ? `${endpoint}?after=${encodeURIComponent(after)}` : endpoint;
+}
+
+function appendLoadMore(container, cursor, loadNext) {
+  if (!cursor) return;
+  const button = document.createElement("button");
+  button.type = "button";
+  button.className = "btn-secondary";
+  button.textContent = "Cargar mas";
+  button.addEventListener("click", () => {
+    button.disabled = true;
+    loadNext(cursor);
+  });
+  container.appendChild(button);
+}
+
+let historyRecords = [];
+
+async function loadHistory(after = null) {
   try {
-    const resp = await apiCall("/clinical-records/my-history");
+    const resp = await apiCall(pagedUrl("/clinical-records/my-history", after));
     const data = await resp.json();
     if (!resp.ok) throw new Error(data.detail || "No fue posible cargar la historia clinica");
-    displayHistory(data.records || []);
+    historyRecords = after ? historyRecords.concat(data.records || []) : data.records || [];
+    displayHistory(historyRecords);
+    appendLoadMore(historyItems, data.next_cursor, loadHistory);
   } catch (error) {
     alert(error.message);
   }
@@ -130,12 +153,16 @@ async function submitAdjustment() {
   }
 }
 
-async function loadPatientAdjustments() {
+let patientAdjustmentItems = [];
+
+async function loadPatientAdjustments(after = null) {
   try {
-    const resp = await apiCall("/adjustments");
+    const resp = await apiCall(pagedUrl("/adjustments", after));
     const data = await resp.json();
     if (!resp.ok) throw new Error(data.detail || "No se pudieron cargar los ajustes");
-    renderPatientAdjustments(data.adjustments || []);
+    patientAdjustmentItems = after ? patientAdjustmentItems.concat(data.adjustments || []) : data.adjustments || [];
+    renderPatientAdjustments(patientAdjustmentItems);
+    appendLoadMore(patientAdjustments, data.next_cursor, loadPatientAdjustments);
   } catch (error) {
     patientAdjustments.innerHTML = `<p class="error">${error.message}</p>`;
   }
@@ -164,12 +191,16 @@ function renderPatientAdjustments(adjustments) {
   });
 }
 
-async function loadNotifications() {
+let notificationItems = [];
+
+async function loadNotifications(after = null) {
   try {
-    const resp = await apiCall("/notifications");
+    const resp = await apiCall(pagedUrl("/notifications", after));
     const data = await resp.json();
     if (!resp.ok) throw new Error(data.detail || "No fue posible cargar las notificaciones");
-    renderNotifications(data.notifications || []);
+    notificationItems = after ? notificationItems.concat(data.notifications || []) : data.notifications || [];
+    renderNotifications(notificationItems);
+    appendLoadMore(notificationsList, data.next_cursor, loadNotifications);
   } catch (error) {
     notificationsList.innerHTML = `<p class="error">${error.message}</p>`;
   }
@@ -218,12 +249,16 @@ async function shareRecords() {
   }
 }
 
-async function loadDoctors() {
+let doctorItems = [];
+
+async function loadDoctors(after = null) {
   try {
-    const resp = await apiCall("/doctors");
+    const resp = await apiCall(pagedUrl("/doctors", after));
     const data = await resp.json();
     if (!resp.ok) throw new Error(data.detail || "No fue posible cargar la lista de doctores");
-    displayDoctors(data.doctors || []);
+    doctorItems = after ? doctorItems.concat(data.doctors || []) : data.doctors || [];
+    displayDoctors(doctorItems);
+    appendLoadMore(doctorsItems, data.next_cursor, loadDoctors);
   } catch (error) {
     alert(error.message);
   }
@@ -251,10 +286,41 @@ function displayDoctors(list) {
   doctorsList.classList.remove("hidden");
 }
 
+// EventSource cannot send headers, so each connection opens with a short-lived
+// stream token; once the server refuses a reconnect, a fresh token resumes the
+// stream after the last event seen
+let lastEventId = null;
+
+async function subscribeToEvents() {
+  if (!window.EventSource) return;
+  let token;
+  try {
+    const response = await apiCall("/stream/token", { method: "POST" });
+    if (!response.ok) return;
+    token = (await response.json()).token;
+  } catch (error) {
+    return;
+  }
+  const params = new URLSearchParams({ stream_token: token });
+  if (lastEventId) params.set("last_event_id", lastEventId);
+  const source = new EventSource(`${API_BASE}/stream?${params}`);
+  const refresh = (event) => {
+    lastEventId = event.lastEventId || lastEventId;
+    loadNotifications();
+    loadPatientAdjustments();
+  };
+  source.addEventListener("notification", refresh);
+  source.addEventListener("resync", refresh);
+  source.addEventListener("error", () => {
+    if (source.readyState === EventSource.CLOSED) setTimeout(subscribeToEvents, 3000);
+  });
+}
+
 async function init() {
   if (!checkAuth()) return;
   await loadPatientAdjustments();
   await loadNotifications();
+  subscribeToEvents();
 }
 
 logoutBtn.addEventListener("click", () => {
@@ -263,11 +329,11 @@ logoutBtn.addEventListener("click", () => {
   window.location.href = "./login.html";
 });
 
-loadHistoryBtn.addEventListener("click", loadHistory);
+loadHistoryBtn.addEventListener("click", () => loadHistory());
 submitAdjustmentBtn.addEventListener("click", submitAdjustment);
-refreshAdjustmentsBtn.addEventListener("click", loadPatientAdjustments);
-loadNotificationsBtn.addEventListener("click", loadNotifications);
+refreshAdjustmentsBtn.addEventListener("click", () => loadPatientAdjustments());
+loadNotificationsBtn.addEventListener("click", () => loadNotifications());
 shareRecordsBtn.addEventListener("click", shareRecords);
-loadDoctorsBtn.addEventListener("click", loadDoctors);
+loadDoctorsBtn.addEventListener("click", () => loadDoctors());
 
 window.addEventListener("load", init);
@@ -161,14 +161,37 @@ async function apiCall(endpoint, options = {}) {
   return response;
 }
 
+// List endpoints return one page at a time (next_cursor); lists show the first
+// page and a "Cargar m\u00e1s" button appends the next one
+function pagedUrl(endpoint, after) {
+  return after ? `${endpoint}?after=${encodeURIComponent(after)}` : endpoint;
+}
+
+function appendLoadMore(container, cursor, loadNext) {
+  if (!cursor) return;
+  const button = document.createElement("button");
+  button.type = "button";
+  button.className = "btn-secondary";
+  button.textContent = "Cargar m\u00e1s";
+  button.addEventListener("click", () => {
+    button.disabled = true;
+    loadNext(cursor);
+  });
+  container.appendChild(button);
+}
+
 // Clinical history functions
-async function loadHistory() {
+let historyRecords = [];
+
+async function loadHistory(after = null) {
   try {
-    const response = await apiCall("/clinical-records/my-history");
+    const response = await apiCall(pagedUrl("/clinical-records/my-history", after));
     const data = await response.json();
     
     if (response.ok) {
-      displayHistory(data.records);
+      historyRecords = after ? historyRecords.concat(data.records) : data.records;
+      displayHistory(historyRecords);
+      appendLoadMore(historyItems, data.next_cursor, loadHistory);
     } else {
       alert(data.detail || "No fue posible cargar la historia");
     }
@@ -218,13 +241,17 @@ function displayHistory(records) {
 }
 
 // Doctor functions
-async function loadPatients() {
+let patientRecords = [];
+
+async function loadPatients(after = null) {
   try {
-    const response = await apiCall("/clinical-records/my-patients");
+    const response = await apiCall(pagedUrl("/clinical-records/my-patients", after));
     const data = await response.json();
     
     if (response.ok) {
-      displayPatients(data.records);
+      patientRecords = after ? patientRecords.concat(data.records) : data.records;
+      displayPatients(patientRecords);
+      appendLoadMore(patientsItems, data.next_cursor, loadPatients);
     } else {
       alert(data.detail || "No fue posible cargar los registros de pacientes");
     }
@@ -304,13 +331,17 @@ async function shareRecords() {
   }
 }
 
-async function loadDoctors() {
+let doctorItems = [];
+
+async function loadDoctors(after = null) {
   try {
-    const response = await apiCall("/doctors");
+    const response = await apiCall(pagedUrl("/doctors", after));
     const data = await response.json();
     
     if (response.ok) {
-      displayDoctors(data.doctors);
+      doctorItems = after ? doctorItems.concat(data.doctors) : data.doctors;
+      displayDoctors(doctorItems);
+      appendLoadMore(doctorsItems, data.next_cursor, loadDoctors);
     } else {
       alert(data.detail || "No fue posible cargar la lista de doctores");
     }
@@ -356,13 +387,13 @@ function shareWithDoctor(doctorId, doctorName) {
 // Event listeners
 button.addEventListener("click", analyze);
 logoutBtn.addEventListener("click", logout);
-loadHistoryBtn.addEventListener("click", loadHistory);
-loadPatientsBtn.addEventListener("click", loadPatients);
+loadHistoryBtn.addEventListener("click", () => loadHistory());
+loadPatientsBtn.addEventListener("click", () => loadPatients());
 createRecordBtn.addEventListener("click", function() {
   window.location.href = './patient-registration.html';
 });
 shareRecordsBtn.addEventListener("click", shareRecords);
-loadDoctorsBtn.addEventListener("click", loadDoctors);
+loadDoctorsBtn.addEventListener("click", () => loadDoctors());
 
 // Initialize app
 window.addEventListener("load", function() {
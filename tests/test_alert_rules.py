@@ -0,0 +1,470 @@
+import asyncio
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.database import SimpleDatabase
+from backend.models import AlertSeverity, AlertStatus, CarePlanRevision, Notification, Observation
+from backend.services.alert_engine import AlertEngine
+from backend.services import alert_rules
+from backend.services.alert_analytics import QuantileSketch, parse_window
+from backend.services.alert_rules import RulePack, load_rule_pack
+from backend.services.alert_windows import SlidingWindow
+from backend.services.early_warning import component_points
+from backend.services.event_stream import EventBroker, audience_key
+from backend.services.missing_data import MissingDataSchedule
+from backend.services.observation_validator import (
+    ALLOWED_UNITS, VALUE_LIMITS, ObservationValidationError, validate_observation,
+)
+
+
+def test_default_pack_dispatches_by_normalized_code():
+    pack = load_rule_pack()
+    assert [rule.rule for rule in pack.rules_for(" Oxygen_Saturation ")] == ["low_spo2"]
+    assert [rule.rule for rule in pack.rules_for("hr")] == ["hr_delta_spike"]
+    assert pack.rules_for("weight") == ()
+
+    [(rule, extras)] = pack.evaluate("spo2", 85.0)
+    assert rule.severity == AlertSeverity.CRITICAL and extras == {"threshold": 88}
+    assert pack.evaluate("spo2", 90.0) == []
+    assert pack.evaluate("heart_rate", 200.0) == []  # delta rules need history
+
+    delta = pack.rules_for("heart_rate")[0]
+    extras = delta.match_delta(130.0, 80.0)
+    assert delta.format_message(130.0, extras) == "Heart rate rose 50.0 bpm in under 10 minutes"
+    assert delta.match_delta(100.0, 80.0) is None
+
+
+def test_range_rules_and_loading_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [
+        {"rule": "temp_out_of_range", "type": "range", "codes": ["temperature"], "min": 35, "max": 38.5,
+         "severity": "warning", "message": "Temperature {value} outside {min}-{max}"},
+        {"rule": "weight_high", "type": "range", "code": "weight", "max": 150},
+    ]}))
+    pack = RulePack.load(str(path))
+    [(rule, extras)] = pack.evaluate("temperature", 39.0)
+    assert rule.format_message(39.0, extras) == "Temperature 39.0 outside 35-38.5"
+    assert pack.evaluate("temperature", 36.6) == []
+    assert [rule.rule for rule, _ in pack.evaluate("weight", 151)] == ["weight_high"]
+
+
+@pytest.mark.parametrize("spec", [
+    {"rule": "x", "type": "bogus", "codes": ["spo2"]},
+    {"rule": "x", "codes": ["spo2"], "operator": "eq", "value": 1},
+    {"rule": "x", "type": "range", "codes": ["spo2"]},
+    {"rule": "x", "codes": [], "operator": "lt", "value": 1},
+    {"rule": "x", "codes": ["spo2"], "operator": "lt", "value": 1, "severity": "urgent"},
+    {"rule": "x", "codes": ["spo2"], "operator": "lt", "value": 1, "suppress_minutes": -5},
+    {"rule": "x", "type": "delta", "codes": ["hr"], "operator": "gt", "value": 1, "hysteresis": 2},
+    {"rule": "x", "codes": ["spo2"], "operator": "lt", "value": 1, "rate_limit": {"alerts": 0, "per_minutes": 60}},
+])
+def test_invalid_rules_are_rejected(spec):
+    with pytest.raises(ValueError):
+        RulePack.from_dict({"rules": [spec]})
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_evaluate_batch_matches_per_reading_rules(monkeypatch, vectorized):
+    if vectorized and alert_rules.np is None:
+        pytest.skip("numpy is not installed")
+    if not vectorized:
+        monkeypatch.setattr(alert_rules, "np", None)
+    pack = load_rule_pack()
+    start = datetime(2024, 1, 1, 12, 0)
+    codes = ["hr", "spo2", "heart_rate", "glucose", "heart_rate", "spo2"]
+    values = [70.0, 85.0, 120.0, None, 125.0, 95.0]
+    times = [start, start, start + timedelta(minutes=5), start, start + timedelta(minutes=30), start]
+    matches = pack.evaluate_batch(codes, values, timestamps=times, series=["p1"] * 6)
+    assert [(index, rule.rule) for index, rule, _ in matches] == [(1, "low_spo2"), (2, "hr_delta_spike")]
+    assert matches[1][2]["baseline"] == 70.0 and matches[1][2]["baseline_at"] == start.isoformat()
+
+    # Without timestamps only threshold/range rules run; baselines seed the first reading
+    assert [rule.rule for _, rule, _ in pack.evaluate_batch(codes, values)] == ["low_spo2"]
+    seeded = pack.evaluate_batch(["hr"], [150.0], timestamps=[start], series=["p1"],
+                                 baselines={("p1", "heart_rate"): (start - timedelta(minutes=1), 90.0)})
+    assert seeded[0][2]["delta"] == 60.0
+
+
+def test_engine_persists_a_batch_in_one_write(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    engine = AlertEngine(load_rule_pack(), database=database)
+    writes = []
+    create_alerts = database.create_alerts
+    database.create_alerts = lambda alerts: writes.append(len(alerts)) or create_alerts(alerts)
+
+    now = datetime.now()
+    engine.process_observations("p1", [Observation(patient_id="p1", code="hr", value=70, effective_at=now - timedelta(minutes=2))])
+    generated = engine.process_observations("p1", [
+        Observation(patient_id="p1", code="HR", value=130, effective_at=now),
+        Observation(patient_id="p1", code="spo2", value=80, effective_at=now),
+        Observation(patient_id="p1", code="spo2", value=82, effective_at=now),
+    ])
+    assert sorted(alert.context["rule"] for alert in generated) == ["hr_delta_spike", "low_spo2"]
+    assert writes == [0, 2]
+    assert engine.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=70)]) == []
+    assert len(database.list_alert_events()) == 2
+
+
+def test_sliding_window_bounds_and_late_arrivals():
+    start = datetime(2026, 1, 1, 8, 0)
+    window = SlidingWindow(horizon=600, max_points=3)
+    for minutes, value in [(0, 60), (4, 70), (2, 65)]:
+        window.push(start + timedelta(minutes=minutes), value)
+    assert [point[1] for point in window.points] == [60, 65, 70]
+    assert window.previous(start + timedelta(minutes=4))[1] == 65
+    assert window.previous(start) is None
+
+    window.push(start + timedelta(minutes=13), 80)
+    assert [point[1] for point in window.points] == [70, 80]
+
+
+def test_engine_warms_windows_and_skips_storage_lookups(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    now = datetime.now()
+    database.add_observations([
+        Observation(patient_id="p1", code="hr", value=70, effective_at=now - timedelta(minutes=3)),
+        Observation(patient_id="p1", code="heart_rate", value="n/a", effective_at=now - timedelta(minutes=2)),
+        Observation(patient_id="p2", code="heart_rate", value=60, effective_at=now - timedelta(hours=1)),
+    ])
+    engine = AlertEngine(load_rule_pack(), database=database)
+    assert engine.warm() == 2
+    assert engine.warm() == 0
+
+    database.get_recent_observations = None
+    generated = engine.process_observations("p1", [Observation(patient_id="p1", code="heart_rate", value=115, effective_at=now)])
+    assert [alert.context["baseline"] for alert in generated] == [70]
+    assert engine.process_observations("p2", [Observation(patient_id="p2", code="hr", value=120, effective_at=now)]) == []
+
+
+def test_active_alert_index_drives_dedup_and_counts(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    engine = AlertEngine(load_rule_pack(), database=database)
+    loads = []
+    list_active_alerts = database.list_active_alerts
+    database.list_active_alerts = lambda patient_id: loads.append(patient_id) or list_active_alerts(patient_id)
+
+    first = engine.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=80)])
+    assert engine.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=75)]) == []
+    assert engine.count_active_alerts("p1") == 1
+    assert loads == ["p1"]
+
+    alert = engine.transition_alert(first[0], AlertStatus.ACKNOWLEDGED, actor_id="doc")
+    assert engine.count_active_alerts("p1") == 1
+    engine.transition_alert(alert, AlertStatus.RESOLVED, actor_id="doc")
+    assert engine.count_active_alerts("p1") == 0
+    assert len(engine.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=70)])) == 1
+    assert loads == ["p1", "p1"] and database.count_active_alerts("p1") == 1
+
+
+def test_active_alert_index_sees_transitions_by_other_workers(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    worker_a = AlertEngine(load_rule_pack(), database=database)
+    worker_b = AlertEngine(load_rule_pack(), database=database)
+
+    [alert] = worker_a.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=80)])
+    assert worker_b.count_active_alerts("p1") == 1
+    worker_a.apply_transition_path(alert, [AlertStatus.ACKNOWLEDGED, AlertStatus.RESOLVED], actor_id="doc")
+
+    [again] = worker_b.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=75)])
+    assert again.id != alert.id and worker_b.count_active_alerts("p1") == database.count_active_alerts("p1") == 1
+
+    worker_b.active.max_age = 0.0
+    worker_a.apply_transition_path(again, [AlertStatus.ACKNOWLEDGED, AlertStatus.RESOLVED], actor_id="doc")
+    assert worker_b.count_active_alerts("p1") == 0
+
+
+def test_active_alert_index_sees_alerts_raised_by_other_workers(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    worker_a = AlertEngine(load_rule_pack(), database=database)
+    worker_b = AlertEngine(load_rule_pack(), database=database)
+    assert worker_b.count_active_alerts("p1") == 0
+
+    [alert] = worker_a.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=80)])
+    assert worker_b.process_observations("p1", [Observation(patient_id="p1", code="spo2", value=75)]) == []
+    assert worker_b.active.get("p1", alert.context["rule"]).id == alert.id
+    assert database.count_active_alerts("p1") == 1
+
+
+def test_concurrent_batches_raise_one_alert_per_rule(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    engine = AlertEngine(load_rule_pack(), database=database)
+    engine.warm()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def evaluate(value):
+        observations = [Observation(patient_id="p1", code="spo2", value=value)]
+        database.add_observations(observations)
+        barrier.wait()
+        results.append(engine.evaluate_batch(observations))
+
+    workers = [threading.Thread(target=evaluate, args=(80 - i,)) for i in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sum(len(alerts) for alerts in results) == 1
+    assert database.count_active_alerts("p1") == 1
+
+
+def test_missing_data_schedule_pops_live_deadlines_only():
+    start = datetime(2026, 1, 1, 8, 0)
+    schedule = MissingDataSchedule(timedelta(hours=12))
+    schedule.observed("p1", start)  # untracked
+    schedule.track("p1", start)
+    schedule.track("p2", None)
+    schedule.observed("p1", start + timedelta(hours=2))
+    schedule.observed("p1", start + timedelta(hours=1))
+    assert len(schedule) == 1
+    assert schedule.next_deadline() == start + timedelta(hours=14)
+    assert schedule.pop_due(start + timedelta(hours=13)) == []
+    assert schedule.pop_due(start + timedelta(hours=14)) == ["p1"]
+    assert schedule.next_deadline() is None
+
+
+def test_engine_sweeps_overdue_careplan_patients(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    now = datetime.now()
+    for patient_id in ("p1", "p2"):
+        database.create_careplan_revision(CarePlanRevision(patient_id=patient_id, field_path="dose", value="5mg", created_by="doc"))
+    database.add_observations([
+        Observation(patient_id="p1", code="weight", value=70, effective_at=now - timedelta(hours=13)),
+        Observation(patient_id="p2", code="weight", value=80, effective_at=now - timedelta(hours=1)),
+    ])
+    engine = AlertEngine(load_rule_pack(), database=database)
+    assert engine.load_missing_data_schedule() == 2
+
+    raised = engine.sweep_missing_data()
+    assert [(alert.patient_id, alert.context["rule"]) for alert in raised] == [("p1", "missing_data")]
+    assert engine.sweep_missing_data() == []
+    assert engine.sweep_missing_data(now + timedelta(hours=12)) == []  # p2 observed since (another process)
+
+    engine.process_observations("p1", [Observation(patient_id="p1", code="weight", value=71)])
+    assert engine.count_active_alerts("p1") == 0
+    assert len(engine.missing_data) == 2
+
+
+def test_failed_sweep_puts_patients_back_on_the_schedule(tmp_path, monkeypatch):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    now = datetime.now()
+    for patient_id in ("p1", "p2"):
+        database.create_careplan_revision(CarePlanRevision(patient_id=patient_id, field_path="dose", value="5mg", created_by="doc"))
+        database.add_observations([Observation(patient_id=patient_id, code="weight", value=70, effective_at=now - timedelta(hours=13))])
+    engine = AlertEngine(load_rule_pack(), database=database)
+    engine.load_missing_data_schedule()
+
+    get_last_observation = database.get_last_observation
+    monkeypatch.setattr(database, "get_last_observation", lambda patient_id: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        engine.sweep_missing_data()
+    assert len(engine.missing_data) == 2 and engine.sweep_missing_data() == []  # not due again yet
+
+    monkeypatch.setattr(database, "get_last_observation", get_last_observation)
+    raised = engine.sweep_missing_data(datetime.now() + engine.MISSING_DATA_RETRY)
+    assert sorted(alert.patient_id for alert in raised) == ["p1", "p2"]
+
+
+def test_throttle_applies_hysteresis_windows_and_rate_limits(tmp_path):
+    pack = RulePack.from_dict({
+        "defaults": {"rate_limit": {"alerts": 2, "per_minutes": 60}},
+        "rules": [
+            {"rule": "low_spo2", "codes": ["spo2"], "operator": "lt", "value": 88, "hysteresis": 2},
+            {"rule": "fever", "codes": ["temp"], "operator": "gt", "value": 38, "suppress_minutes": 30, "rate_limit": None},
+            {"rule": "tachy", "codes": ["heart_rate"], "operator": "gt", "value": 120},
+        ],
+    })
+    engine = AlertEngine(pack, database=SimpleDatabase(data_dir=str(tmp_path), events=None))
+    start = datetime(2026, 1, 1, 8, 0)
+
+    def feed(code, value, minute):
+        reading = Observation(patient_id="p1", code=code, value=value, effective_at=start + timedelta(minutes=minute))
+        alerts = engine.evaluate_batch([reading])
+        for alert in alerts:  # resolve right away so only the throttle holds alerts back
+            engine.transition_alert(alert, AlertStatus.RESOLVED, actor_id="doc", force=True)
+        return len(alerts)
+
+    # 87 -> 89 stays inside the band, 90 clears it
+    spo2 = [feed("spo2", value, minute) for minute, value in enumerate([85, 86, 87, 89, 86, 90, 84])]
+    assert spo2 == [1, 0, 0, 0, 0, 0, 1]
+    assert [feed("temp", value, minute) for minute, value in [(0, 39), (20, 39.5), (31, 40)]] == [1, 0, 1]
+    # Two tokens per hour: the third alert waits for a refill (one token per 30 minutes)
+    assert [feed("heart_rate", 130, minute) for minute in (0, 1, 2, 31)] == [1, 1, 0, 1]
+    assert engine.alert_counters() == {
+        "low_spo2": {"emitted": 2, "suppressed": 3, "hysteresis": 3, "active": 0, "window": 0, "rate_limit": 0},
+        "fever": {"emitted": 2, "suppressed": 1, "hysteresis": 0, "active": 0, "window": 1, "rate_limit": 0},
+        "tachy": {"emitted": 3, "suppressed": 1, "hysteresis": 0, "active": 0, "window": 0, "rate_limit": 1},
+    }
+
+
+def test_event_stream_fans_out_and_resumes(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    engine = AlertEngine(load_rule_pack(), database=database)
+    broker = EventBroker(history=3)
+    engine.add_listener(broker.publish)
+    database.add_listener(broker.publish)
+
+    async def scenario():
+        doctor, _ = broker.subscribe({audience_key("user", "doc"), audience_key("patient", "p1")})
+        patient, _ = broker.subscribe({audience_key("user", "p2"), audience_key("patient", "p2")})
+        [alert] = await asyncio.to_thread(engine.process_observations, "p1", [Observation(patient_id="p1", code="spo2", value=80)])
+        engine.transition_alert(alert, AlertStatus.ACKNOWLEDGED, actor_id="doc")
+        # A linked patient's notifications stay private to the patient
+        database.add_notification(Notification(user_id="p1", title="private", message="m"))
+        database.add_notification(Notification(user_id="p2", title="t", message="m"))
+        received = [await doctor.get(), await doctor.get(), await patient.get()]
+        assert [(event.kind, event.audience) for event in received] == [
+            ("alert", "patient:p1"), ("alert_status", "patient:p1"), ("notification", "user:p2"),
+        ]
+        assert received[1].data["status"] == "acknowledged" and doctor.queue.empty()
+
+        _, backlog = broker.subscribe({audience_key("user", "doc"), audience_key("patient", "p1")}, last_event_id=received[0].id)
+        assert [event.kind for event in backlog] == ["alert_status"]
+        database.remove_listener(broker.publish)
+        for _ in range(3):
+            broker.publish("notification", "p3", {})
+        _, backlog = broker.subscribe({audience_key("patient", "p1")}, last_event_id=received[0].id)
+        assert [event.kind for event in backlog] == ["resync"]
+        assert broker.subscribe({audience_key("patient", "p1")}, last_event_id="0-1")[1][0].kind == "resync"
+
+    asyncio.run(scenario())
+
+    async def abandoned():
+        broker.subscribe({audience_key("patient", "p9")})
+
+    subscribers = broker.subscriber_count()
+    asyncio.run(abandoned())
+    broker.publish("alert", "p9", {})  # its loop is closed: dropped, not raised
+    assert broker.subscriber_count() == subscribers
+
+
+def test_transition_paths_validate_first_and_persist_once(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    engine = AlertEngine(load_rule_pack(), database=database)
+    alerts = engine.process_observations("p1", [
+        Observation(patient_id="p1", code="spo2", value=80),
+        Observation(patient_id="p1", code="glucose", value=40),
+    ])
+    writes = []
+    save_alerts = database.save_alerts
+    database.save_alerts = lambda alerts, entries: writes.append((len(alerts), len(entries))) or save_alerts(alerts, entries)
+
+    assert engine.transition_path(AlertStatus.OPEN, AlertStatus.RESOLVED) == [AlertStatus.ACKNOWLEDGED, AlertStatus.RESOLVED]
+    with pytest.raises(ValueError):
+        engine.transition_path(AlertStatus.RESOLVED, AlertStatus.ACKNOWLEDGED)
+    with pytest.raises(ValueError):
+        engine.apply_transition_paths([(alerts[0], [AlertStatus.ACKNOWLEDGED]), (alerts[1], [AlertStatus.CLOSED])], "doc")
+    assert [alert.status for alert in alerts] == [AlertStatus.OPEN, AlertStatus.OPEN] and writes == []
+
+    updated = engine.apply_transition_paths(
+        [(alert, engine.transition_path(alert.status, AlertStatus.RESOLVED)) for alert in alerts], "doc", "ronda"
+    )
+    assert writes == [(2, 4)] and engine.count_active_alerts("p1") == 0
+    stored = database.get_alert_by_id(updated[0].id)
+    assert stored.status == AlertStatus.RESOLVED and stored.acknowledged_by == "doc"
+    assert [entry.status for entry in stored.timeline] == [AlertStatus.OPEN, AlertStatus.ACKNOWLEDGED, AlertStatus.RESOLVED]
+
+
+def test_quantile_sketch_is_accurate_and_mergeable():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(4, 1.2) for _ in range(5000)] + [0.0] * 50
+    left, right, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        (left if i % 2 else right).add(value)
+        whole.add(value)
+    left.merge(right)
+    assert left.buckets == whole.buckets and left.count == whole.count
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(left.quantile(q) - exact) <= 0.011 * exact
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_response_times_roll_up_by_rule_severity_and_doctor(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    engine = AlertEngine(load_rule_pack(), database=database)
+    alerts = engine.process_observations("p1", [
+        Observation(patient_id="p1", code="spo2", value=80),
+        Observation(patient_id="p1", code="glucose", value=40),
+    ])
+    for alert, doctor in zip(alerts, ("ana", "luis")):
+        alert.created_at -= timedelta(seconds=120)
+        engine.transition_alert(alert, AlertStatus.ACKNOWLEDGED, actor_id=doctor)
+
+    by_doctor = engine.response_times.summary(parse_window("1h"), "doctor")["time_to_ack_seconds"]
+    assert sorted(by_doctor) == ["all", "ana", "luis"] and by_doctor["all"]["count"] == 2
+    assert 119 < by_doctor["ana"]["p50"] < 122
+    assert engine.response_times.summary(parse_window("1h"), "rule")["time_to_resolve_seconds"] == {}
+    assert engine.response_times.summary(timedelta(hours=1), now=datetime.now() + timedelta(hours=2))["time_to_ack_seconds"] == {}
+
+    reloaded = AlertEngine(load_rule_pack(), database=database)
+    assert reloaded.load_response_times() == 2
+    assert reloaded.response_times.summary(parse_window("7d"), "severity")["time_to_ack_seconds"]["critical"]["count"] == 2
+    for window in ("8d", "0h", "soon"):
+        with pytest.raises(ValueError):
+            parse_window(window)
+
+
+def test_news2_points_and_band_rules(monkeypatch):
+    assert [component_points("respiratory_rate", value) for value in (8, 10, 16, 22, 30)] == [3, 1, 0, 2, 3]
+    assert [component_points("systolic_bp", value) for value in (90, 95, 105, 150, 220)] == [3, 2, 1, 0, 3]
+    assert component_points("temperature", 102.2, "F") == 1 and component_points("temperature", "n/a") is None
+    assert [component_points("consciousness", value) for value in ("A", "confused", "u", "")] == [0, 3, 3, None]
+    assert component_points("supplemental_oxygen", "air") == 0 and component_points("supplemental_oxygen", "yes") == 2
+
+    pack = load_rule_pack()
+    values = [4, 5, 6, 7, 12, None]
+    assert [rule.rule for rule, _ in pack.evaluate("news2", 6.0)] == ["news2_medium"]
+    vectorized = [(index, rule.rule) for index, rule, _ in pack.evaluate_batch(["news2"] * len(values), values)]
+    monkeypatch.setattr(alert_rules, "np", None)
+    plain = [(index, rule.rule) for index, rule, _ in pack.evaluate_batch(["news2"] * len(values), values)]
+    assert vectorized == plain == [(1, "news2_medium"), (2, "news2_medium"), (3, "news2_high"), (4, "news2_high")]
+    banded = RulePack.from_dict({"rules": [{"rule": "b", "type": "band", "codes": ["news2"], "min": 5, "max": 6, "hysteresis": 1}]})
+    assert [rule.clears(value) for rule in banded.rules for value in (4.5, 3.5, 7.5)] == [False, True, True]
+
+
+def test_news2_aliases_are_validated_like_their_codes():
+    pack = load_rule_pack()
+    for alias, code in pack.aliases.items():
+        assert ALLOWED_UNITS.get(alias) == ALLOWED_UNITS.get(code) and VALUE_LIMITS.get(alias) == VALUE_LIMITS.get(code)
+    assert validate_observation("SBP", "mmHg", "120") == ("sbp", 120.0)
+    with pytest.raises(ObservationValidationError):
+        validate_observation("sbp", "mmHg", 900)
+    with pytest.raises(ObservationValidationError):
+        validate_observation("rr", "bpm", 18)
+
+
+def test_news2_rescored_from_memory_and_alerted_on_bands(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    now = datetime.now()
+    earlier = now - timedelta(hours=1)
+    database.add_observations([
+        Observation(patient_id="p1", code="rr", value=22, unit="/min", effective_at=earlier),
+        Observation(patient_id="p1", code="spo2", value=95, unit="%", effective_at=earlier),
+        Observation(patient_id="p1", code="temperature", value=37, unit="c", effective_at=earlier),
+        Observation(patient_id="p1", code="sbp", value=105, unit="mmHg", effective_at=earlier),
+        Observation(patient_id="p2", code="rr", value=30, effective_at=now - timedelta(hours=20)),
+    ])
+    engine = AlertEngine(load_rule_pack(), database=database)
+    engine.warm()
+    list_observations_since = database.list_observations_since
+    database.list_observations_since = database.get_recent_observations = None
+
+    # Heart rate completes p1's set: 2 + 1 + 0 + 1 + 1 = 5
+    [alert] = engine.process_observations("p1", [Observation(patient_id="p1", code="hr", value=95, effective_at=now)])
+    assert alert.context["rule"] == "news2_medium" and alert.value == 5
+    assert engine.early_warning.score("p1", now) == (5, {
+        "respiratory_rate": 2, "spo2": 1, "temperature": 0, "systolic_bp": 1, "heart_rate": 1,
+    })
+
+    # One new component rescores on its own; a stale set scores nothing
+    later = now + timedelta(minutes=5)
+    [alert] = engine.process_observations("p1", [Observation(patient_id="p1", code="avpu", value="V", effective_at=later)])
+    assert alert.context["rule"] == "news2_high" and alert.value == 8
+    assert engine.early_warning.observe([Observation(patient_id="p2", code="hr", value=140, effective_at=now)]) == []
+    stored = list_observations_since(earlier, ["news2"])
+    assert [(obs.patient_id, obs.value, obs.source) for obs in stored] == [("p1", 5, "news2"), ("p1", 8, "news2")]
@@ -0,0 +1,515 @@
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.config import Settings
+from backend.database import CursorError, SimpleDatabase, fcntl
+from backend.models import (
+    AdjustmentAuditEntry,
+    AdjustmentStatus,
+    Alert,
+    AlertSeverity,
+    AlertStatus,
+    AlertTimelineEntry,
+    ClinicalRecord,
+    Notification,
+    Observation,
+    TreatmentAdjustment,
+    User,
+    UserType,
+)
+from backend.storage import bulk
+from backend.storage.aio import AsyncDatabase
+from backend.storage.bulk import export_ndjson, import_ndjson, import_rows, read_ndjson
+from backend.storage.convert import convert
+from backend.storage.segments import SegmentedLog
+from backend.storage.sqlite_store import SQLiteDatabase
+
+
+def _user(email: str, user_type: UserType = UserType.DOCTOR) -> User:
+    return User(email=email, password_hash="x", user_type=user_type, full_name=email.split("@")[0])
+
+
+def test_log_mode_appends_without_rewriting_snapshot(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), storage_mode="log")
+    snapshot_mtime = os.path.getmtime(database.users_file)
+
+    database.create_user(_user("a@example.com"))
+    database.create_user(_user("b@example.com"))
+
+    assert os.path.getmtime(database.users_file) == snapshot_mtime
+    assert os.path.exists(database.users_file + ".log")
+    assert database.get_user_by_email("b@example.com") is not None
+    with pytest.raises(ValueError):
+        database.create_user(_user("a@example.com"))
+    database.close()
+
+
+def test_log_mode_upserts_replay_and_compact(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), storage_mode="log")
+    alert = Alert(patient_id="p1", code="spo2", value=80, observed_at=datetime.now(), severity=AlertSeverity.CRITICAL)
+    database.save_alert(alert)
+    alert.status = AlertStatus.ACKNOWLEDGED
+    database.save_alert(alert)
+    database.add_notification(Notification(user_id="p1", title="t", message="m"))
+
+    assert [a.status for a in database.list_alerts_by_patient("p1")] == [AlertStatus.ACKNOWLEDGED]
+
+    database.compact()
+    assert not os.path.exists(database.alerts_file + ".log")
+    database.close()
+
+    reopened = SimpleDatabase(data_dir=str(tmp_path), storage_mode="json")
+    assert reopened.get_alert_by_id(alert.id).status == AlertStatus.ACKNOWLEDGED
+    assert len(reopened.list_notifications("p1")) == 1
+
+
+def test_log_mode_append_after_torn_line_survives_replay(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), storage_mode="log")
+    database.create_user(_user("a@example.com"))
+    with open(database.users_file + ".log", "a") as f:
+        f.write('{"op": "upsert", "row": {"ema')
+    database.create_user(_user("b@example.com"))
+    database.close()
+
+    reopened = SimpleDatabase(data_dir=str(tmp_path), storage_mode="log")
+    assert reopened.get_user_by_email("a@example.com") is not None
+    assert reopened.get_user_by_email("b@example.com") is not None
+    reopened.compact()
+    assert reopened.get_user_by_email("b@example.com") is not None
+    reopened.close()
+
+
+def test_unknown_storage_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SimpleDatabase(data_dir=str(tmp_path), storage_mode="nope")
+
+
+def test_cache_sees_external_edits_and_tracks_updates(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    doctor = database.create_user(_user("doc@example.com"))
+    assert database.get_user_by_id(doctor.id).email == "doc@example.com"
+
+    other = SimpleDatabase(data_dir=str(tmp_path))
+    patient = other.create_user(_user("pat@example.com", UserType.PATIENT))
+
+    assert database.get_patient_by_code(patient.patient_code).id == patient.id
+    assert [u.id for u in database.get_doctors()] == [doctor.id]
+
+    alert = Alert(patient_id=patient.id, code="spo2", value=80, observed_at=datetime.now(), severity=AlertSeverity.CRITICAL)
+    database.save_alert(alert)
+    assert len(database.list_active_alerts(patient.id)) == 1
+    alert.status = AlertStatus.CLOSED
+    database.save_alert(alert)
+    assert database.list_active_alerts(patient.id) == []
+    assert database.get_alert_by_id(alert.id).status == AlertStatus.CLOSED
+
+
+def _open(data_dir: str, storage_mode: str) -> SimpleDatabase:
+    if storage_mode == "sqlite":
+        return SQLiteDatabase(os.path.join(data_dir, "medicai.sqlite3"), data_dir=data_dir)
+    return SimpleDatabase(data_dir=data_dir, storage_mode=storage_mode)
+
+
+def _stress_worker(data_dir: str, storage_mode: str, worker: int, iterations: int):
+    database = _open(data_dir, storage_mode)
+    for i in range(iterations):
+        database.create_user(_user(f"w{worker}-{i}@example.com", UserType.PATIENT))
+        database.add_notification(Notification(user_id="shared", title=f"{worker}-{i}", message="m"))
+
+
+@pytest.mark.skipif(fcntl is None, reason="advisory locking requires fcntl")
+@pytest.mark.parametrize("storage_mode", ["json", "log", "sqlite"])
+def test_concurrent_writers_do_not_lose_rows(tmp_path, storage_mode):
+    workers, iterations = 4, 25
+    ctx = multiprocessing.get_context("fork")
+    processes = [
+        ctx.Process(target=_stress_worker, args=(str(tmp_path), storage_mode, worker, iterations))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    database = _open(str(tmp_path), storage_mode)
+    patients = database.get_patients()
+    assert len(patients) == workers * iterations
+    assert len({p.patient_code for p in patients}) == workers * iterations
+    assert len(database.list_notifications("shared")) == workers * iterations
+
+
+@pytest.mark.parametrize("storage_mode", ["json", "sqlite"])
+def test_keyset_pagination(tmp_path, storage_mode):
+    database = _open(str(tmp_path), storage_mode)
+    for i in range(7):
+        database.create_clinical_record(
+            ClinicalRecord(patient_id=f"p{i % 2}", doctor_id="d", case_text=str(i), differentials=[], tests=[])
+        )
+
+    pages, after = [], None
+    while True:
+        page = database.get_records_for_patients(["p0", "p1", "p0"], limit=3, after=after)
+        pages.append([record.case_text for record in page])
+        if len(page) < 3:
+            break
+        after = page[-1].id
+    assert pages == [["6", "5", "4"], ["3", "2", "1"], ["0"]]
+    assert [r.case_text for r in database.get_patient_records("p1", limit=2)] == ["5", "3"]
+    with pytest.raises(CursorError):
+        database.get_patient_records("p1", after="missing")
+
+    for status in (AdjustmentStatus.REQUESTED, AdjustmentStatus.APPROVED, AdjustmentStatus.UNDER_REVIEW):
+        database.create_adjustment(
+            TreatmentAdjustment(patient_id="p0", requested_by="p0", field_path="x", new_value=status.value, reason="r", status=status)
+        )
+    pending = database.list_adjustments(statuses={AdjustmentStatus.REQUESTED, AdjustmentStatus.UNDER_REVIEW}, limit=1)
+    assert [adj.status for adj in pending] == [AdjustmentStatus.REQUESTED]
+    rest = database.list_adjustments(statuses={AdjustmentStatus.REQUESTED, AdjustmentStatus.UNDER_REVIEW}, after=pending[0].id)
+    assert [adj.status for adj in rest] == [AdjustmentStatus.UNDER_REVIEW]
+    database.close()
+
+
+def test_sqlite_backend_matches_simple_database_surface(tmp_path):
+    database = _open(str(tmp_path), "sqlite")
+    doctor = database.create_user(_user("doc@example.com"))
+    patient = database.create_user(_user("pat@example.com", UserType.PATIENT))
+    with pytest.raises(ValueError):
+        database.create_user(_user("doc@example.com"))
+
+    assert database.get_user_by_email("doc@example.com").id == doctor.id
+    assert database.get_patient_by_code(patient.patient_code).id == patient.id
+    assert [u.id for u in database.get_doctors()] == [doctor.id]
+
+    alert = Alert(patient_id=patient.id, code="spo2", value=80, observed_at=datetime.now(), severity=AlertSeverity.CRITICAL)
+    database.save_alert(alert)
+    alert.status = AlertStatus.ACKNOWLEDGED
+    database.save_alert(alert)
+    assert [a.status for a in database.list_active_alerts(patient.id)] == [AlertStatus.ACKNOWLEDGED]
+
+    conn = database._connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN SELECT body FROM users WHERE email = ?", ("x",)))
+    assert "ix_users_email" in plan or "autoindex" in plan
+    database.close()
+
+
+def test_segmented_log_rotates_compresses_and_prunes(tmp_path):
+    log = SegmentedLog(str(tmp_path / "events"), "created_at", ("alert_id",), max_bytes=200)
+    start = datetime(2024, 1, 1)
+    for i in range(12):
+        log.append([{"id": str(i), "alert_id": f"a{i // 4}", "created_at": str(start + timedelta(hours=i))}])
+
+    sealed = [segment.name for segment in log.segments[:-1]]
+    assert sealed and all(name.endswith(".gz") for name in sealed)
+
+    opened = []
+    read = log._read
+    log._read = lambda name: opened.append(name) or read(name)
+    assert [row["id"] for row in log.query(alert_id="a2")] == ["8", "9", "10", "11"]
+    assert len(opened) < len(log.segments)
+
+    window = log.query(start + timedelta(hours=3), start + timedelta(hours=5))
+    assert [row["id"] for row in window] == ["3", "4", "5"]
+    reopened = SegmentedLog(str(tmp_path / "events"), "created_at", ("alert_id",), max_bytes=200)
+    assert len(reopened.query()) == 12
+
+
+def test_segmented_log_queries_alongside_appends(tmp_path):
+    log = SegmentedLog(str(tmp_path / "events"), "created_at", ("alert_id",), max_bytes=2000)
+    start = datetime(2024, 1, 1)
+    errors = []
+    done = threading.Event()
+
+    def append():
+        try:
+            for i in range(300):
+                log.append([{"id": str(i), "alert_id": f"a{i % 3}", "created_at": str(start + timedelta(minutes=i))}])
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+        finally:
+            done.set()
+
+    def query():
+        try:
+            while not done.is_set():
+                ids = [int(row["id"]) for row in log.query(alert_id="a1")]
+                assert ids == sorted(ids)
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=append)] + [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(log.query()) == 300 and sum(segment.count for segment in log.segments) == 300
+    assert len(SegmentedLog(str(tmp_path / "events"), "created_at", ("alert_id",)).query(alert_id="a1")) == 100
+
+
+@pytest.mark.parametrize("storage_mode", ["json", "sqlite"])
+def test_audit_events_queries(tmp_path, storage_mode):
+    if storage_mode == "json":
+        legacy = {"id": "old", "adjustment_id": "adj0", "actor_id": "d", "actor_role": "doctor", "action": "create", "timestamp": "2024-01-01 00:00:00"}
+        with open(tmp_path / "audit_log.json", "w") as f:
+            json.dump([legacy], f)
+    database = _open(str(tmp_path), storage_mode)
+    now = datetime.now()
+    for i in range(4):
+        database._record_audit_event(AdjustmentAuditEntry(
+            adjustment_id=f"adj{i % 2}", actor_id="d", actor_role=UserType.DOCTOR, action="review",
+            timestamp=now + timedelta(minutes=i),
+        ))
+
+    assert len(database.list_audit_events("adj1")) == 2
+    assert len(database.list_audit_events(start=now + timedelta(minutes=1), end=now + timedelta(minutes=2))) == 2
+    if storage_mode == "json":
+        assert [entry.id for entry in database.list_audit_events("adj0")][0] == "old"
+        assert not os.path.exists(tmp_path / "audit_log.json")
+    database.close()
+
+
+def test_observation_series_queries_and_rebuild(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    now = datetime.now()
+    database.add_observations([
+        Observation(patient_id="p1", code="hr", value=70, effective_at=now - timedelta(minutes=1)),
+        Observation(patient_id="p1", code="hr", value=90, effective_at=now - timedelta(minutes=30)),
+        Observation(patient_id="p1", code="spo2", value=95, effective_at=now - timedelta(minutes=2)),
+    ])
+    # Late arrival lands in timestamp order, not append order
+    database.add_observations([Observation(patient_id="p1", code="hr", value=80, effective_at=now - timedelta(minutes=5))])
+
+    assert [o.value for o in database.list_observations("p1", "hr")] == [70, 80, 90]
+    assert [o.code for o in database.list_observations("p1")] == ["hr", "spo2", "hr", "hr"]
+    assert database.get_last_observation("p1", "hr").value == 70
+    assert [o.value for o in database.get_recent_observations("p1", "hr", within_minutes=10)] == [70, 80]
+    assert [o.value for o in database.list_recent_observations_by_code("p1", per_code=1)] == [70, 95]
+
+    SimpleDatabase(data_dir=str(tmp_path)).add_observations([
+        Observation(patient_id="p1", code="hr", value=65, effective_at=now),
+    ])
+    assert database.get_last_observation("p1").value == 65
+
+
+def test_async_facade_offloads_storage_calls(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    offloaded, inline = AsyncDatabase(database, max_workers=2), AsyncDatabase(database, max_workers=0)
+
+    async def scenario():
+        doctor = await offloaded.create_user(_user("doc@example.com"))
+        assert (await inline.get_user_by_id(doctor.id)).email == "doc@example.com"
+        assert await offloaded.run(threading.current_thread) is not threading.current_thread()
+        assert await inline.run(threading.current_thread) is threading.current_thread()
+
+    asyncio.run(scenario())
+    offloaded.shutdown()
+    with pytest.raises(AttributeError):
+        offloaded._rows
+
+
+def test_group_commit_coalesces_concurrent_appends(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), coalesce_window=0.05, coalesce_max_ops=8)
+    flushes = []
+    append_rows = database._append_rows
+    database._append_rows = lambda file_path, rows: flushes.append(len(rows)) or append_rows(file_path, rows)
+
+    threads = [
+        threading.Thread(target=database.add_notification, args=(Notification(user_id="p1", title=str(i), message="m"),))
+        for i in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(flushes) == 16 and len(flushes) < 16
+    assert len(SimpleDatabase(data_dir=str(tmp_path)).list_notifications("p1")) == 16
+
+
+def test_msgpack_format_and_converter(tmp_path):
+    pytest.importorskip("msgpack")
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    doctor = database.create_user(_user("doc@example.com"))
+    database.add_notification(Notification(user_id=doctor.id, title="t", message="m"))
+
+    counts = convert(str(tmp_path), "json", "msgpack", remove=True)
+    assert counts["users.msgpack"] == 1 and not os.path.exists(tmp_path / "users.json")
+
+    converted = SimpleDatabase(data_dir=str(tmp_path), storage_format="msgpack")
+    assert converted.get_user_by_email("doc@example.com").created_at == doctor.created_at
+    converted.create_user(_user("other@example.com"))
+    assert len(SimpleDatabase(data_dir=str(tmp_path), storage_format="msgpack").get_doctors()) == 2
+    with pytest.raises(ValueError):
+        SimpleDatabase(data_dir=str(tmp_path), storage_format="xml")
+
+
+def test_projected_reads_return_view_models(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    record = database.create_clinical_record(
+        ClinicalRecord(patient_id="p1", doctor_id="d1", case_text="fiebre", differentials=[{"condition": "x"}], tests=[])
+    )
+
+    view = database.get_patient_records("p1", fields=("case_text", "created_at"))[0]
+    assert view.id == record.id and view.created_at == record.created_at
+    assert view.dict() == {"id": record.id, "case_text": "fiebre", "created_at": record.created_at}
+    with pytest.raises(AttributeError):
+        view.doctor_id
+    with pytest.raises(ValueError):
+        database.get_patient_records("p1", fields=("nope",))
+
+
+@pytest.mark.parametrize("storage_mode", ["json", "sqlite"])
+def test_patient_codes_are_reserved_atomically(tmp_path, storage_mode):
+    database = _open(str(tmp_path), storage_mode)
+    patient = database.create_user(_user("pat@example.com", UserType.PATIENT))
+    assert patient.patient_code and not database.claim_patient_code(patient.patient_code)
+
+    duplicate = _user("dup@example.com", UserType.PATIENT)
+    duplicate.patient_code = patient.patient_code
+    with pytest.raises(ValueError):
+        database.create_user(duplicate)
+
+    database._load_json = database._rows = None  # claiming a code must not read users
+    assert len({database.generate_patient_code() for _ in range(50)}) == 50
+    database.close()
+
+
+def test_patient_code_reservations_are_backfilled(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    patient = database.create_user(_user("pat@example.com", UserType.PATIENT))
+    for name in os.listdir(database.patient_codes_dir):
+        os.remove(os.path.join(database.patient_codes_dir, name))
+    os.rmdir(database.patient_codes_dir)
+
+    reopened = SimpleDatabase(data_dir=str(tmp_path))
+    assert not reopened.claim_patient_code(patient.patient_code)
+
+
+def test_bulk_export_import_round_trip(tmp_path):
+    source = SimpleDatabase(data_dir=str(tmp_path / "src"))
+    patient = source.create_user(_user("pat@example.com", UserType.PATIENT))
+    source.create_user(_user("doc@example.com"))
+    source.add_observations([Observation(patient_id=patient.id, code="spo2", value=90 + i) for i in range(5)])
+    alert = Alert(patient_id=patient.id, code="spo2", value=85, observed_at=datetime.now(), severity=AlertSeverity.CRITICAL)
+    source.create_alert(alert, AlertTimelineEntry(alert_id=alert.id, status=AlertStatus.OPEN))
+    target = SimpleDatabase(data_dir=str(tmp_path / "dst"))
+    target.create_user(_user("doc@example.com"))  # same email, different id
+
+    progress = []
+    for collection in ("users", "observations", "alerts"):
+        buffer = io.StringIO()
+        export_ndjson(source, collection, buffer)
+        buffer.seek(0)
+        rows = read_ndjson(buffer)
+        progress.append(import_rows(target, collection, rows, batch_size=2))
+    assert progress == [(1, 1), (5, 0), (1, 0)]
+    assert target.get_user_by_email("pat@example.com").patient_code == patient.patient_code
+    assert not target.claim_patient_code(patient.patient_code)
+    assert len(target.list_observations(patient.id)) == 5
+    assert [event.alert_id for event in target.list_alert_events(alert.id)] == [alert.id]
+
+    buffer = io.StringIO()
+    export_ndjson(source, "observations", buffer)
+    buffer.seek(0)
+    assert import_rows(target, "observations", read_ndjson(buffer)) == (0, 5)
+    with pytest.raises(ValueError):
+        list(read_ndjson(io.StringIO("{not json}\n")))
+
+
+def test_bulk_import_appends_batches_and_reports_bad_lines(tmp_path, monkeypatch, capsys):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    saves = []
+    save_json = database._save_json
+    monkeypatch.setattr(database, "_save_json", lambda path, *args, **kw: saves.append(path) or save_json(path, *args, **kw))
+    lines = [json.dumps(_user(f"u{i}@example.com").dict(), default=str) for i in range(10)]
+
+    assert import_ndjson(database, "users", io.StringIO("\n".join(lines) + "\n"), batch_size=3) == (10, 0)
+    assert saves == [database.users_file]
+    assert not os.path.exists(database.users_file + ".log")
+    assert SimpleDatabase(data_dir=str(tmp_path)).get_user_by_email("u9@example.com") is not None
+
+    bad = io.StringIO(lines[0] + "\n\n" + json.dumps({"email": "x@example.com"}) + "\n")
+    with pytest.raises(ValueError, match=r"users line 3: .*password_hash"):
+        import_ndjson(database, "users", bad)
+
+    path = tmp_path / "users.ndjson"
+    path.write_text("{not json}\n")
+    monkeypatch.setattr(bulk, "get_settings", lambda: Settings(data_dir=str(tmp_path), events_backend="json"))
+    with pytest.raises(SystemExit) as exit_info:
+        bulk.main(["import", "users", str(path)])
+    assert exit_info.value.code == 1
+    assert "line 1" in capsys.readouterr().err
+
+
+def test_sharded_layout_routes_per_patient(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path), shards=4)
+    patients = [f"p{i}" for i in range(8)]
+    start = datetime(2024, 1, 1)
+    for i in range(16):
+        record = ClinicalRecord(patient_id=patients[i % 8], doctor_id="d1", case_text=str(i), differentials=[], tests=[])
+        record.created_at = start + timedelta(minutes=i)
+        database.create_clinical_record(record)
+    database.add_observations([Observation(patient_id=patient, code="spo2", value=95) for patient in patients])
+    alert = Alert(patient_id="p3", code="spo2", value=85, observed_at=datetime.now(), severity=AlertSeverity.CRITICAL)
+    database.create_alert(alert, AlertTimelineEntry(alert_id=alert.id, status=AlertStatus.OPEN))
+
+    shard_file = database._shard_for(database.records_file, "p3")
+    others = [shard for shard in database._shard_files(database.records_file) if shard != shard_file]
+    assert "p3" in {row["patient_id"] for row in database._rows(shard_file)}
+    assert all(row["patient_id"] != "p3" for shard in others for row in database._rows(shard))
+    assert not os.path.exists(database.records_file)
+
+    assert [r.case_text for r in database.get_patient_records("p3")] == ["11", "3"]
+    first = database.get_doctor_records("d1", limit=5)
+    rest = database.get_doctor_records("d1", limit=20, after=first[-1].id)
+    assert [r.case_text for r in first + rest] == [str(i) for i in range(15, -1, -1)]
+    assert database.get_alert_by_id(alert.id).patient_id == "p3"
+    assert database.count_active_alerts("p3") == 1
+    assert database.get_last_observation("p5").value == 95
+    with pytest.raises(CursorError):
+        database.get_doctor_records("d1", after="missing")
+
+    reopened = SimpleDatabase(data_dir=str(tmp_path))
+    assert reopened.shards == 4 and len(reopened.get_doctor_records("d1")) == 16
+    with pytest.raises(ValueError):
+        SimpleDatabase(data_dir=str(tmp_path), shards=8)
+
+
+def test_unsharded_data_dir_is_split_on_first_open(tmp_path):
+    database = SimpleDatabase(data_dir=str(tmp_path))
+    records = [
+        database.create_clinical_record(ClinicalRecord(patient_id=f"p{i}", doctor_id="d1", case_text="x", differentials=[], tests=[]))
+        for i in range(6)
+    ]
+    sharded = SimpleDatabase(data_dir=str(tmp_path), shards=3)
+    assert os.path.exists(database.records_file + ".migrated")
+    assert sorted(r.id for r in sharded.get_doctor_records("d1")) == sorted(r.id for r in records)
+    assert sharded.get_record_by_id(records[2].id).patient_id == "p2"
+
+
+@pytest.mark.parametrize("storage_mode", ["json", "log", "sqlite"])
+def test_save_alerts_upserts_many_with_their_entries(tmp_path, storage_mode):
+    database = _open(str(tmp_path), storage_mode)
+    alerts = [
+        Alert(patient_id=f"p{i}", code="spo2", value=80, observed_at=datetime.now(), severity=AlertSeverity.CRITICAL)
+        for i in range(3)
+    ]
+    database.create_alerts(alerts[:2])
+    entries = []
+    for alert in alerts:
+        alert.status = AlertStatus.ACKNOWLEDGED
+        entries.append(AlertTimelineEntry(alert_id=alert.id, status=AlertStatus.ACKNOWLEDGED, actor_id="d1"))
+    database.save_alerts(alerts, entries)
+
+    reopened = _open(str(tmp_path), storage_mode)
+    assert [reopened.get_alert_by_id(alert.id).status for alert in alerts] == [AlertStatus.ACKNOWLEDGED] * 3
+    assert len(reopened.list_alert_events(actor_id="d1")) == 3
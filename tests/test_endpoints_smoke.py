@@ -1,7 +1,19 @@
+import asyncio
+from datetime import datetime, timedelta
+
 import pytest
+from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
-from backend.main import app
+import backend.auth
+import backend.main
+import backend.services.alert_engine
+from backend.database import SimpleDatabase
+from backend.main import app, create_app
+from backend.models import AlertStatus, CarePlanRevision, Observation
+from backend.services.alert_engine import AlertEngine
+from backend.services.alert_rules import load_rule_pack
+from backend.storage.aio import AsyncDatabase
 
 
 @pytest.mark.asyncio
@@ -10,3 +22,77 @@ async def test_health_endpoint() -> None:
         response = await client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+@pytest.fixture
+def file_db(tmp_path, monkeypatch):
+    """The app's storage swapped for a JSON store under tmp_path"""
+    database = SimpleDatabase(data_dir=str(tmp_path), events=None)
+    async_database = AsyncDatabase(database, max_workers=2)
+    monkeypatch.setattr(backend.main, "db", database)
+    for module in (backend.main, backend.auth):
+        monkeypatch.setattr(module, "adb", async_database)
+    monkeypatch.setattr(backend.services.alert_engine, "db", database)
+    return database
+
+
+def _register(client, email, user_type):
+    response = client.post(
+        "/auth/register", json={"email": email, "password": "pw", "full_name": email, "user_type": user_type}
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return body["user"]["id"], {"Authorization": f"Bearer {body['token']}"}
+
+
+def test_app_starts_when_warm_up_fails(file_db, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("events database unavailable")
+
+    monkeypatch.setattr(file_db, "list_observations_since", unavailable)
+    monkeypatch.setattr(file_db, "list_careplan_patient_ids", unavailable)
+    with TestClient(create_app()) as client:
+        assert client.get("/health").json() == {"status": "ok"}
+        _register(client, "d@x.com", "doctor")
+
+
+def test_ingest_resolves_missing_data_alert(file_db):
+    with TestClient(create_app()) as client:
+        _, doctor = _register(client, "d@x.com", "doctor")
+        patient_id, patient = _register(client, "p@x.com", "patient")
+        client.post("/patients/share", json={"patient_id": patient_id, "doctor_email": "d@x.com"}, headers=patient)
+
+        file_db.create_careplan_revision(CarePlanRevision(patient_id=patient_id, field_path="dose", value="5mg", created_by="doc"))
+        file_db.add_observations([
+            Observation(patient_id=patient_id, code="weight", value=70, effective_at=datetime.now() - timedelta(hours=13)),
+        ])
+        assert AlertEngine(load_rule_pack(), database=file_db).evaluate_missing_data(patient_id) is not None
+        assert client.get(f"/dashboard/{patient_id}", headers=doctor).json()["activeAlerts"] == 1
+
+        response = client.post(
+            "/observations/batch",
+            json={"patientId": patient_id, "observations": [{"code": "weight", "value": 71, "unit": "kg"}]},
+            headers=doctor,
+        )
+        assert response.status_code == 202, response.text
+        assert [alert.status for alert in file_db.list_alerts_by_patient(patient_id, include_closed=True)] == [
+            AlertStatus.CLOSED
+        ]
+        assert client.get(f"/dashboard/{patient_id}", headers=doctor).json()["activeAlerts"] == 0
+
+
+def test_stream_takes_only_short_lived_stream_tokens_in_the_url(file_db):
+    with TestClient(create_app()) as client:
+        patient_id, patient = _register(client, "p@x.com", "patient")
+        response = client.post("/stream/token", headers=patient)
+        assert response.status_code == 200, response.text
+        stream_token = response.json()["token"]
+
+        # A session token is never accepted in the URL, and a stream token opens nothing else
+        session_token = patient["Authorization"].split()[1]
+        assert client.get("/stream", params={"stream_token": session_token}).status_code == 401
+        assert client.get("/stream", params={"access_token": session_token}).status_code == 401
+        assert client.get("/clinical-records/my-history", headers={"Authorization": f"Bearer {stream_token}"}).status_code == 401
+
+    user = asyncio.run(backend.auth.get_stream_user(None, stream_token))
+    assert user.id == patient_id
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import SimpleDatabase
+from backend.db.models import Base
+from backend.db.repository import ClinicalEventRepository
+from backend.models import Alert, AlertSeverity, AlertStatus, AlertTimelineEntry, Observation
+
+
+@pytest.fixture()
+def database(tmp_path):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    events = ClinicalEventRepository(sessionmaker(bind=engine, autocommit=False, autoflush=False))
+    return SimpleDatabase(data_dir=str(tmp_path), events=events)
+
+
+def test_observation_range_queries(database):
+    now = datetime.now()
+    database.add_observations([
+        Observation(patient_id="p1", code="heart_rate", value=60 + i, unit="bpm", effective_at=now - timedelta(minutes=i))
+        for i in range(15)
+    ] + [Observation(patient_id="p1", code="spo2", value=97, unit="%", effective_at=now - timedelta(hours=1))])
+
+    assert database.get_last_observation("p1").value == 60
+    assert database.get_last_observation("p1", "spo2").value == 97
+    assert len(database.get_recent_observations("p1", "heart_rate", within_minutes=5)) == 5
+
+    recent = database.list_recent_observations_by_code("p1", per_code=10)
+    assert sum(1 for obs in recent if obs.code == "heart_rate") == 10
+    assert [obs.effective_at for obs in recent] == sorted((obs.effective_at for obs in recent), reverse=True)
+    assert database.list_observations("p2") == []
+
+
+def test_alert_lifecycle_round_trip(database):
+    alert = Alert(
+        patient_id="p1",
+        code="spo2",
+        value=82.0,
+        unit="%",
+        observed_at=datetime.now(),
+        severity=AlertSeverity.CRITICAL,
+        context={"rule": "low_spo2", "message": "SpO2 por debajo de 88%"},
+    )
+    database.create_alert(alert, AlertTimelineEntry(alert_id=alert.id, status=AlertStatus.OPEN))
+    assert database.count_active_alerts("p1") == 1
+
+    alert.status = AlertStatus.CLOSED
+    database.save_alert_with_entry(alert, AlertTimelineEntry(alert_id=alert.id, status=AlertStatus.CLOSED, actor_id="doc"))
+
+    stored = database.get_alert_by_id(alert.id)
+    assert stored.status == AlertStatus.CLOSED
+    assert [entry.status for entry in stored.timeline] == [AlertStatus.OPEN, AlertStatus.CLOSED]
+    assert stored.context["rule"] == "low_spo2"
+    assert [entry.actor_id for entry in database.list_alert_events(alert.id)] == [None, "doc"]
+    assert database.list_active_alerts("p1") == []
+    assert database.get_alert_by_id("not-a-uuid") is None
+
+
+def test_bulk_import_skips_existing_and_streams_back(database):
+    now = datetime.now()
+    observations = [Observation(patient_id="p1", code="heart_rate", value=70 + i, effective_at=now - timedelta(minutes=i))
+                    for i in range(4)]
+    alert = Alert(patient_id="p1", code="spo2", value=82.0, observed_at=now, severity=AlertSeverity.CRITICAL)
+    alert.timeline.append(AlertTimelineEntry(alert_id=alert.id, status=AlertStatus.OPEN))
+
+    assert database.import_observations(observations[:2]) == 2
+    assert database.import_observations(observations) == 2
+    assert database.import_alerts([alert]) == 1
+    assert database.import_alerts([alert]) == 0
+
+    assert sorted(obs.id for obs in database.events.iter_observations(batch_size=2)) == sorted(o.id for o in observations)
+    [stored] = database.events.iter_alerts()
+    assert [entry.status for entry in stored.timeline] == [AlertStatus.OPEN]